@@ -0,0 +1,51 @@
+import os
+import shutil
+import hashlib
+from PyQt6.QtCore import QStandardPaths
+
+APP_DIR_NAME = "pivideoplayer"
+
+
+# アプリ用キャッシュディレクトリのパスを返す（なければ作成する）
+def cache_dir(*parts):
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, APP_DIR_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ファイルの同一性を判定するためのキー（パス・サイズ・更新時刻）
+def file_signature(path):
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+# ファイル内容から求めるキャッシュキー
+# full=False の場合はサイズと先頭・末尾のブロックだけを読む（大きな動画でも高速）
+def content_hash(path, full=False, block_size=1024 * 1024):
+    digest = hashlib.sha1()
+    size = os.path.getsize(path)
+    digest.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if full or size <= 2 * block_size:
+            for chunk in iter(lambda: f.read(block_size), b""):
+                digest.update(chunk)
+        else:
+            digest.update(f.read(block_size))
+            f.seek(-block_size, os.SEEK_END)
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+BACKGROUND_NICENESS = 10
+
+
+# バックグラウンドの外部コマンド（ffmpeg など）を低優先度で起動するためのコマンド列
+# preexec_fn はスレッドのあるプロセスでは fork 後にデッドロックしうるので、nice コマンドを前に付ける
+def low_priority_command(command):
+    nice = shutil.which("nice") if os.name == "posix" else None
+    if nice is None:
+        return command
+    return [nice, "-n", str(BACKGROUND_NICENESS)] + command
@@ -0,0 +1,208 @@
+import time
+import queue
+import threading
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtMultimedia import QAudioFormat
+
+try:
+    import numpy as np
+except ImportError:  # メーターなしで動かす
+    np = None
+try:
+    from PyQt6.QtMultimedia import QAudioBufferOutput  # Qt 6.8 以降
+except ImportError:
+    QAudioBufferOutput = None
+
+METER_INTERVAL_MS = 33  # 表示へ送る間隔（約30fps）
+METER_FLOOR_DB = -60.0  # メーターの下端
+PEAK_HOLD_MS = 1000
+PEAK_FALL_DB_PER_S = 20.0
+SILENCE_DB = -120.0
+
+# サンプル形式 -> (NumPy の型, オフセット, フルスケール)
+SAMPLE_FORMATS = {
+    QAudioFormat.SampleFormat.UInt8: ('u1', 128.0, 128.0),
+    QAudioFormat.SampleFormat.Int16: ('<i2', 0.0, 32768.0),
+    QAudioFormat.SampleFormat.Int32: ('<i4', 0.0, 2147483648.0),
+    QAudioFormat.SampleFormat.Float: ('<f4', 0.0, 1.0),
+}
+
+
+def to_db(value):
+    return 20.0 * np.log10(np.maximum(value, 1e-6))
+
+
+# ブロックをまとめて (チャンネル数,) のピークと二乗和を求める
+def block_levels(raw, dtype, offset, full_scale, channels):
+    samples = np.frombuffer(raw, dtype=dtype)
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    if len(samples) == 0:
+        return None
+    values = samples.astype(np.float32)
+    if offset:
+        values -= offset
+    values *= 1.0 / full_scale
+    return np.abs(values).max(axis=0), np.einsum('ij,ij->j', values, values), len(values)
+
+
+# 再生中の音声バッファを受け取り、チャンネルごとのピークと RMS を求めるメーター
+# QAudioBufferOutput から届いたバッファはその場でコピーしてキューに積むだけにし、計算はワーカースレッドで
+# 溜まった分をまとめて NumPy で行う。表示には METER_INTERVAL_MS ごとに 1 回だけ levels_changed を出す
+class AudioLevelMeter(QObject):
+    # [(ピーク dBFS, RMS dBFS), ...] チャンネル順
+    levels_changed = pyqtSignal(object)
+
+    def __init__(self, interval_ms=METER_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.interval_s = interval_ms / 1000
+        self.available = np is not None and QAudioBufferOutput is not None
+        self.output = None
+        if self.available:
+            self.output = QAudioBufferOutput(self)
+            # バックエンドのスレッドで届いた場合もそこでコピーだけして返す（GUI スレッドを経由しない）
+            self.output.audioBufferReceived.connect(self._on_buffer, Qt.ConnectionType.DirectConnection)
+        self.blocks = queue.SimpleQueue()
+        self.running = False
+        self.thread = None
+        self.processed_frames = 0
+
+    def start(self):
+        if np is None or self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="audio-meter", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.blocks.put(None)
+        if self.thread is not None:
+            self.thread.join(1)
+            self.thread = None
+
+    # 生のサンプルを積む（sample_format は QAudioFormat.SampleFormat）
+    def feed(self, raw, sample_format, channels):
+        spec = SAMPLE_FORMATS.get(sample_format)
+        if spec is not None and channels > 0:
+            self.blocks.put((raw, spec, channels))
+
+    def _on_buffer(self, buffer):
+        audio_format = buffer.format()
+        data = buffer.constData()
+        data.setsize(buffer.byteCount())
+        self.feed(bytes(data), audio_format.sampleFormat(), audio_format.channelCount())
+
+    def _run(self):
+        peak = None
+        sum_squares = None
+        frames = 0
+        next_emit = time.monotonic() + self.interval_s
+        while self.running:
+            try:
+                item = self.blocks.get(timeout=self.interval_s)
+            except queue.Empty:
+                item = False
+            # 届いている分をまとめて処理する
+            batch = []
+            while item:
+                batch.append(item)
+                try:
+                    item = self.blocks.get_nowait()
+                except queue.Empty:
+                    item = False
+            if item is None:
+                break
+            for (dtype, offset, full_scale, channels), group in self._group(batch):
+                levels = block_levels(b"".join(group), dtype, offset, full_scale, channels)
+                if levels is None:
+                    continue
+                block_peak, block_squares, count = levels
+                if peak is None or len(peak) != channels:
+                    peak, sum_squares, frames = block_peak, block_squares, 0
+                else:
+                    peak = np.maximum(peak, block_peak)
+                    sum_squares = sum_squares + block_squares
+                frames += count
+                self.processed_frames += count
+            now = time.monotonic()
+            if now >= next_emit:
+                next_emit = now + self.interval_s
+                if peak is not None and frames:
+                    rms = np.sqrt(sum_squares / frames)
+                    self.levels_changed.emit(list(zip(to_db(peak).tolist(), to_db(rms).tolist())))
+                peak, sum_squares, frames = None, None, 0
+
+    # 同じ形式の連続したブロックをまとめる
+    @staticmethod
+    def _group(batch):
+        groups = []
+        for raw, (dtype, offset, full_scale), channels in batch:
+            key = (dtype, offset, full_scale, channels)
+            if groups and groups[-1][0] == key:
+                groups[-1][1].append(raw)
+            else:
+                groups.append((key, [raw]))
+        return groups
+
+
+# チャンネルごとの横向きのバー（RMS を塗り、ピークを線、ピークホールドを印で示す）
+class AudioMeterWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.levels = []
+        self.holds = []  # (dB, 保持し始めた時刻)
+        self.setFixedSize(140, 28)
+        # 更新が途絶えたら（停止・無音のデバイス）バーを下げる
+        self.decay_timer = QTimer(self)
+        self.decay_timer.setInterval(METER_INTERVAL_MS * 3)
+        self.decay_timer.timeout.connect(self._decay)
+
+    def set_levels(self, levels):
+        now = time.monotonic()
+        if len(self.holds) != len(levels):
+            self.holds = [(SILENCE_DB, now)] * len(levels)
+        for i, (peak_db, _) in enumerate(levels):
+            hold_db, since = self.holds[i]
+            if peak_db >= hold_db:
+                self.holds[i] = (peak_db, now)
+            elif now - since > PEAK_HOLD_MS / 1000:
+                fallen = hold_db - PEAK_FALL_DB_PER_S * (now - since - PEAK_HOLD_MS / 1000)
+                self.holds[i] = (max(peak_db, fallen), since)
+        self.levels = levels
+        self.decay_timer.start()
+        self.update()
+
+    def reset(self):
+        self.levels = []
+        self.holds = []
+        self.decay_timer.stop()
+        self.update()
+
+    def _decay(self):
+        self.set_levels([(SILENCE_DB, SILENCE_DB)] * len(self.levels))
+        if all(hold_db <= METER_FLOOR_DB for hold_db, _ in self.holds):
+            self.reset()
+
+    @staticmethod
+    def _fraction(db):
+        return min(1.0, max(0.0, (db - METER_FLOOR_DB) / -METER_FLOOR_DB))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("black"))
+        count = max(1, len(self.levels))
+        bar_height = (self.height() - (count + 1)) / count
+        width = self.width() - 2
+        for i, (peak_db, rms_db) in enumerate(self.levels):
+            top = int(1 + i * (bar_height + 1))
+            height = max(1, int(bar_height))
+            rms_width = int(width * self._fraction(rms_db))
+            color = QColor("red") if peak_db > -1 else QColor("yellow") if peak_db > -12 else QColor("lime")
+            painter.fillRect(1, top, rms_width, height, color.darker(130))
+            painter.fillRect(1 + int(width * self._fraction(peak_db)) - 1, top, 2, height, color)
+            if i < len(self.holds):
+                painter.fillRect(1 + int(width * self._fraction(self.holds[i][0])) - 1, top, 2, height,
+                                 QColor("white"))
+        painter.end()
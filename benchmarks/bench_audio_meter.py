@@ -0,0 +1,106 @@
+# 音声レベルメーターの処理コスト計測（ヘッドレス）
+# 48kHz ステレオの合成音声を再生時と同じ大きさのバッファに分けて流し、
+# 音声 1 秒あたりの CPU 時間（NumPy の計算のみ／まとめ処理あり／ワーカースレッド経由）を JSON で出力する
+#
+#   python benchmarks/bench_audio_meter.py --seconds 60 --output meter.json
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop
+from PyQt6.QtMultimedia import QAudioFormat
+
+from audio_meter import AudioLevelMeter, SAMPLE_FORMATS, block_levels, np
+
+
+# 左右で周波数の違うサイン波（int16 インターリーブ）をバッファごとの bytes にする
+def make_buffers(seconds, sample_rate, channels, frames_per_buffer):
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    signal = np.stack([np.sin(2 * np.pi * (440 + 220 * c) * t) * 0.5 for c in range(channels)], axis=1)
+    pcm = (signal * 32767).astype('<i2')
+    return [pcm[i:i + frames_per_buffer].tobytes() for i in range(0, len(pcm), frames_per_buffer)]
+
+
+def bench_per_buffer(buffers, channels, seconds):
+    dtype, offset, full_scale = SAMPLE_FORMATS[QAudioFormat.SampleFormat.Int16]
+    started = time.process_time()
+    for raw in buffers:
+        block_levels(raw, dtype, offset, full_scale, channels)
+    return (time.process_time() - started) * 1000 / seconds
+
+
+def bench_batched(buffers, channels, seconds, batch):
+    dtype, offset, full_scale = SAMPLE_FORMATS[QAudioFormat.SampleFormat.Int16]
+    started = time.process_time()
+    for i in range(0, len(buffers), batch):
+        block_levels(b"".join(buffers[i:i + batch]), dtype, offset, full_scale, channels)
+    return (time.process_time() - started) * 1000 / seconds
+
+
+# feed() からワーカーで処理し終わるまで（バッファのコピーとキュー操作を含む）
+def bench_worker(buffers, channels, seconds):
+    app = QCoreApplication.instance()
+    meter = AudioLevelMeter()
+    emitted = []
+    meter.levels_changed.connect(emitted.append)
+    meter.start()
+    total_frames = sum(len(raw) // (2 * channels) for raw in buffers)
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for raw in buffers:
+        meter.feed(bytes(raw), QAudioFormat.SampleFormat.Int16, channels)
+    while meter.processed_frames < total_frames and time.perf_counter() - started < 30:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    cpu_ms = (time.process_time() - started_cpu) * 1000
+    wall_ms = (time.perf_counter() - started) * 1000
+    meter.stop()
+    app.processEvents()
+    return {'cpu_ms_per_audio_s': cpu_ms / seconds, 'wall_ms': wall_ms,
+            'frames_processed': meter.processed_frames, 'level_updates': len(emitted)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU cost of the audio level meter per second of audio")
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--sample-rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--frames-per-buffer", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=4, help="buffers combined per NumPy call in the batched run")
+    args = parser.parse_args()
+
+    if np is None:
+        print("NumPy is not installed; the audio meter is disabled.")
+        return
+    app = QCoreApplication(sys.argv)
+    buffers = make_buffers(args.seconds, args.sample_rate, args.channels, args.frames_per_buffer)
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'config': vars(args),
+        'buffers': len(buffers),
+        'per_buffer_cpu_ms_per_audio_s': bench_per_buffer(buffers, args.channels, args.seconds),
+        'batched_cpu_ms_per_audio_s': bench_batched(buffers, args.channels, args.seconds, args.batch),
+        'worker': bench_worker(buffers, args.channels, args.seconds),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# コンフィデンスモニターの処理コスト計測（ヘッドレス）
+# 合成した 1080p のフレームを再生時と同じ間隔でモニターに渡し、
+# 映像 1 秒あたりの CPU 時間・実際に縮小したフレーム数・実効フレームレートを JSON で出力する
+#
+#   python benchmarks/bench_confidence_monitor.py --seconds 20 --fps 10 --cpu-percent 5
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QT_VERSION_STR
+from PyQt6.QtGui import QGuiApplication, QImage, QColor
+from PyQt6.QtMultimedia import QVideoFrame
+
+from confidence_monitor import ConfidenceMonitor, DEFAULT_MONITOR_FPS, DEFAULT_MONITOR_CPU_PERCENT
+
+
+def make_frames(width, height, count):
+    frames = []
+    for i in range(count):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor.fromHsv(i * 360 // count, 200, 200))
+        frames.append(QVideoFrame(image))
+    return frames
+
+
+# 描画側のスレッドと同じように _on_frame を直接呼び、届いた縮小画像を数える
+def bench_monitor(frames, seconds, source_fps, fps, cpu_percent):
+    app = QGuiApplication.instance()
+    monitor = ConfidenceMonitor(fps, cpu_percent)
+    received = []
+    monitor.frame_ready.connect(received.append)
+    monitor.set_enabled(True)
+    interval_s = 1.0 / source_fps
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    next_frame = started
+    i = 0
+    while time.perf_counter() - started < seconds:
+        monitor._on_frame(frames[i % len(frames)])
+        i += 1
+        next_frame += interval_s
+        app.processEvents()
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    cpu_ms = (time.process_time() - started_cpu) * 1000
+    monitor.set_enabled(False)
+    app.processEvents()
+    return {'cpu_ms_per_video_s': cpu_ms / seconds, 'frames_offered': monitor.counts['offered'],
+            'frames_taken': monitor.counts['taken'], 'frames_rendered': monitor.counts['rendered'],
+            'frames_received': len(received), 'rendered_fps': monitor.counts['rendered'] / seconds,
+            'frame_cost_ms': monitor.frame_cost_s * 1000, 'effective_fps_limit': monitor.effective_fps()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU cost of the confidence monitor per second of video")
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--source-fps", type=float, default=60)
+    parser.add_argument("--fps", type=int, default=DEFAULT_MONITOR_FPS)
+    parser.add_argument("--cpu-percent", type=int, default=DEFAULT_MONITOR_CPU_PERCENT)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    frames = make_frames(args.width, args.height, 8)
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'platform': platform.platform(),
+        'config': vars(args),
+        'monitor': bench_monitor(frames, args.seconds, args.source_fps, args.fps, args.cpu_percent),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# 複数の出力グループに同じクリップを同時に出したときのベンチマーク（ヘッドレス）
+# 出力数 N を増やしながら、各グループの前面レイヤーのシンクに届いたフレーム数・取りこぼし・
+# 出力間の開始ずれを測り、取りこぼしが許容範囲に収まる最大の N を JSON で出力する
+#
+#   python benchmarks/bench_multi_output.py --max-outputs 4 --output multi.json
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QEventLoop
+
+from bench_player import generate_clips, wait_for
+
+CLIP_FPS = 30
+
+
+# 各出力グループの前面レイヤーのシンクに、計測区間（start から stop まで）に届いたフレームを数える
+# 背面レイヤーや区間外のフレームは数えない
+class FrameCounter:
+    def __init__(self, groups):
+        self.counts = [0] * len(groups)
+        self.started = None
+        self.stopped = None
+        self._connections = []
+        for i, group in enumerate(groups):
+            sink = group.stack.front_sink()
+            handler = (lambda frame, i=i: self._on_frame(i))
+            sink.videoFrameChanged.connect(handler)
+            self._connections.append((sink, handler))
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.stopped = time.perf_counter()
+        self.disconnect()
+
+    def _on_frame(self, index):
+        if self.started is None or self.stopped is not None:
+            return
+        self.counts[index] += 1
+
+    def disconnect(self):
+        for sink, handler in self._connections:
+            sink.videoFrameChanged.disconnect(handler)
+        self._connections = []
+
+
+# 各出力グループに最初のフレームが出た時刻（出力間の開始ずれ用）
+class StartRecorder:
+    def __init__(self, groups):
+        self.first_frame_at = [None] * len(groups)
+        self._connections = []
+        for i, group in enumerate(groups):
+            handler = (lambda latency_ms, warm, i=i: self._on_first_frame(i))
+            group.stack.first_frame_presented.connect(handler)
+            self._connections.append((group.stack, handler))
+
+    def _on_first_frame(self, index):
+        if self.first_frame_at[index] is None:
+            self.first_frame_at[index] = time.perf_counter()
+
+    def disconnect(self):
+        for stack, handler in self._connections:
+            stack.first_frame_presented.disconnect(handler)
+        self._connections = []
+
+
+def bench_outputs(controller, output_count, seconds, drop_tolerance):
+    while len(controller.output_groups) < output_count:
+        controller.add_output_group(0, 0)
+    while len(controller.output_groups) > output_count:
+        controller.remove_output_group()
+    controller.video_paths.edit(0)['outputs'] = list(range(output_count))
+
+    app = QApplication.instance()
+    recorder = StartRecorder(controller.output_groups)
+    controller.play_video_from_button(0)
+    wait_for(controller.output.first_frame_presented)
+    # 全出力の切り替えが終わってから前面レイヤーを数え始める
+    deadline = time.perf_counter() + 3
+    while None in recorder.first_frame_at and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 10)
+    recorder.disconnect()
+
+    counter = FrameCounter(controller.output_groups)
+    counter.start()
+    while time.perf_counter() - counter.started < seconds:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+    counter.stop()
+    controller.stop_video()
+
+    expected = int(CLIP_FPS * (counter.stopped - counter.started))
+    groups = []
+    for i, count in enumerate(counter.counts):
+        groups.append({
+            'frames': count,
+            'dropped': max(0, expected - count),
+            'drop_ratio': max(0, expected - count) / expected if expected else 0,
+        })
+    starts = [t for t in recorder.first_frame_at if t is not None]
+    return {
+        'outputs': output_count,
+        'expected_frames': expected,
+        'groups': groups,
+        'start_skew_ms': (max(starts) - min(starts)) * 1000 if len(starts) > 1 else 0.0,
+        'sustainable': all(g['drop_ratio'] <= drop_tolerance for g in groups) and len(starts) == output_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark for mirrored multi-output playback")
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--max-outputs", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="measurement window per output count")
+    parser.add_argument("--clip-size", default="1920x1080")
+    parser.add_argument("--drop-tolerance", type=float, default=0.02,
+                        help="largest dropped-frame ratio still counted as sustainable")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    from video_player import VideoPlayer
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt_platform': os.environ.get("QT_QPA_PLATFORM"),
+        'config': vars(args),
+    }
+
+    controller = VideoPlayer()
+    with tempfile.TemporaryDirectory() as directory:
+        clips = generate_clips(directory, 1, int(args.seconds) + 5, args.clip_size)
+        if clips:
+            controller.video_paths.set_path(0, clips[0])
+            controller.video_paths.edit(0)['loop'] = True
+            controller.update_ui_from_settings()
+            runs = [bench_outputs(controller, n, args.seconds, args.drop_tolerance)
+                    for n in range(1, args.max_outputs + 1)]
+            report['runs'] = runs
+            sustainable = [run['outputs'] for run in runs if run['sustainable']]
+            report['max_sustainable_outputs'] = max(sustainable) if sustainable else 0
+        else:
+            report['skipped'] = ["runs"]
+            report['skip_reason'] = "ffmpeg not found; cannot generate test clips"
+        controller.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
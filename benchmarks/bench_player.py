@@ -0,0 +1,395 @@
+# ヘッドレス（Qt の offscreen プラットフォーム）で動かすベンチマーク
+# キューから最初のフレームまでの時間、連打したときの最後のキューまでの時間、再生/一時停止の切り替え、position_changed の処理コスト、
+# バンク切り替えの時間、クロスフェード中の表示フレームレート、Stream Deck のキー描画・エンコードのスループットを測り、
+# JSON で出力する
+#
+#   python benchmarks/bench_player.py --output bench.json
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QEventLoop, QTimer, QObject, QEvent
+from PyQt6.QtMultimedia import QMediaPlayer
+
+from transitions import TRANSITION_CUT, TRANSITION_CROSSFADE
+
+
+# 統計値をまとめる
+def summarize(samples_ms):
+    if not samples_ms:
+        return None
+    ordered = sorted(samples_ms)
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered),
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min_ms': ordered[0],
+        'max_ms': ordered[-1],
+    }
+
+
+# シグナルが来るかタイムアウトするまでイベントループを回す
+def wait_for(signal, timeout_ms=5000):
+    loop = QEventLoop()
+    result = []
+
+    def on_signal(*args):
+        result.append(args)
+        loop.quit()
+
+    signal.connect(on_signal)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    signal.disconnect(on_signal)
+    return result[0] if result else None
+
+
+# ffmpeg でテスト用のクリップを生成する
+def generate_clips(directory, count, seconds, size):
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return []
+    clips = []
+    for i in range(count):
+        path = os.path.join(directory, f"clip_{i + 1}.mp4")
+        subprocess.run([ffmpeg, "-v", "error", "-y",
+                        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={seconds}",
+                        "-f", "lavfi", "-i", f"sine=frequency={440 + i * 110}:duration={seconds}",
+                        "-c:v", "libx264", "-g", "60", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path],
+                       check=True)
+        clips.append(path)
+    return clips
+
+
+def bench_cue_latency(controller, clips, repeats):
+    results = {}
+    for label, preload in (("cold", False), ("warm", True)):
+        controller.set_preload_enabled(preload)
+        # プールの準備ができるまで少し待つ
+        wait_for(controller.output.positionChanged, 1000 if preload else 0)
+        samples = []
+        for r in range(repeats):
+            index = r % len(clips)
+            started = time.perf_counter()
+            controller.play_video_from_button(index)
+            if wait_for(controller.output.first_frame_presented) is not None:
+                samples.append((time.perf_counter() - started) * 1000)
+            wait_for(controller.output.positionChanged, 200)
+        results[label] = summarize(samples)
+    controller.stop_video()
+    return results
+
+
+def bench_toggle_latency(controller, repeats):
+    controller.play_video_from_button(0)
+    wait_for(controller.output.first_frame_presented)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        controller.toggle_play_pause()
+        if wait_for(controller.output.playbackStateChanged, 2000) is not None:
+            samples.append((time.perf_counter() - started) * 1000)
+    controller.stop_video()
+    return summarize(samples)
+
+
+# position_changed の記録コストと、表示更新ティックごとのラベル・Stream Deck への通知コスト
+# ティックごとに表示上の秒が変わるように 1 秒ずつ進める（毎ティック通知が出る最悪の場合）
+def bench_position_fanout(controller, iterations, ticks=300, duration_ms=3_600_000):
+    scheduler = controller.display_scheduler
+    controller.current_playing_button_index = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        controller.position_changed(i * 10)
+    record_ms = (time.perf_counter() - started) * 1000
+
+    emitted = {'displayed_time_changed': 0, 'position_updated': 0}
+
+    def count_time(position, duration):
+        emitted['displayed_time_changed'] += 1
+
+    def count_deck(index, position, duration):
+        emitted['position_updated'] += 1
+
+    scheduler.displayed_time_changed.connect(count_time)
+    controller.position_updated.connect(count_deck)
+    scheduler.reset()
+    tick_ms = []
+    for i in range(ticks):
+        scheduler.update_position((i + 1) * 1000, duration_ms)
+        started = time.perf_counter()
+        scheduler.refresh()
+        tick_ms.append((time.perf_counter() - started) * 1000)
+    scheduler.displayed_time_changed.disconnect(count_time)
+    controller.position_updated.disconnect(count_deck)
+    scheduler.reset()
+    controller.current_playing_button_index = -1
+    return {'iterations': iterations, 'per_call_us': record_ms * 1000 / iterations,
+            'refresh_ticks': ticks, 'refresh': summarize(tick_ms), **emitted}
+
+
+# 再生ウィンドウのビューポートが描画された回数（画面に出たフレーム数）を数える
+class PaintCounter(QObject):
+    def __init__(self, widget):
+        super().__init__(widget)
+        self.widget = widget
+        self.count = 0
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.count += 1
+        return False
+
+    def remove(self):
+        self.widget.removeEventFilter(self)
+
+
+# 一定時間イベントループを回し、その間の表示フレームレートと CPU 時間を測る
+def measure_presented(counter, seconds):
+    app = QApplication.instance()
+    counter.count = 0
+    started = time.perf_counter()
+    started_cpu = time.process_time()
+    while time.perf_counter() - started < seconds:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'presented_fps': counter.count / elapsed,
+            'cpu_ms_per_s': (time.process_time() - started_cpu) * 1000 / elapsed}
+
+
+# 1 レイヤーだけの通常再生（基準）と、2 レイヤーを合成するクロスフェード中の表示フレームレートを比べる
+def bench_crossfade_fps(controller, clips, duration_ms=1000):
+    window = controller.output_groups[0].window
+    counter = PaintCounter(window.view.viewport())
+    saved = [controller.video_paths.get(i, {}).get('transition') for i in range(2)]
+    controller.video_paths.edit(0)['transition'] = {'type': TRANSITION_CUT, 'duration': 0}
+    controller.video_paths.edit(1)['transition'] = {'type': TRANSITION_CROSSFADE, 'duration': duration_ms}
+
+    controller.play_video_from_button(0)
+    wait_for(controller.output.first_frame_presented)
+    baseline = measure_presented(counter, duration_ms / 1000)
+    controller.play_video_from_button(1)
+    crossfade = None
+    if wait_for(controller.output.first_frame_presented) is not None:
+        crossfade = measure_presented(counter, duration_ms / 1000)
+    controller.stop_video()
+    counter.remove()
+    for i, transition in enumerate(saved):
+        controller.video_paths.edit(i)['transition'] = transition
+    return {
+        'duration_ms': duration_ms,
+        'single_layer': baseline,
+        'crossfade': crossfade,
+        'fps_ratio': crossfade['presented_fps'] / baseline['presented_fps']
+        if crossfade and baseline['presented_fps'] else None,
+    }
+
+
+def bench_deck_render(handler, deck, iterations):
+    requests = {
+        'slot': lambda i: ('slot', str(i % 9 + 1), f"clip_{i}.mp4", bool(i % 2), "00:01:00", ""),
+        'time': lambda i: ('time', handler.format_time(i * 1000), handler.format_time(3600000 - i * 1000)),
+        'pause': lambda i: ('pause', QMediaPlayer.PlaybackState.PlayingState if i % 2
+                            else QMediaPlayer.PlaybackState.PausedState),
+        'blank': lambda i: ('blank',),
+        'transport': lambda i: (('stop',), ('bank_prev',), ('bank_next',))[i % 3],
+        'bank': lambda i: ('bank', str(i % 100 + 1)),
+    }
+    results = {}
+    for kind, make in requests.items():
+        started = time.perf_counter()
+        for i in range(iterations):
+            handler._render_uncached(deck, make(i))
+        elapsed = time.perf_counter() - started
+        results[kind] = {'renders_per_s': iterations / elapsed, 'per_render_ms': elapsed * 1000 / iterations}
+
+    # キャッシュ経由（同じ状態の再描画）
+    started = time.perf_counter()
+    for i in range(iterations):
+        handler._render_request(deck, requests['slot'](0))
+    elapsed = time.perf_counter() - started
+    results['slot_cached'] = {'renders_per_s': iterations / elapsed, 'per_render_ms': elapsed * 1000 / iterations}
+    return results
+
+
+# 大量のキューを読み込んだ状態でのバンク切り替え（コントローラーの 9 スロット更新と Stream Deck のページ送信）
+def bench_bank_switch(controller, handler, cue_count, switches):
+    saved = controller.video_paths
+    from cue_library import CueLibrary, SLOTS_PER_BANK
+    library = CueLibrary()
+    for index in range(cue_count):
+        library.set_path(index, f"/bench/cue_{index:05}.mp4")
+    controller.video_paths = library
+    controller.bank_changed.connect(handler.set_bank)
+    bank_count = library.bank_count()
+    samples = []
+    for i in range(switches):
+        bank = (i * 7) % bank_count
+        started = time.perf_counter()
+        controller.set_bank(bank)
+        samples.append((time.perf_counter() - started) * 1000)
+    controller.bank_changed.disconnect(handler.set_bank)
+    controller.video_paths = saved
+    controller.set_bank(0)
+    return {'cues': cue_count, 'banks': bank_count, 'slots_per_bank': SLOTS_PER_BANK,
+            'switch': summarize(samples)}
+
+
+# シミュレートしたデッキから高頻度でキーを押し、key_change_callback → key_pressed →
+# play_video_from_button の経路がどこまで追従できるかを測る
+def bench_key_press_load(handler, deck, controller, slot_count, rate_hz, presses):
+    handled = []
+    handler.key_pressed.connect(controller.play_video_from_button)
+    handler.key_pressed.connect(lambda key: handled.append(time.perf_counter()))
+    script = [i % slot_count for i in range(presses)]
+    started = time.perf_counter()
+    thread = deck.run_script(script, rate_hz=rate_hz)
+    while thread.is_alive() or len(handled) < presses:
+        app = QApplication.instance()
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+        if time.perf_counter() - started > presses / max(rate_hz, 1) + 10:
+            break
+    elapsed = time.perf_counter() - started
+    handler.key_pressed.disconnect()
+    controller.stop_video()
+    return {
+        'presses': presses,
+        'target_rate_hz': rate_hz,
+        'handled': len(handled),
+        'achieved_rate_hz': len(handled) / elapsed if elapsed else 0,
+        'drain_ms': (handled[-1] - started) * 1000 if handled else None,
+    }
+
+
+# 短い間隔で違うキューを続けて押したとき、最後の入力から最後のキューの最初のフレームまでの時間と、
+# その間にボタンの状態（playback_state_changed）が何回切り替わったかを調停の待ち時間ごとに測る
+def bench_trigger_burst(controller, clip_count, bursts, burst_size, interval_ms):
+    app = QApplication.instance()
+    saved_debounce = controller.trigger_arbiter.debounce_ms
+    presented = []
+    transitions = []
+    on_frame = lambda latency, warm: presented.append((time.perf_counter(), controller.current_playing_button_index))
+    on_state = lambda index, playing: transitions.append(index) if playing else None
+    controller.output_groups[0].stack.first_frame_presented.connect(on_frame)
+    controller.playback_state_changed.connect(on_state)
+    results = {}
+    for debounce_ms in (0, saved_debounce):
+        controller.trigger_arbiter.debounce_ms = debounce_ms
+        to_final, flips = [], []
+        for b in range(bursts):
+            controller.stop_video()
+            presented.clear()
+            transitions.clear()
+            sequence = [(b + i) % clip_count for i in range(burst_size)]
+            for index in sequence:
+                controller.trigger_cue(index)
+                deadline = time.perf_counter() + interval_ms / 1000
+                while time.perf_counter() < deadline:
+                    app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 1)
+            last_press = time.perf_counter()
+            deadline = last_press + 5
+            while time.perf_counter() < deadline and not any(i == sequence[-1] for _, i in presented):
+                app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+            final = [t for t, i in presented if i == sequence[-1]]
+            if final:
+                to_final.append((final[0] - last_press) * 1000)
+            flips.append(len(transitions))
+        results[f"debounce_{debounce_ms}ms"] = {
+            'last_press_to_final_frame': summarize(to_final),
+            'state_transitions_per_burst': statistics.fmean(flips) if flips else None,
+        }
+    results['counts'] = dict(controller.trigger_arbiter.counts)
+    controller.output_groups[0].stack.first_frame_presented.disconnect(on_frame)
+    controller.playback_state_changed.disconnect(on_state)
+    controller.trigger_arbiter.debounce_ms = saved_debounce
+    controller.stop_video()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for cue latency and Stream Deck rendering")
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--clips", type=int, default=3)
+    parser.add_argument("--clip-seconds", type=int, default=5)
+    parser.add_argument("--clip-size", default="1280x720")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--deck-model", default="mk2")
+    parser.add_argument("--usb-latency-ms", type=float, default=1.0)
+    parser.add_argument("--press-rate", type=int, default=200, help="scripted key presses per second")
+    parser.add_argument("--library-cues", type=int, default=5000, help="cues loaded for the bank switch benchmark")
+    parser.add_argument("--burst-size", type=int, default=5, help="different cues pressed in one burst")
+    parser.add_argument("--burst-interval-ms", type=float, default=40, help="time between presses in a burst")
+    parser.add_argument("--crossfade-ms", type=int, default=1000, help="crossfade length for the frame-rate benchmark")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    from video_player import VideoPlayer
+    from streamdeck_handler import StreamDeckHandler
+    from fake_streamdeck import SimulatedStreamDeck
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt_platform': os.environ.get("QT_QPA_PLATFORM"),
+        'config': vars(args),
+    }
+
+    deck = SimulatedStreamDeck(args.deck_model, write_latency_ms=args.usb_latency_ms)
+    handler = StreamDeckHandler(lambda: [deck])
+    handler.streamdeck_thread.join()
+    report['deck_render'] = bench_deck_render(handler, deck, args.iterations)
+
+    controller = VideoPlayer()
+    controller.position_updated.connect(handler.update_time_display)
+    report['position_fanout'] = bench_position_fanout(controller, args.iterations * 10)
+    report['bank_switch'] = bench_bank_switch(controller, handler, args.library_cues, args.iterations)
+
+    with tempfile.TemporaryDirectory() as directory:
+        clips = generate_clips(directory, args.clips, args.clip_seconds, args.clip_size)
+        if clips:
+            for i, path in enumerate(clips):
+                controller.video_paths.set_path(i, path)
+            controller.update_ui_from_settings()
+            report['cue_to_first_frame'] = bench_cue_latency(controller, clips, args.repeats)
+            report['toggle_play_pause'] = bench_toggle_latency(controller, args.repeats)
+            if len(clips) >= 2:
+                report['crossfade_fps'] = bench_crossfade_fps(controller, clips, args.crossfade_ms)
+            report['trigger_burst'] = bench_trigger_burst(controller, len(clips), args.repeats,
+                                                          args.burst_size, args.burst_interval_ms)
+            report['key_press_load'] = bench_key_press_load(handler, deck, controller, len(clips),
+                                                            args.press_rate, args.repeats * 20)
+        else:
+            report['skipped'] = ["cue_to_first_frame", "toggle_play_pause", "crossfade_fps", "trigger_burst",
+                                 "key_press_load"]
+            report['skip_reason'] = "ffmpeg not found; cannot generate test clips"
+        controller.close()
+
+    handler.cleanup()
+    report['deck_writes'] = deck.stats()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
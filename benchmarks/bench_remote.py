@@ -0,0 +1,146 @@
+# リモート操作サーバーのループバック計測（ヘッドレス）
+# 同じプロセスのクライアントから OSC/UDP と HTTP でコマンドを送り、
+# 送信から Qt スレッドのスロットに届くまでの時間、ping の往復時間、状態通知の遅れを JSON で出力する
+#
+#   python benchmarks/bench_remote.py --count 500 --output remote.json
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import http.client
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop
+
+from bench_player import summarize
+from remote_control import RemoteControlServer, encode_osc_message, decode_osc_packet
+
+
+# Qt スレッドに届いたコマンドを記録する
+class Receiver:
+    def __init__(self):
+        self.received = []
+
+    def on_cue(self, index):
+        self.received.append((index, time.perf_counter()))
+
+
+def pump_until(predicate, timeout_s=2.0):
+    app = QCoreApplication.instance()
+    deadline = time.perf_counter() + timeout_s
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 1)
+    return predicate()
+
+
+def bench_osc_dispatch(server, receiver, count):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    samples = []
+    for i in range(count):
+        expected = len(receiver.received) + 1
+        started = time.perf_counter()
+        sock.sendto(encode_osc_message("/pivideoplayer/cue", i % 9 + 1), (server.host, server.osc_port))
+        if pump_until(lambda: len(receiver.received) >= expected):
+            samples.append((receiver.received[-1][1] - started) * 1000)
+    sock.close()
+    return summarize(samples)
+
+
+def bench_http_dispatch(server, receiver, count):
+    round_trip, delivered = [], []
+    for i in range(count):
+        expected = len(receiver.received) + 1
+        connection = http.client.HTTPConnection(server.host, server.http_port, timeout=2)
+        started = time.perf_counter()
+        connection.request("POST", f"/cue/{i % 9 + 1}")
+        connection.getresponse().read()
+        round_trip.append((time.perf_counter() - started) * 1000)
+        connection.close()
+        if pump_until(lambda: len(receiver.received) >= expected):
+            delivered.append((receiver.received[-1][1] - started) * 1000)
+    return {'round_trip': summarize(round_trip), 'to_qt_slot': summarize(delivered)}
+
+
+def bench_osc_ping(server, count):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(1)
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        sock.sendto(encode_osc_message("/ping", i), (server.host, server.osc_port))
+        try:
+            data, _ = sock.recvfrom(1024)
+        except socket.timeout:
+            continue
+        if decode_osc_packet(data)[0] == ("/pong", [i]):
+            samples.append((time.perf_counter() - started) * 1000)
+    sock.close()
+    return summarize(samples)
+
+
+# 状態を更新してから購読クライアントに /state が届くまで（送信間隔による間引きを含む）
+def bench_state_push(server, count):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1)
+    sock.sendto(encode_osc_message("/subscribe", sock.getsockname()[1]), (server.host, server.osc_port))
+    sock.recvfrom(1024)  # 購読直後に送られる現在の状態
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        server.update_position(0, (i + 1) * 1000, 3600000)
+        try:
+            while True:
+                data, _ = sock.recvfrom(1024)
+                address, args = decode_osc_packet(data)[0]
+                if address == "/state" and args[1] == (i + 1) * 1000:
+                    break
+        except socket.timeout:
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+    sock.sendto(encode_osc_message("/unsubscribe", sock.getsockname()[1]), (server.host, server.osc_port))
+    sock.close()
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loopback latency benchmark for the remote-control server")
+    parser.add_argument("--output", help="JSON output path (default: stdout)")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--push-count", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    server = RemoteControlServer("127.0.0.1", 0, 0)
+    receiver = Receiver()
+    server.cue_requested.connect(receiver.on_cue)
+    server.start()
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'osc_to_qt_slot': bench_osc_dispatch(server, receiver, args.count),
+        'http': bench_http_dispatch(server, receiver, args.count),
+        'osc_ping_round_trip': bench_osc_ping(server, args.count),
+        'state_push': bench_state_push(server, args.push_count),
+    }
+    server.stop()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os
+import time
+import threading
+from PyQt6.QtCore import QObject, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtWidgets import QWidget
+
+DEFAULT_MONITOR_FPS = 10
+DEFAULT_MONITOR_CPU_PERCENT = 5  # 1 コアに対する縮小処理の上限
+MONITOR_SIZE = QSize(192, 108)
+COST_SMOOTHING = 0.2  # 1 フレームの処理時間の移動平均の重み
+
+
+def _lower_thread_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+# 本番出力の映像レイヤーの QVideoSink からフレームを受け取り、縮小した画像を作るタップ
+# フレームの受け取りは描画側のスレッドで参照を置くだけ（latest-wins）。変換と縮小は低優先度の
+# ワーカースレッドで行い、GUI スレッドには縮小済みの小さな QImage だけが届く。
+# 次のフレームを受け付けるまでの間隔は max(1 / fps, 処理時間 / CPU 上限) で決め、
+# 重いフレームが続けば自動的に間引きを増やす
+class ConfidenceMonitor(QObject):
+    frame_ready = pyqtSignal(QImage)
+
+    def __init__(self, fps=DEFAULT_MONITOR_FPS, cpu_percent=DEFAULT_MONITOR_CPU_PERCENT, size=MONITOR_SIZE,
+                 parent=None):
+        super().__init__(parent)
+        self.fps = fps
+        self.cpu_percent = cpu_percent
+        self.size = size
+        self.sink = None
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.latest = None  # ワーカーがまだ処理していない最新フレーム
+        self.wake = threading.Event()
+        self.next_due = 0.0  # 次のフレームを受け付ける時刻（monotonic 秒）
+        self.frame_cost_s = 0.0
+        self.counts = {'offered': 0, 'taken': 0, 'rendered': 0}
+        self.running = False
+        self.thread = None
+
+    def set_rate(self, fps, cpu_percent):
+        self.fps = max(1, fps)
+        self.cpu_percent = max(1, cpu_percent)
+
+    # 監視する QVideoSink を切り替える（前面レイヤーが入れ替わるたびに呼ぶ。None で外す）
+    def set_sink(self, sink):
+        if self.sink is sink:
+            return
+        if self.sink is not None:
+            try:
+                self.sink.videoFrameChanged.disconnect(self._on_frame)
+            except (TypeError, RuntimeError):  # 再生ウィンドウと一緒に破棄済み
+                pass
+        self.sink = sink
+        if sink is not None:
+            # 描画側のスレッドで受け取り、GUI スレッドのイベントキューを通さない
+            sink.videoFrameChanged.connect(self._on_frame, Qt.ConnectionType.DirectConnection)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled and not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="confidence-monitor", daemon=True)
+            self.thread.start()
+        elif not enabled and self.running:
+            self.stop()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(1)
+            self.thread = None
+
+    # 次の受け付け時刻までのフレームは参照も取らずに捨てる
+    def _on_frame(self, frame):
+        if not self.enabled:
+            return
+        self.counts['offered'] += 1
+        now = time.monotonic()
+        if now < self.next_due or not frame.isValid():
+            return
+        self.next_due = now + self._interval_s()
+        with self.lock:
+            self.latest = frame
+        self.counts['taken'] += 1
+        self.wake.set()
+
+    def _interval_s(self):
+        return max(1.0 / self.fps, self.frame_cost_s / (self.cpu_percent / 100.0))
+
+    def _run(self):
+        _lower_thread_priority()
+        while self.running:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                frame, self.latest = self.latest, None
+            if frame is None:
+                continue
+            started = time.thread_time()
+            image = frame.toImage()
+            frame = None
+            if image.isNull():
+                continue
+            image = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.FastTransformation)
+            cost_s = time.thread_time() - started
+            self.frame_cost_s += COST_SMOOTHING * (cost_s - self.frame_cost_s)
+            self.counts['rendered'] += 1
+            self.frame_ready.emit(image)
+
+    def effective_fps(self):
+        return 1.0 / self._interval_s()
+
+
+# 縮小済みのフレームを描くだけのウィジェット（受け取った画像はそのまま描画し、拡大縮小しない）
+class ConfidenceMonitorWidget(QWidget):
+    def __init__(self, size=MONITOR_SIZE, parent=None):
+        super().__init__(parent)
+        self.image = None
+        self.setFixedSize(size)
+
+    def set_image(self, image):
+        self.image = image
+        self.update()
+
+    def clear(self):
+        self.image = None
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("black"))
+        if self.image is not None:
+            x = (self.width() - self.image.width()) // 2
+            y = (self.height() - self.image.height()) // 2
+            painter.drawImage(x, y, self.image)
+        painter.end()
@@ -0,0 +1,96 @@
+from transitions import DEFAULT_TRANSITION
+
+# Cues are numbered globally; a bank is one page of SLOTS_PER_BANK cues on the controller
+# grid and the Stream Deck. Global index = bank * SLOTS_PER_BANK + slot.
+SLOTS_PER_BANK = 9
+MIN_BANKS = 1
+
+
+def new_cue():
+    return {'path': None, 'loop': False, 'transition': dict(DEFAULT_TRANSITION), 'preload_ram': False,
+            'outputs': [0], 'in_ms': 0, 'out_ms': None}
+
+
+def cue_index(bank, slot):
+    return bank * SLOTS_PER_BANK + slot
+
+
+def split_index(index):
+    return divmod(index, SLOTS_PER_BANK)
+
+
+# Global index -> cue settings. Only cues that were touched are stored, so a library with
+# thousands of cues costs nothing for the empty ones, and every lookup is a dict access.
+# Reads never create entries (use .get()); edit() creates an empty cue for writes.
+# Loaded indices and the highest one are tracked as paths change, so bank_count() is O(1).
+class CueLibrary(dict):
+    def __init__(self, entries=None):
+        super().__init__()
+        self._by_path = {}  # file path -> set of indices using it
+        self._loaded = set()  # indices that hold a file
+        self._max_loaded = -1
+        for index, cue in (entries or {}).items():
+            merged = new_cue()
+            merged.update(cue)
+            self[int(index)] = merged
+            if merged.get('path'):
+                self.set_path(int(index), merged['path'])
+
+    # The cue at index for writing, created empty if it was never touched
+    def edit(self, index):
+        cue = self.get(index)
+        if cue is None:
+            cue = self[index] = new_cue()
+        return cue
+
+    def cue(self, bank, slot):
+        return self.get(cue_index(bank, slot), {})
+
+    def set_path(self, index, path):
+        cue = self.edit(index)
+        old_path = cue.get('path')
+        if old_path:
+            self._by_path.get(old_path, set()).discard(index)
+        cue['path'] = path
+        if path:
+            self._by_path.setdefault(path, set()).add(index)
+            self._loaded.add(index)
+            self._max_loaded = max(self._max_loaded, index)
+        elif index in self._loaded:
+            self._loaded.discard(index)
+            if index == self._max_loaded:
+                self._max_loaded = max(self._loaded, default=-1)
+
+    # Indices currently assigned to a file (a clip can sit on several cues)
+    def indices_for_path(self, path):
+        return sorted(i for i in self._by_path.get(path, ()) if self.get(i, {}).get('path') == path)
+
+    def loaded_indices(self):
+        return sorted(self._loaded)
+
+    def loaded_count(self):
+        return len(self._loaded)
+
+    def bank_indices(self, bank):
+        start = cue_index(bank, 0)
+        return range(start, start + SLOTS_PER_BANK)
+
+    # Banks needed to reach the last loaded cue, plus one empty bank to load into
+    def bank_count(self):
+        last_bank = split_index(self._max_loaded)[0] if self._max_loaded >= 0 else -1
+        return max(MIN_BANKS, last_bank + 2)
+
+    # Loaded cues ordered for warming: the given bank first, then outward from it.
+    # Lazy, so a caller that only wants a few cues never walks the whole library.
+    def warm_order(self, bank):
+        banks = self.bank_count()
+        for distance in range(banks):
+            for nearby in ((bank,) if distance == 0 else (bank + distance, bank - distance)):
+                if 0 <= nearby < banks:
+                    for index in self.bank_indices(nearby):
+                        if self.get(index, {}).get('path'):
+                            yield index
+
+    # Only cues that hold a file are written to settings
+    def to_dict(self):
+        return {str(i): cue for i, cue in sorted(self.items()) if cue.get('path')}
@@ -0,0 +1,270 @@
+import os
+import time
+import itertools
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from app_paths import cache_dir
+
+DEFAULT_LEAD_TIME_MS = 500  # キューの何 ms 前にプレーヤーを準備するか
+WAKE_MARGIN_MS = 20  # 目標時刻のこれだけ前に起きて、残りは短いタイマーで詰める
+FIRE_EARLY_MS = 2  # 残りがこれ未満になったら待たずに出す（早まった分は誤差として記録される）
+CHAIN_HORIZON_MS = 5000  # 連鎖キューの目標時刻を見積もり始める残り時間
+RECENT_RECORDS = 500
+OUTPUT_MATCH_WINDOW_MS = 5000  # トリガー後この時間内に出た最初のフレームを、その予定の出力とみなす
+SCHEDULE_WALL = "wall"
+SCHEDULE_CHAIN = "chain"
+
+
+# "19:30:00.000" / "19:30" -> その日の 0 時からの秒
+def parse_clock(text):
+    parts = text.strip().split(":")
+    if not 2 <= len(parts) <= 3:
+        raise ValueError(f"invalid time of day: {text}")
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = float(parts[2]) if len(parts) == 3 else 0.0
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"invalid time of day: {text}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+# "01:23.500" / "1:02:03.250" / "83.5" -> ミリ秒
+def parse_timecode(text):
+    total = 0.0
+    for part in text.strip().split(":"):
+        total = total * 60 + float(part)
+    if total < 0:
+        raise ValueError(f"invalid timecode: {text}")
+    return int(round(total * 1000))
+
+
+def format_timecode(ms):
+    seconds, millis = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02}:{seconds:02}.{millis:03}"
+
+
+# 壁時計の時刻（今日、過ぎていれば明日）をモノトニック時計の ns に換算する
+def wall_clock_to_monotonic_ns(seconds_of_day):
+    now_wall = time.time()
+    now_ns = time.monotonic_ns()
+    local = time.localtime(now_wall)
+    midnight = now_wall - (local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec) - (now_wall % 1)
+    target_wall = midnight + seconds_of_day
+    if target_wall <= now_wall:
+        target_wall += 24 * 3600
+    return now_ns + int((target_wall - now_wall) * 1e9)
+
+
+# 指定時刻・他のキューの再生位置でキューを出すスケジューラー
+# 目標時刻はモノトニック時計で持ち、PreciseTimer で少し手前に起きてから短いタイマーで詰める。
+# リード時間前に prearm_requested でプレーヤーを準備させ、時刻になったら trigger を出す
+# （受け手は play_video_from_button と同じ経路で再生する）。予定と実際の差はログに残す
+# （トリガーを出した時刻との差と、on_output_started で知らされた最初のフレームの時刻との差の両方）
+class CueScheduler(QObject):
+    prearm_requested = pyqtSignal(int)  # キュー番号
+    disarm_requested = pyqtSignal(int)
+    trigger = pyqtSignal(int)
+    schedule_changed = pyqtSignal()
+
+    def __init__(self, lead_time_ms=DEFAULT_LEAD_TIME_MS, log_path=None, parent=None):
+        super().__init__(parent)
+        self.lead_time_ms = lead_time_ms
+        self.log_path = log_path or os.path.join(cache_dir(), "cue_schedule.log")
+        self.entries = {}  # id -> 予定
+        self.records = deque(maxlen=RECENT_RECORDS)  # (id, キュー番号, 種類, 誤差 ms)
+        self.output_records = deque(maxlen=RECENT_RECORDS)  # 同上（最初のフレームが出た時刻との差）
+        self.awaiting_output = None  # トリガーして最初のフレームを待っている予定
+        self._ids = itertools.count(1)
+
+    # --- 予定の登録 ---
+
+    # 壁時計の時刻（"19:30:00.000"）にキューを出す
+    def schedule_at(self, index, clock_text):
+        seconds_of_day = parse_clock(clock_text)
+        entry = self._new_entry(index, SCHEDULE_WALL, clock=clock_text)
+        self._set_target(entry, wall_clock_to_monotonic_ns(seconds_of_day))
+        return entry['id']
+
+    # after_index のキューが position_ms に達したらキューを出す
+    def schedule_after(self, index, after_index, position_ms):
+        entry = self._new_entry(index, SCHEDULE_CHAIN, after=after_index, position_ms=int(position_ms))
+        return entry['id']
+
+    def cancel(self, entry_id):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._stop_timers(entry)
+        if entry['armed']:
+            self.disarm_requested.emit(entry['index'])
+        self.schedule_changed.emit()
+
+    def cancel_for(self, index):
+        for entry_id in [e['id'] for e in self.entries.values() if e['index'] == index]:
+            self.cancel(entry_id)
+
+    def clear(self):
+        for entry_id in list(self.entries):
+            self.cancel(entry_id)
+
+    def entries_for(self, index):
+        return [e for e in self.entries.values() if e['index'] == index]
+
+    # 設定ファイル用（壁時計は時刻の文字列、連鎖は元のキューと位置）
+    def to_list(self):
+        result = []
+        for entry in self.entries.values():
+            if entry['kind'] == SCHEDULE_WALL:
+                result.append({'kind': SCHEDULE_WALL, 'cue': entry['index'], 'at': entry['clock']})
+            else:
+                result.append({'kind': SCHEDULE_CHAIN, 'cue': entry['index'], 'after': entry['after'],
+                               'position_ms': entry['position_ms']})
+        return result
+
+    def load_list(self, items):
+        self.clear()
+        for item in items:
+            try:
+                if item.get('kind') == SCHEDULE_WALL:
+                    self.schedule_at(int(item['cue']), item['at'])
+                elif item.get('kind') == SCHEDULE_CHAIN:
+                    self.schedule_after(int(item['cue']), int(item['after']), int(item['position_ms']))
+            except (KeyError, ValueError) as e:
+                print(f"Skipping invalid schedule entry {item}: {e}")
+
+    # --- 連鎖キュー: 再生位置から目標時刻を見積もる ---
+
+    # 再生中のキューの位置が更新されるたびに呼ぶ（playing_index が -1 なら停止中）
+    def on_position(self, playing_index, position_ms, rate=1.0):
+        now_ns = time.monotonic_ns()
+        for entry in list(self.entries.values()):
+            if entry['kind'] != SCHEDULE_CHAIN:
+                continue
+            if entry['after'] != playing_index:
+                # 元のキューが止まった・切り替わったら見積もりを取り消す
+                if entry['target_ns'] is not None:
+                    self._untarget(entry)
+                continue
+            remaining_ms = entry['position_ms'] - position_ms
+            if remaining_ms > 0:
+                entry['approached'] = True
+            elif not entry.get('approached'):
+                continue  # 登録した時点で既に過ぎていた位置では出さない
+            if remaining_ms > CHAIN_HORIZON_MS:
+                if entry['target_ns'] is not None:
+                    self._untarget(entry)  # 巻き戻された
+                continue
+            target_ns = now_ns + int(max(0, remaining_ms) / max(rate, 0.01) * 1_000_000)
+            # 位置の通知ごとに見積もりを更新する（1 ms 以上ずれたときだけタイマーを張り直す）
+            if entry['target_ns'] is None or abs(target_ns - entry['target_ns']) > 1_000_000:
+                self._set_target(entry, target_ns)
+
+    # --- タイマー ---
+
+    def _new_entry(self, index, kind, **fields):
+        entry = {'id': next(self._ids), 'index': index, 'kind': kind, 'target_ns': None, 'armed': False,
+                 'arm_timer': None, 'fire_timer': None}
+        entry.update(fields)
+        self.entries[entry['id']] = entry
+        self.schedule_changed.emit()
+        return entry
+
+    def _set_target(self, entry, target_ns):
+        self._stop_timers(entry)
+        entry['target_ns'] = target_ns
+        now_ns = time.monotonic_ns()
+        arm_in_ms = (target_ns - now_ns) / 1_000_000 - self.lead_time_ms
+        if not entry['armed']:
+            if arm_in_ms <= 0:
+                self._arm(entry)
+            else:
+                entry['arm_timer'] = self._single_shot(arm_in_ms, lambda e=entry: self._arm(e))
+        self._schedule_fire(entry)
+
+    def _untarget(self, entry):
+        self._stop_timers(entry)
+        entry['target_ns'] = None
+        # 準備したプレーヤーをプールの容量外に残さない（見積もりが戻れば準備し直す）
+        if entry['armed']:
+            entry['armed'] = False
+            self.disarm_requested.emit(entry['index'])
+
+    def _arm(self, entry):
+        entry['arm_timer'] = None
+        if entry['id'] in self.entries and not entry['armed']:
+            entry['armed'] = True
+            self.prearm_requested.emit(entry['index'])
+
+    def _schedule_fire(self, entry):
+        remaining_ms = (entry['target_ns'] - time.monotonic_ns()) / 1_000_000
+        if remaining_ms < FIRE_EARLY_MS:
+            # 最後の数 ms はタイマーの粒度より細かい。GUI スレッドで待ち続けると、同時に来た予定の分だけ
+            # 描画と入力が止まるので、ここで出して早まった分を誤差に残す
+            self._fire(entry)
+            return
+        wait_ms = remaining_ms - WAKE_MARGIN_MS if remaining_ms > WAKE_MARGIN_MS * 2 else remaining_ms - 1
+        entry['fire_timer'] = self._single_shot(wait_ms, lambda e=entry: self._schedule_fire(e))
+
+    def _fire(self, entry):
+        entry['fire_timer'] = None
+        if self.entries.pop(entry['id'], None) is None:
+            return
+        achieved_ns = time.monotonic_ns()
+        self.awaiting_output = entry
+        self.trigger.emit(entry['index'])
+        error_ms = (achieved_ns - entry['target_ns']) / 1_000_000
+        self.records.append((entry['id'], entry['index'], entry['kind'], error_ms))
+        self._log(entry, "trigger", error_ms)
+        self.schedule_changed.emit()
+
+    # 出力に最初のフレームが出たときに呼ぶ（直前に出した予定があれば、目標時刻との差を記録する）
+    def on_output_started(self):
+        entry = self.awaiting_output
+        self.awaiting_output = None
+        if entry is None:
+            return
+        error_ms = (time.monotonic_ns() - entry['target_ns']) / 1_000_000
+        if error_ms > OUTPUT_MATCH_WINDOW_MS:
+            return  # 予定のキューのフレームではない（同じプレーヤーの頭出しなどで通知が来なかった）
+        self.output_records.append((entry['id'], entry['index'], entry['kind'], error_ms))
+        self._log(entry, "output", error_ms)
+
+    def _single_shot(self, delay_ms, callback):
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(callback)
+        timer.start(max(0, int(delay_ms)))
+        return timer
+
+    def _stop_timers(self, entry):
+        for key in ('arm_timer', 'fire_timer'):
+            timer = entry.get(key)
+            if timer is not None:
+                timer.stop()
+                timer.deleteLater()
+                entry[key] = None
+
+    # --- 予定と実際の差の記録 ---
+
+    def _log(self, entry, stage, error_ms):
+        if entry['kind'] == SCHEDULE_WALL:
+            what = f"at {entry['clock']}"
+        else:
+            what = f"after cue {entry['after'] + 1} @ {format_timecode(entry['position_ms'])}"
+        line = (f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] cue {entry['index'] + 1} {what}: "
+                f"{stage} {error_ms:+.3f} ms")
+        print(line)
+        try:
+            with open(self.log_path, 'a') as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+    # output=True なら最初のフレームが出た時刻の誤差
+    def jitter_stats(self, output=False):
+        errors = sorted(abs(r[3]) for r in (self.output_records if output else self.records))
+        if not errors:
+            return None
+        return {'count': len(errors), 'mean_abs_ms': sum(errors) / len(errors),
+                'p95_abs_ms': errors[min(len(errors) - 1, int(len(errors) * 0.95))], 'max_abs_ms': errors[-1]}
@@ -0,0 +1,106 @@
+# Declarative key layouts per Stream Deck model.
+#
+# A layout is a grid of one-character codes in the deck's physical key order (row-major, as the
+# device reports key_layout()). Cue keys are numbered in reading order and show consecutive cues
+# starting at the current bank, so bigger decks show more live cues at once.
+#
+#   C  cue             T  time display (status)   B  bank number (status)
+#   P  pause / play    S  stop                    <  previous bank   >  next bank
+#   M  audio meter (status)                       .  unused
+
+TARGETS = {
+    'T': ('time',),
+    'B': ('bank',),
+    'P': ('pause',),
+    'S': ('stop',),
+    '<': ('bank_prev',),
+    '>': ('bank_next',),
+    'M': ('meter',),
+}
+
+MODEL_LAYOUTS = {
+    "Stream Deck Mini": [
+        "C C C",
+        "C P >",
+    ],
+    "Stream Deck Original": [
+        "C C C C C",
+        "C C C C T",
+        "P S < > B",
+    ],
+    "Stream Deck Original (V2)": [
+        "C C C C C",
+        "C C C C T",
+        "P S < > B",
+    ],
+    "Stream Deck MK.2": [
+        "C C C C C",
+        "C C C C T",
+        "P S < > B",
+    ],
+    "Stream Deck XL": [
+        "C C C C C C C T",
+        "C C C C C C C P",
+        "C C C C C C C S",
+        "C C C C C C < >",
+    ],
+    "Stream Deck +": [
+        "C C C T",
+        "C C C P",
+    ],
+    "Stream Deck Neo": [
+        "C C C T",
+        "C C C P",
+    ],
+}
+
+# Keys reserved down the right-hand column on models without a declared layout, top to bottom
+GENERIC_COLUMN = "TPS<>B"
+
+
+class DeckLayout:
+    def __init__(self, rows, cols, grid):
+        self.rows = rows
+        self.cols = cols
+        self.key_map = {}  # physical key -> target
+        cue = 0
+        for key, code in enumerate(grid):
+            if code == 'C':
+                self.key_map[key] = ('slot', cue)
+                cue += 1
+            elif code in TARGETS:
+                self.key_map[key] = TARGETS[code]
+        self.cue_count = cue
+
+
+def _parse(grid_rows):
+    return [row.split() for row in grid_rows]
+
+
+def generic_grid(rows, cols):
+    if cols < 3:
+        # Too narrow for a column of controls: cues everywhere but a pause key at the end
+        return ['C'] * (rows * cols - 1) + ['P']
+    column = iter(GENERIC_COLUMN)
+    grid = []
+    for _ in range(rows):
+        grid.extend(['C'] * (cols - 1))
+        grid.append(next(column, 'C'))
+    return grid
+
+
+# Layout for a deck from its model, checked against the geometry the device reports.
+# With meter=True the bank number key shows the audio meter instead (decks without one show none).
+def layout_for_deck(deck, meter=False):
+    rows, cols = deck.key_layout()
+    declared = MODEL_LAYOUTS.get(deck.deck_type())
+    grid = None
+    if declared:
+        parsed = _parse(declared)
+        if len(parsed) == rows and all(len(row) == cols for row in parsed):
+            grid = [code for row in parsed for code in row]
+    if grid is None:
+        grid = generic_grid(rows, cols)[:deck.key_count()]
+    if meter:
+        grid = ['M' if code == 'B' else code for code in grid]
+    return DeckLayout(rows, cols, grid)
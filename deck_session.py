@@ -0,0 +1,61 @@
+from deck_worker import DeckWorker
+from key_image_cache import KeyImageCache
+from deck_layout import layout_for_deck
+
+# What a deck is used for. The key layout comes from the deck model (see deck_layout);
+# the role decides whether presses on it are acted on.
+ROLE_OPERATOR = "operator"       # presses fire cues and transport
+ROLE_MIRROR = "mirror"           # a second operator surface
+ROLE_STAGE_MANAGER = "stage"     # read-only status board
+DECK_ROLES = (ROLE_OPERATOR, ROLE_MIRROR, ROLE_STAGE_MANAGER)
+
+# Request kinds that change on every tick. They are cheap to draw (glyph blits) and never repeat,
+# so caching them would only evict the static and slot faces from the LRU.
+UNCACHED_KINDS = ('time',)
+
+
+# One opened deck: its role, key layout, render cache and the worker thread doing its USB I/O.
+# Sessions never share a worker, so a slow or stalled deck cannot delay the others.
+class DeckSession:
+    def __init__(self, deck, role, render_uncached, on_transport_error=None, meter=False):
+        self.deck = deck
+        self.id = deck.id()
+        self.serial = deck.get_serial_number()
+        self.role = role
+        self.layout = layout_for_deck(deck, meter)
+        self.key_map = self.layout.key_map
+        self.cue_count = self.layout.cue_count
+        self._keys_for_target = {}
+        for key, target in self.key_map.items():
+            self._keys_for_target.setdefault(target, []).append(key)
+        self.accepts_input = role != ROLE_STAGE_MANAGER
+        self.cache = KeyImageCache()
+        self._render_uncached = render_uncached
+        self.worker = DeckWorker(deck, self.render, on_transport_error)
+
+    # Runs on the worker thread. Requests are hashable, so unchanged key states are a cache lookup.
+    def render(self, deck, request):
+        if request[0] in UNCACHED_KINDS:
+            return self._render_uncached(deck, request)
+        return self.cache.get_or_create((deck.deck_type(), request),
+                                        lambda: self._render_uncached(deck, request))
+
+    def keys_for(self, target):
+        return self._keys_for_target.get(target, ())
+
+    def target_for(self, key):
+        return self.key_map.get(key)
+
+    def post(self, target, request):
+        for key in self.keys_for(target):
+            self.worker.post(key, request)
+
+    # items: iterable of (target, request), sent to the worker as a single batch
+    def post_many(self, items):
+        self.worker.post_many({key: request for target, request in items for key in self.keys_for(target)})
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
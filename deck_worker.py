@@ -0,0 +1,88 @@
+import threading
+from StreamDeck.Transport.Transport import TransportError
+
+
+# Background thread that owns a Stream Deck and performs all rendering and USB transfers.
+# Callers post "key N wants state S"; only the newest request per key survives, so a burst
+# of updates for the same key collapses into a single transfer.
+class DeckWorker(threading.Thread):
+    def __init__(self, deck, render_key, on_transport_error=None):
+        super().__init__(daemon=True)
+        self.deck = deck
+        self.render_key = render_key  # callable(deck, request) -> encoded image bytes
+        self.on_transport_error = on_transport_error
+        self._pending = {}
+        self._last_sent = {}  # key -> bytes last written over USB
+        self._warm = []  # requests to render into the cache while idle
+        self._condition = threading.Condition()
+        self._running = True
+
+    def post(self, key, request):
+        with self._condition:
+            if not self._running:
+                return
+            self._pending[key] = request
+            self._condition.notify()
+
+    # Post several keys at once (e.g. a whole page after a bank change) so they go out as one batch
+    def post_many(self, requests):
+        with self._condition:
+            if not self._running:
+                return
+            self._pending.update(requests)
+            self._condition.notify()
+
+    # Render a request into the cache in idle time without sending it
+    def warm(self, request):
+        with self._condition:
+            if not self._running:
+                return
+            self._warm.append(request)
+            self._condition.notify()
+
+    def stop(self, timeout=1.0):
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._warm.clear()
+            self._condition.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending and not self._warm:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                batch = self._pending
+                self._pending = {}
+                warm_request = self._warm.pop(0) if not batch else None
+
+            if warm_request is not None:
+                try:
+                    self.render_key(self.deck, warm_request)
+                except Exception as e:
+                    print(f"Stream Deck key prerender failed for {warm_request[0]}: {e}")
+                continue
+
+            for key, request in batch.items():
+                try:
+                    data = self.render_key(self.deck, request)
+                    # An identical image is never sent over USB twice
+                    if data is None or self._last_sent.get(key) == data:
+                        continue
+                    with self.deck:
+                        self.deck.set_key_image(key, data)
+                    self._last_sent[key] = data
+                except TransportError as e:
+                    with self._condition:
+                        self._running = False
+                        self._pending.clear()
+                    if self.on_transport_error:
+                        self.on_transport_error(self.deck, e)
+                    return
+                except Exception as e:
+                    # A bad thumbnail or font must not take the worker down; keep serving the other keys
+                    print(f"Stream Deck key {key} update failed: {e}")
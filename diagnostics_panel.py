@@ -0,0 +1,74 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QPushButton, QFileDialog, QHeaderView)
+from PyQt6.QtCore import QTimer, Qt
+
+REFRESH_INTERVAL_MS = 1000
+COLUMNS = ["ステージ", "件数", "平均 (ms)", "中央値 (ms)", "p95 (ms)", "最大 (ms)"]
+
+
+# キューのレイテンシ統計を表示する診断パネル
+class DiagnosticsPanel(QDialog):
+    def __init__(self, tracer, parent=None):
+        super().__init__(parent)
+        self.tracer = tracer
+        self.setWindowTitle("診断: キューのレイテンシ")
+        self.resize(640, 360)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        export_json_button = QPushButton("JSON で保存")
+        export_json_button.clicked.connect(self.export_json)
+        buttons.addWidget(export_json_button)
+        export_chrome_button = QPushButton("Chrome トレースで保存")
+        export_chrome_button.clicked.connect(self.export_chrome_trace)
+        buttons.addWidget(export_chrome_button)
+        reset_button = QPushButton("リセット")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        layout.addLayout(buttons)
+
+        # 表示中だけ定期的に更新する
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.setInterval(REFRESH_INTERVAL_MS)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        stats = self.tracer.stats()
+        self.table.setRowCount(len(stats))
+        for row, (stage, values) in enumerate(stats.items()):
+            cells = [stage, str(values['count']), f"{values['mean_ms']:.2f}", f"{values['p50_ms']:.2f}",
+                     f"{values['p95_ms']:.2f}", f"{values['max_ms']:.2f}"]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "レイテンシを保存", "", "JSON Files (*.json)")
+        if path:
+            self.tracer.export_json(path)
+
+    def export_chrome_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Chrome トレースを保存", "", "JSON Files (*.json)")
+        if path:
+            self.tracer.export_chrome_trace(path)
+
+    def reset(self):
+        self.tracer.reset()
+        self.refresh()
@@ -0,0 +1,73 @@
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+DEFAULT_REFRESH_INTERVAL_MS = 33  # 約30fps
+
+
+# 表示更新をまとめて行うスケジューラー
+# positionChanged のたびに描画せず、一定間隔でダーティなものだけを更新する
+class DisplayRefreshScheduler(QObject):
+    # シークバー用の位置（フレーム間隔で通知）
+    slider_position_changed = pyqtSignal(int)
+    # 表示上の hh:mm:ss が変わったときだけ通知（position, duration）
+    displayed_time_changed = pyqtSignal(int, int)
+
+    def __init__(self, interval_ms=DEFAULT_REFRESH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.position = 0
+        self.duration = 0
+        self.slider_dirty = False
+        self.time_dirty = False
+        self.last_slider_position = None
+        self.last_time_key = None
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.refresh)
+        self.set_interval(interval_ms)
+
+    # 更新間隔（ミリ秒）を設定するメソッド
+    def set_interval(self, interval_ms):
+        self.interval_ms = max(1, int(interval_ms))
+        self.timer.setInterval(self.interval_ms)
+
+    # 新しい再生位置を記録してダーティフラグを立てる（描画は次のティックで行う）
+    def update_position(self, position, duration):
+        if position != self.position or duration != self.duration:
+            self.position = position
+            self.duration = duration
+            self.slider_dirty = True
+            self.time_dirty = True
+            if not self.timer.isActive():
+                self.timer.start()
+
+    # 表示状態を破棄する（停止時やメディア切り替え時）
+    def reset(self):
+        self.timer.stop()
+        self.position = 0
+        self.duration = 0
+        self.slider_dirty = False
+        self.time_dirty = False
+        self.last_slider_position = None
+        self.last_time_key = None
+
+    def refresh(self):
+        if not self.slider_dirty and not self.time_dirty:
+            # 変化がなければタイマーを止めてアイドル時のコストをなくす
+            self.timer.stop()
+            return
+
+        if self.slider_dirty:
+            self.slider_dirty = False
+            if self.position != self.last_slider_position:
+                self.last_slider_position = self.position
+                self.slider_position_changed.emit(self.position)
+
+        if self.time_dirty:
+            self.time_dirty = False
+            if self.duration > 0:
+                # 表示される秒の値だけを比較する（format_time と同じ丸め）
+                time_key = (round(self.position / 1000), round((self.duration - self.position) / 1000),
+                            round(self.duration / 1000))
+                if time_key != self.last_time_key:
+                    self.last_time_key = time_key
+                    self.displayed_time_changed.emit(self.position, self.duration)
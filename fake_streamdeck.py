@@ -0,0 +1,176 @@
+import time
+import threading
+from StreamDeck.Transport.Transport import TransportError
+
+# Key geometry and native image format per simulated model
+DECK_MODELS = {
+    'mini': {'deck_type': "Stream Deck Mini", 'layout': (2, 3), 'size': (80, 80), 'format': "BMP",
+             'flip': (False, True), 'rotation': 90},
+    'original': {'deck_type': "Stream Deck Original", 'layout': (3, 5), 'size': (72, 72), 'format': "BMP",
+                 'flip': (True, True), 'rotation': 0},
+    'mk2': {'deck_type': "Stream Deck MK.2", 'layout': (3, 5), 'size': (72, 72), 'format': "JPEG",
+            'flip': (True, True), 'rotation': 0},
+    'xl': {'deck_type': "Stream Deck XL", 'layout': (4, 8), 'size': (96, 96), 'format': "JPEG",
+           'flip': (True, True), 'rotation': 0},
+    'plus': {'deck_type': "Stream Deck +", 'layout': (2, 4), 'size': (120, 120), 'format': "JPEG",
+             'flip': (False, False), 'rotation': 0},
+}
+
+
+# Software stand-in for a StreamDeck device. Implements the subset of the
+# python-elgato-streamdeck API the handler uses, records every write with its
+# timing, models USB write latency and can inject scripted key presses.
+class SimulatedStreamDeck:
+    def __init__(self, model='mk2', serial=None, write_latency_ms=0.0, bytes_per_ms=0, fail_after_writes=None):
+        spec = DECK_MODELS[check_model(model)]
+        self.model = model
+        self._deck_type = spec['deck_type']
+        self._layout = spec['layout']
+        self._format = {'size': spec['size'], 'format': spec['format'],
+                        'flip': spec['flip'], 'rotation': spec['rotation']}
+        self._serial = serial or f"SIM-{model.upper()}"
+        # USB model: fixed per-transfer latency plus optional bandwidth limit
+        self.write_latency_ms = write_latency_ms
+        self.bytes_per_ms = bytes_per_ms
+        self.fail_after_writes = fail_after_writes
+        self._lock = threading.RLock()
+        self._open = False
+        self._callback = None
+        self.brightness = None
+        self.key_images = {}
+        self.writes = []  # (timestamp, key, byte count, seconds spent in the write)
+        self.bytes_written = 0
+        self.presses_injected = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        return False
+
+    def id(self):
+        return f"simulated:{self._serial}"
+
+    def get_serial_number(self):
+        return self._serial
+
+    def deck_type(self):
+        return self._deck_type
+
+    def is_visual(self):
+        return True
+
+    def key_count(self):
+        rows, cols = self._layout
+        return rows * cols
+
+    def key_layout(self):
+        return self._layout
+
+    def key_image_format(self):
+        return self._format
+
+    def open(self):
+        self._open = True
+
+    def close(self):
+        self._open = False
+
+    def is_open(self):
+        return self._open
+
+    def connected(self):
+        return self._open
+
+    def reset(self):
+        self._check_open()
+        self.key_images.clear()
+
+    def set_brightness(self, percent):
+        self._check_open()
+        self.brightness = percent
+
+    def set_key_callback(self, callback):
+        self._callback = callback
+
+    def set_key_image(self, key, image):
+        self._check_open()
+        if not 0 <= key < self.key_count():
+            raise IndexError(f"Invalid key index {key}.")
+        if self.fail_after_writes is not None and len(self.writes) >= self.fail_after_writes:
+            self._open = False
+            raise TransportError("Simulated transport failure")
+        started = time.perf_counter()
+        delay_ms = self.write_latency_ms
+        if self.bytes_per_ms:
+            delay_ms += len(image) / self.bytes_per_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.key_images[key] = image
+            self.writes.append((started, key, len(image), elapsed))
+            self.bytes_written += len(image)
+
+    def _check_open(self):
+        if not self._open:
+            raise TransportError("Simulated deck is not open")
+
+    # Deliver a press (and release) exactly like the hardware reader thread does
+    def press(self, key, release=True):
+        if self._callback is None:
+            return
+        self.presses_injected += 1
+        self._callback(self, key, True)
+        if release:
+            self._callback(self, key, False)
+
+    # Play a script of key presses from a background thread.
+    # script is a list of keys; rate_hz is presses per second (0 = as fast as possible).
+    def run_script(self, script, rate_hz=0, repeat=1):
+        def run():
+            interval = 1.0 / rate_hz if rate_hz else 0
+            next_at = time.perf_counter()
+            for _ in range(repeat):
+                for key in script:
+                    if interval:
+                        delay = next_at - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                        next_at += interval
+                    self.press(key)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            durations = [w[3] for w in self.writes]
+            return {
+                'model': self.model,
+                'writes': len(self.writes),
+                'bytes_written': self.bytes_written,
+                'mean_write_ms': (sum(durations) / len(durations) * 1000) if durations else 0,
+                'presses_injected': self.presses_injected,
+            }
+
+
+# Raises ValueError naming the valid models when model is not one of DECK_MODELS
+def check_model(model):
+    if model not in DECK_MODELS:
+        raise ValueError(f"unknown simulated deck model {model!r}; valid models: {', '.join(DECK_MODELS)}")
+    return model
+
+
+# Model names in a spec such as "mk2" or "xl,mini" (validated, so callers can check a spec up front)
+def simulated_models(spec):
+    return [check_model(model.strip()) for model in spec.split(",") if model.strip()]
+
+
+# Returns simulated decks for a spec such as "mk2" or "xl,mini"
+def enumerate_simulated(spec, **options):
+    return [SimulatedStreamDeck(model, serial=f"SIM{i}", **options)
+            for i, model in enumerate(simulated_models(spec))]
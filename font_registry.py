@@ -0,0 +1,106 @@
+import sys
+import threading
+from PIL import Image, ImageDraw, ImageFont
+
+# Characters pre-rendered for the time display key
+TIME_GLYPHS = "0123456789:-"
+
+
+def _font_candidates():
+    if sys.platform == "win32":
+        return [("C:/Windows/Fonts/meiryo.ttc", 0), ("C:/Windows/Fonts/arial.ttf", None)]
+    elif sys.platform == "darwin":
+        return [("/System/Library/Fonts/Supplemental/ヒラギノ角ゴシック W3.ttc", 0),
+                ("/System/Library/Fonts/Supplemental/Arial.ttf", None)]
+    else:  # Linux
+        return [("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc", 0),
+                ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", None)]
+
+
+# Loads every font face/size once per process and keeps pre-rendered glyph masks
+# so that key redraws are bitmap blits without any file I/O.
+class FontRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._font_path = None
+        self._font_index = None
+        self._use_default = False
+        self._fonts = {}
+        self._glyphs = {}
+        self._resolve_fallback_chain()
+
+    # Pick the first font in the fallback chain that can be opened. Done once.
+    def _resolve_fallback_chain(self):
+        for path, index in _font_candidates():
+            try:
+                if index is None:
+                    ImageFont.truetype(path, 12)
+                else:
+                    ImageFont.truetype(path, 12, index=index)
+            except IOError:
+                continue
+            self._font_path = path
+            self._font_index = index
+            return
+        self._use_default = True
+
+    def font(self, size):
+        with self._lock:
+            font = self._fonts.get(size)
+            if font is None:
+                if self._use_default:
+                    font = ImageFont.load_default()
+                elif self._font_index is None:
+                    font = ImageFont.truetype(self._font_path, size)
+                else:
+                    font = ImageFont.truetype(self._font_path, size, index=self._font_index)
+                self._fonts[size] = font
+            return font
+
+    # Returns (mask, advance, ascent) for a single character, rendering it on first use.
+    def glyph(self, char, size):
+        key = (char, size)
+        glyph = self._glyphs.get(key)
+        if glyph is not None:
+            return glyph
+
+        font = self.font(size)
+        if self._use_default:
+            ascent, descent = 11, 0
+        else:
+            ascent, descent = font.getmetrics()
+        advance = max(1, int(round(font.getlength(char))))
+        mask = Image.new("L", (advance, ascent + descent), 0)
+        if self._use_default:
+            ImageDraw.Draw(mask).text((0, 0), char, font=font, fill=255)
+        else:
+            ImageDraw.Draw(mask).text((0, ascent), char, font=font, anchor="ls", fill=255)
+        glyph = (mask, advance, ascent)
+        with self._lock:
+            self._glyphs[key] = glyph
+        return glyph
+
+    def warm_glyphs(self, size, chars=TIME_GLYPHS):
+        for char in chars:
+            self.glyph(char, size)
+
+    # Draws text horizontally centred on x with its baseline at y (same as anchor="ms").
+    def draw_text_centered(self, image, x, y, text, size, fill="white"):
+        glyphs = [self.glyph(char, size) for char in text]
+        total_width = sum(advance for _, advance, _ in glyphs)
+        cursor = int(round(x - total_width / 2))
+        for mask, advance, ascent in glyphs:
+            image.paste(fill, (cursor, int(round(y)) - ascent), mask)
+            cursor += advance
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_font_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = FontRegistry()
+        return _registry
@@ -0,0 +1,97 @@
+import os
+import json
+import bisect
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from app_paths import cache_dir, content_hash, low_priority_command
+
+INDEX_TIMEOUT_S = 120
+
+
+# 指定位置の直前（同じ位置を含む）のキーフレームの時刻（ミリ秒）
+def keyframe_before(keyframes, position_ms):
+    i = bisect.bisect_right(keyframes, position_ms)
+    return keyframes[i - 1] if i else 0
+
+
+# ffprobe でパケットのフラグを読み、映像のキーフレームの時刻（ミリ秒、昇順）を返す（デコードはしない）
+def read_keyframes(ffprobe, file_path):
+    command = [ffprobe, "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+               "-of", "csv=p=0", file_path]
+    result = subprocess.run(low_priority_command(command), capture_output=True, text=True,
+                            timeout=INDEX_TIMEOUT_S)
+    if result.returncode != 0:
+        return None
+    keyframes = set()
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.add(int(round(float(pts_time) * 1000)))
+    return sorted(keyframes)
+
+
+# クリップごとのキーフレーム位置をバックグラウンドで調べ、内容ハッシュをキーにディスクへ保存する
+# イン点の入力時に直前のキーフレームからの距離を示し、キーフレームへ合わせられるようにする
+class KeyframeIndexer(QObject):
+    # ファイルパスとキーフレーム位置のリスト（ミリ秒）
+    index_ready = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir("keyframes")
+        self.ffprobe = shutil.which("ffprobe")
+        # キューのトリガーを妨げないようにワーカーは 1 つだけにする
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="keyframes")
+        self.in_flight = set()
+        self.indexes = {}  # ファイルパス -> キーフレーム位置のリスト
+
+    def request(self, file_path):
+        if not self.ffprobe or file_path in self.indexes or file_path in self.in_flight:
+            return
+        self.in_flight.add(file_path)
+        self.executor.submit(self._lookup_or_build, file_path)
+
+    def keyframes_for(self, file_path):
+        return self.indexes.get(file_path)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # 失敗しても in_flight から外し、次の依頼で作り直せるようにする
+    def _lookup_or_build(self, file_path):
+        error = "ffprobe failed"
+        try:
+            keyframes = self._load_or_read(file_path)
+        except Exception as e:
+            # 読めないファイルや ffprobe の想定外の出力など
+            print(f"Keyframe index for {file_path} failed: {e}")
+            keyframes = None
+            error = str(e)
+        self.in_flight.discard(file_path)
+        # 別スレッドからの emit は GUI スレッドへキューイングされる
+        if keyframes is None:
+            self.failed.emit(file_path, error)
+            return
+        self.indexes[file_path] = keyframes
+        self.index_ready.emit(file_path, keyframes)
+
+    def _load_or_read(self, file_path):
+        index_path = os.path.join(self.cache_dir, f"{content_hash(file_path)}.json")
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        keyframes = read_keyframes(self.ffprobe, file_path)
+        if keyframes is not None:
+            try:
+                with open(index_path + ".tmp", 'w') as f:
+                    json.dump(keyframes, f)
+                os.replace(index_path + ".tmp", index_path)
+            except OSError as e:
+                # キャッシュに書けなくても今回の結果は使う
+                print(f"Failed to cache keyframe index {index_path}: {e}")
+        return keyframes
@@ -1,23 +1,73 @@
+import os
 import sys
 from PyQt6.QtWidgets import QApplication
 from video_player import VideoPlayer
 from streamdeck_handler import StreamDeckHandler
+from stall_watchdog import MainThreadWatchdog, DEFAULT_STALL_THRESHOLD_MS
 
 # アプリケーションのエントリーポイント
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # GUI スレッドの停止を監視（しきい値は PIVIDEOPLAYER_STALL_MS で変更可能）
+    watchdog = MainThreadWatchdog(int(os.environ.get("PIVIDEOPLAYER_STALL_MS", DEFAULT_STALL_THRESHOLD_MS)))
+    watchdog.start()
     controller = VideoPlayer()
-    streamdeck_handler = StreamDeckHandler()
+    # PIVIDEOPLAYER_SIMULATED_DECK=mk2 (or xl,mini ...) uses software decks instead of USB hardware
+    simulated_deck = os.environ.get("PIVIDEOPLAYER_SIMULATED_DECK")
+    # PIVIDEOPLAYER_DECK_ROLES=SERIAL1=operator,SERIAL2=stage assigns a role to each deck by serial number
+    deck_roles = dict(item.split("=", 1) for item in os.environ.get("PIVIDEOPLAYER_DECK_ROLES", "").split(",")
+                      if "=" in item)
+    # PIVIDEOPLAYER_DECK_METER=1 shows the audio level meter on the deck's bank status key
+    show_meter = os.environ.get("PIVIDEOPLAYER_DECK_METER", "") not in ("", "0")
+    if simulated_deck:
+        from fake_streamdeck import enumerate_simulated, simulated_models
+        try:
+            simulated_models(simulated_deck)
+        except ValueError as e:
+            sys.exit(f"PIVIDEOPLAYER_SIMULATED_DECK: {e}")
+        streamdeck_handler = StreamDeckHandler(lambda: enumerate_simulated(simulated_deck), deck_roles, show_meter)
+    else:
+        streamdeck_handler = StreamDeckHandler(deck_roles=deck_roles, show_meter=show_meter)
 
     # Connect signals and slots
-    streamdeck_handler.key_pressed.connect(controller.play_video_from_button)
+    streamdeck_handler.key_pressed.connect(controller.trigger_cue)
     streamdeck_handler.pause_key_pressed.connect(controller.toggle_play_pause)
+    streamdeck_handler.stop_key_pressed.connect(controller.stop_video)
+    streamdeck_handler.bank_step_requested.connect(controller.change_bank)
     controller.video_loaded.connect(streamdeck_handler.update_key_with_filename)
     controller.playback_state_changed.connect(streamdeck_handler.update_key_playback_state)
     controller.position_updated.connect(streamdeck_handler.update_time_display)
     controller.global_playback_state_changed.connect(streamdeck_handler.update_global_playback_state)
+    controller.slot_info_changed.connect(streamdeck_handler.update_key_info)
+    controller.slot_thumbnail_changed.connect(streamdeck_handler.update_key_thumbnail)
+    controller.bank_changed.connect(streamdeck_handler.set_bank)
+    controller.audio_levels_changed.connect(streamdeck_handler.update_audio_levels)
+
+    # PIVIDEOPLAYER_REMOTE=0.0.0.0 (listen address) enables OSC/HTTP remote control for show-control systems;
+    # ports come from PIVIDEOPLAYER_REMOTE_OSC_PORT / PIVIDEOPLAYER_REMOTE_HTTP_PORT, and
+    # PIVIDEOPLAYER_REMOTE_TOKEN sets a shared token that HTTP clients must send.
+    # OSC has no authentication, so on a non-loopback address it only starts when
+    # PIVIDEOPLAYER_REMOTE_OSC_ALLOW lists the sender addresses (comma-separated, or * for any)
+    remote_host = os.environ.get("PIVIDEOPLAYER_REMOTE")
+    if remote_host:
+        from remote_control import RemoteControlServer, DEFAULT_OSC_PORT, DEFAULT_HTTP_PORT
+        osc_allow = [a.strip() for a in os.environ.get("PIVIDEOPLAYER_REMOTE_OSC_ALLOW", "").split(",") if a.strip()]
+        remote = RemoteControlServer(remote_host,
+                                     int(os.environ.get("PIVIDEOPLAYER_REMOTE_OSC_PORT", DEFAULT_OSC_PORT)),
+                                     int(os.environ.get("PIVIDEOPLAYER_REMOTE_HTTP_PORT", DEFAULT_HTTP_PORT)),
+                                     os.environ.get("PIVIDEOPLAYER_REMOTE_TOKEN"), osc_allow)
+        remote.cue_requested.connect(controller.trigger_cue)
+        remote.toggle_requested.connect(controller.toggle_play_pause)
+        remote.stop_requested.connect(controller.stop_video)
+        remote.bank_requested.connect(controller.set_bank)
+        controller.position_updated.connect(remote.update_position)
+        controller.playback_state_changed.connect(remote.update_playback_state)
+        controller.global_playback_state_changed.connect(remote.update_global_playback_state)
+        remote.start()
+        app.aboutToQuit.connect(remote.stop)
 
     app.aboutToQuit.connect(streamdeck_handler.cleanup)
+    app.aboutToQuit.connect(watchdog.stop)
     controller.show()
     controller.activateWindow()
     sys.exit(app.exec())
\ No newline at end of file
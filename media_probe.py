@@ -0,0 +1,236 @@
+import os
+import json
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt6.QtMultimedia import QMediaPlayer, QMediaMetaData
+from app_paths import cache_dir, file_signature
+
+PROBE_WORKERS = 2
+PROBE_TIMEOUT_S = 30
+INDEX_SAVE_DELAY_MS = 2000  # Qt での調査結果はまとめてから書き出す
+
+
+# 調査結果をパス・サイズ・更新時刻をキーとしてディスクに保存するインデックス
+class MediaInfoIndex:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "media_index.json")
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, signature):
+        with self.lock:
+            return self.entries.get(signature)
+
+    # save=False の場合は flush() を呼ぶまで書き出さない
+    def put(self, signature, info, save=True):
+        with self.lock:
+            self.entries[signature] = info
+            self.dirty = True
+        if save:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            try:
+                self._save()
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Failed to save media index {self.path}: {e}")
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+# ffprobe でメディア情報を調べ、先頭フレームがデコードできるかも確認する
+def probe_with_ffprobe(ffprobe, ffmpeg, file_path):
+    info = {'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [], 'error': None}
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", file_path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT_S)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        info['error'] = str(e)
+        return info
+    if result.returncode != 0:
+        info['error'] = result.stderr.strip() or f"ffprobe exited with {result.returncode}"
+        return info
+
+    data = json.loads(result.stdout or "{}")
+    duration = float(data.get('format', {}).get('duration', 0) or 0)
+    info['duration_ms'] = int(duration * 1000)
+    for stream in data.get('streams', []):
+        entry = {'type': stream.get('codec_type'), 'codec': stream.get('codec_name')}
+        if stream.get('codec_type') == 'video':
+            entry['width'] = stream.get('width', 0)
+            entry['height'] = stream.get('height', 0)
+            entry['fps'] = stream.get('avg_frame_rate')
+            if not info['width']:
+                info['width'] = entry['width']
+                info['height'] = entry['height']
+        elif stream.get('codec_type') == 'audio':
+            entry['channels'] = stream.get('channels')
+            entry['sample_rate'] = stream.get('sample_rate')
+        info['streams'].append(entry)
+
+    if not info['streams']:
+        info['error'] = "No audio or video streams"
+    elif ffmpeg and info['width']:
+        # 実際に最初のフレームをデコードして壊れたメディアを検出する
+        try:
+            decode = subprocess.run(
+                [ffmpeg, "-v", "error", "-i", file_path, "-frames:v", "1", "-f", "null", "-"],
+                capture_output=True, text=True, timeout=PROBE_TIMEOUT_S)
+            if decode.returncode != 0:
+                info['error'] = decode.stderr.strip().splitlines()[-1] if decode.stderr.strip() else "Decode failed"
+        except (OSError, subprocess.TimeoutExpired) as e:
+            info['error'] = str(e)
+    return info
+
+
+# 割り当てられたファイルをバックグラウンドで調べるプローブプール
+class MediaProbe(QObject):
+    # パスと調査結果（duration_ms, width, height, streams, error）
+    probed = pyqtSignal(str, object)
+
+    def __init__(self, index=None, parent=None):
+        super().__init__(parent)
+        self.index = index or MediaInfoIndex()
+        self.ffprobe = shutil.which("ffprobe")
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="media-probe")
+        self.in_flight = set()
+        # ffprobe がない環境では Qt のバックエンドで 1 件ずつ調べる
+        self.qt_queue = []
+        self.qt_player = None
+        self.qt_current = None
+        self.qt_timer = QTimer(self)
+        self.qt_timer.setSingleShot(True)
+        self.qt_timer.setInterval(PROBE_TIMEOUT_S * 1000)
+        self.qt_timer.timeout.connect(self._on_qt_timeout)
+        # Qt での調査は GUI スレッドで終わるので、インデックスの書き出しはまとめてワーカーで行う
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(INDEX_SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(lambda: self.executor.submit(self.index.flush))
+
+    # キャッシュ済みならすぐに結果を通知し、なければバックグラウンドで調べる
+    def probe(self, file_path):
+        try:
+            signature = file_signature(file_path)
+        except OSError as e:
+            self.probed.emit(file_path, {'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [], 'error': str(e)})
+            return
+        cached = self.index.get(signature)
+        if cached is not None:
+            self.probed.emit(file_path, cached)
+            return
+        if file_path in self.in_flight:
+            return
+        self.in_flight.add(file_path)
+        if self.ffprobe:
+            self.executor.submit(self._probe_worker, file_path, signature)
+        else:
+            self.qt_queue.append((file_path, signature))
+            if self.qt_current is None:
+                self._next_qt_probe()
+
+    def shutdown(self):
+        self.save_timer.stop()
+        self.qt_timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.index.flush()
+
+    def _probe_worker(self, file_path, signature):
+        try:
+            info = probe_with_ffprobe(self.ffprobe, self.ffmpeg, file_path)
+        except Exception as e:
+            # ffprobe の想定外の出力など。結果はキャッシュせず、次の割り当てで調べ直せるようにする
+            print(f"Probe of {file_path} failed: {e}")
+            info = {'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [], 'error': f"Probe failed: {e}"}
+            self._finish(file_path, signature, info, cache=False)
+            return
+        self._finish(file_path, signature, info)
+
+    # save=False の場合は save_timer でまとめて書き出す
+    def _finish(self, file_path, signature, info, cache=True, save=True):
+        self.in_flight.discard(file_path)
+        if cache:
+            self.index.put(signature, info, save)
+        # 別スレッドからの emit は GUI スレッドへキューイングされる
+        self.probed.emit(file_path, info)
+
+    def _next_qt_probe(self):
+        if self.qt_current is not None:
+            return  # すでに次の調査を始めている
+        if not self.qt_queue:
+            self.qt_current = None
+            return
+        if self.qt_player is None:
+            self.qt_player = QMediaPlayer(self)
+            self.qt_player.mediaStatusChanged.connect(self._on_qt_status)
+            self.qt_player.errorOccurred.connect(self._on_qt_error)
+        self.qt_current = self.qt_queue.pop(0)
+        self.qt_player.setSource(QUrl.fromLocalFile(self.qt_current[0]))
+        self.qt_timer.start()
+
+    # 前のファイルの遅れて届いた通知を、いま調べているファイルの結果として扱わない
+    def _is_current_source(self):
+        return (self.qt_current is not None
+                and self.qt_player.source() == QUrl.fromLocalFile(self.qt_current[0]))
+
+    def _on_qt_status(self, status):
+        if not self._is_current_source():
+            return
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            player = self.qt_player
+            resolution = player.metaData().value(QMediaMetaData.Key.Resolution)
+            info = {'duration_ms': player.duration(), 'width': 0, 'height': 0, 'streams': [], 'error': None}
+            if resolution is not None and resolution.isValid():
+                info['width'] = resolution.width()
+                info['height'] = resolution.height()
+            if player.hasVideo():
+                info['streams'].append({'type': 'video', 'codec': None,
+                                        'width': info['width'], 'height': info['height']})
+            if player.hasAudio():
+                info['streams'].append({'type': 'audio', 'codec': None})
+            self._finish_qt(info)
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self._finish_qt({'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [],
+                             'error': self.qt_player.errorString() or "Invalid media"})
+
+    def _on_qt_error(self, error, error_string=""):
+        if self._is_current_source():
+            self._finish_qt({'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [],
+                             'error': error_string or self.qt_player.errorString()})
+
+    # 読み込みも失敗も通知されないファイルでキューを止めない（結果はキャッシュせず次の割り当てで調べ直す）
+    def _on_qt_timeout(self):
+        if self.qt_current is not None:
+            print(f"Probe of {self.qt_current[0]} timed out")
+            self._finish_qt({'duration_ms': 0, 'width': 0, 'height': 0, 'streams': [],
+                             'error': "Probe timed out"}, cache=False)
+
+    def _finish_qt(self, info, cache=True):
+        self.qt_timer.stop()
+        file_path, signature = self.qt_current
+        self.qt_current = None
+        self.qt_player.setSource(QUrl())
+        self._finish(file_path, signature, info, cache=cache, save=False)
+        if cache:
+            self.save_timer.start()
+        # 前のファイルの通知（エラーのあとの InvalidMedia など）を先に処理させてから次を開く
+        QTimer.singleShot(0, self._next_qt_probe)
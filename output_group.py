@@ -0,0 +1,73 @@
+import sys
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from player_window import PlayerWindow
+from output_stack import OutputStack
+if sys.platform == 'darwin':
+    from objclib import hide_menubar_and_dock
+
+
+# 1 つの出力先（再生ウィンドウ・A/B プレーヤー・音声出力・スクリーン）をまとめたグループ
+class OutputGroup(QObject):
+    window_closed = pyqtSignal()
+
+    def __init__(self, name, controller, player_pool=None, source_loader=None, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.controller = controller
+        self.stack = OutputStack(player_pool, self)
+        self.stack.source_loader = source_loader
+        self.window = None
+        self.screen_index = 0
+        self.audio_index = 0
+
+    # 再生ウィンドウを作成して指定スクリーンに表示するメソッド
+    def create_window(self, screen):
+        self.window = PlayerWindow(self.controller)
+        self.window.destroyed.connect(self._window_destroyed)
+        self.stack.attach_window(self.window)
+
+        # 黒背景
+        self.window.setStyleSheet("background-color: black;")
+
+        # 擬似フルスクリーン（Spacesに移動しない）
+        self.window.setWindowFlags(
+            Qt.WindowType.FramelessWindowHint |
+            Qt.WindowType.WindowStaysOnTopHint
+        )
+        self.window.setGeometry(screen.geometry())
+        self.window.show()
+
+        if sys.platform == 'darwin':
+            # macOS の Dock とメニューバーを隠す
+            try:
+                hide_menubar_and_dock()
+            except Exception as e:
+                print("Failed to hide menu bar:", e)
+        elif sys.platform == 'win32':
+            # Windows ではフルスクリーンモードにする
+            self.window.showFullScreen()
+        return self.window
+
+    # 再生ウィンドウを別のスクリーンへ移動するメソッド
+    def move_to_screen(self, screen):
+        if self.window is None:
+            return
+        self.window.setGeometry(screen.geometry())
+        self.window.show()
+        if sys.platform == 'win32':
+            self.window.showFullScreen()
+
+    def set_audio_device(self, device):
+        self.stack.set_audio_device(device)
+
+    # グループを閉じるメソッド（追加した出力グループの削除時）
+    def close(self):
+        self.stack.stop()
+        if self.window is not None:
+            self.window.close()
+            self.window.deleteLater()
+
+    def _window_destroyed(self):
+        self.stack.detach_window()
+        self.window = None
+        self.window_closed.emit()
@@ -0,0 +1,511 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, QUrl, QVariantAnimation, QEasingCurve, Qt, pyqtSignal
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+from tracing import get_tracer
+from transitions import TRANSITION_CUT, TRANSITION_DIP_TO_BLACK, DEFAULT_TRANSITION
+
+# 最初のフレームが届かない場合に強制的に切り替えるまでの時間
+FIRST_FRAME_TIMEOUT_MS = 3000
+# 複数出力の同時スタートで、準備が遅い出力を待つ上限
+START_BARRIER_TIMEOUT_MS = 3000
+# アウト点まで残りこの時間を切ったら PreciseTimer で終わりを合わせる
+OUT_POINT_HORIZON_MS = 1000
+# フレームの長さが分からないときに、イン点より前のフレームとみなす幅（25fps の 1 フレーム）
+IN_POINT_TOLERANCE_US = 40_000
+# キューのトレースを閉じるステージ名（first_frame だけが最初のフレームまでの時間になる）
+STAGE_FIRST_FRAME = 'first_frame'
+STAGE_FIRST_FRAME_TIMEOUT = 'first_frame_timeout'
+STAGE_INVALID_MEDIA = 'invalid_media'
+STAGE_NO_VIDEO = 'no_video'
+
+
+# 複数の出力グループの再生開始をそろえるためのバリア
+# 各出力が最初のフレームをデコードして一時停止状態になったら arrive() し、
+# 全員そろった時点で released を発行する。受け取った出力は同じイベントループの中で play() する
+class StartBarrier(QObject):
+    released = pyqtSignal()
+
+    def __init__(self, participants, timeout_ms=START_BARRIER_TIMEOUT_MS, parent=None):
+        super().__init__(parent)
+        self.participants = participants
+        self.arrived = 0
+        self.done = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.release)
+        self.timer.start(timeout_ms)
+
+    def arrive(self):
+        self.arrived += 1
+        if self.arrived >= self.participants:
+            self.release()
+
+    def release(self):
+        if self.done:
+            return
+        self.done = True
+        self.timer.stop()
+        self.released.emit()
+        self.deleteLater()
+
+
+# A/B 2 系統のプレーヤーと映像レイヤーを持つ出力エンジン
+# 次のキューは背面のプレーヤーでデコードを始め、最初のフレームが届いてから
+# カット／クロスフェード／黒フェードで前面と入れ替えるため、読み込み中の黒味が出ない
+class OutputStack(QObject):
+    # 現在アクティブなプレーヤーのシグナルを中継する
+    positionChanged = pyqtSignal('qint64')
+    durationChanged = pyqtSignal('qint64')
+    playbackStateChanged = pyqtSignal(QMediaPlayer.PlaybackState)
+    mediaStatusChanged = pyqtSignal(QMediaPlayer.MediaStatus)
+    errorOccurred = pyqtSignal(QMediaPlayer.Error, str)
+    # キューから最初のフレームが出るまでの時間（ミリ秒）と事前読み込みの有無
+    first_frame_presented = pyqtSignal(float, bool)
+    # ループしないキューがアウト点に達した（最後のフレームで一時停止している）
+    out_point_reached = pyqtSignal()
+    # 前面に出ている映像レイヤーの QVideoSink（コンフィデンスモニター用。ウィンドウがなければ None）
+    front_sink_changed = pyqtSignal(object)
+
+    def __init__(self, player_pool=None, parent=None):
+        super().__init__(parent)
+        self.player_pool = player_pool
+        self.window = None
+        self.volume = 1.0
+        # プレーヤーにソースを設定する関数 (player, index, file_path)。メモリ読み込みなどで差し替える
+        self.source_loader = None
+        self.tracer = get_tracer()
+        # A/B それぞれのコールド用プレーヤーと音声出力（音量を個別にランプさせる）
+        self.cold_players = [QMediaPlayer(self), QMediaPlayer(self)]
+        self.audio_outputs = [QAudioOutput(self), QAudioOutput(self)]
+
+        self.active_player = None  # 前面に出ていて UI に接続されているプレーヤー
+        self.active_layer = 0
+        self.active_pool_entry = None  # (スロット番号, パス, イン点) プールから借りている場合
+        self.active_range = None  # {'in_ms', 'out_ms', 'loop'} イン点・アウト点があるキューの場合
+        self.outgoing = None  # トランジション中の旧プレーヤー (player, layer, pool_entry)
+        self.pending = None  # 最初のフレーム待ちの新プレーヤー情報
+        self.animation = None
+        self.audio_tap = None  # アクティブなプレーヤーの音声を受け取る QAudioBufferOutput（レベルメーター用）
+
+        self.first_frame_timer = QTimer(self)
+        self.first_frame_timer.setSingleShot(True)
+        self.first_frame_timer.timeout.connect(self._on_first_frame_timeout)
+
+        # アウト点はミリ秒単位で合わせるので、位置の通知より細かいタイマーで終わらせる
+        self.out_timer = QTimer(self)
+        self.out_timer.setSingleShot(True)
+        self.out_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.out_timer.timeout.connect(self._on_out_point)
+        self.positionChanged.connect(self._track_out_point)
+        self.playbackStateChanged.connect(self._on_active_state)
+        self.mediaStatusChanged.connect(self._on_active_status)
+
+        self._bind(self.cold_players[0], 0)
+
+    # 再生ウィンドウを接続するメソッド
+    def attach_window(self, window):
+        self.window = window
+        if self.active_player is not None:
+            self.active_player.setVideoOutput(window.video_layers[self.active_layer])
+        window.set_front_layer(self.active_layer)
+        self.front_sink_changed.emit(self.front_sink())
+
+    def detach_window(self):
+        self.window = None
+        self.front_sink_changed.emit(None)
+
+    def front_sink(self):
+        if self.window is None:
+            return None
+        return self.window.video_layers[self.active_layer].videoSink()
+
+    # 前面のプレーヤーの音声バッファを渡す先を設定するメソッド（None で外す）
+    def set_audio_tap(self, tap):
+        if self.active_player is not None and self.audio_tap is not None:
+            self.active_player.setAudioBufferOutput(None)
+        self.audio_tap = tap
+        if self.active_player is not None and tap is not None:
+            self.active_player.setAudioBufferOutput(tap)
+
+    # 両方の音声出力の出力先デバイスを設定するメソッド
+    def set_audio_device(self, device):
+        for audio_output in self.audio_outputs:
+            audio_output.setDevice(device)
+
+    # キューを出力するメソッド（transition は {'type': ..., 'duration': ms}）
+    # barrier を渡すと、最初のフレームを用意した状態で待機し、全出力がそろってから再生を始める
+    # in_ms / out_ms を渡すとその区間だけを再生し、ループはイン点とアウト点の間で繰り返す
+    def cue(self, index, file_path, loops, transition=None, barrier=None, in_ms=0, out_ms=None):
+        transition = transition or DEFAULT_TRANSITION
+        self._abort_pending()
+        self._finish_transition()
+        self.out_timer.stop()
+        # 区間指定がなければ QMediaPlayer 自身のループを使う（継ぎ目なく先頭に戻る）
+        cue_range = None
+        if in_ms or out_ms is not None:
+            cue_range = {'in_ms': in_ms, 'out_ms': out_ms, 'loop': loops == QMediaPlayer.Loops.Infinite}
+            loops = 1
+
+        # 同じスロットのプールプレーヤーが出力中ならイン点に戻すだけ
+        if self.active_pool_entry is not None and self.active_pool_entry[:2] == (index, file_path):
+            player = self.active_player
+            self.active_range = cue_range
+            player.setLoops(loops)
+            player.setPosition(in_ms)
+            if barrier is not None:
+                player.pause()
+                barrier.released.connect(player.play)
+                barrier.arrive()
+            else:
+                player.play()
+            self.tracer.end('restart_same_player')
+            return
+
+        warm = False
+        player = None
+        if self.player_pool is not None:
+            player = self.player_pool.take(index, file_path)
+        if player is not None:
+            warm = True
+            pool_entry = (index, file_path, in_ms)
+        else:
+            pool_entry = None
+            # 出力中でない側のコールドプレーヤーを使う
+            player = self.cold_players[1] if self.active_player is self.cold_players[0] else self.cold_players[0]
+
+        layer = 1 - self.active_layer
+        audio_output = self.audio_outputs[layer]
+        # 前面に出るまでは無音にしておく（カットでも旧クリップと音が重ならないように _cut() で上げる）
+        audio_output.setVolume(0.0)
+
+        self.pending = {
+            'player': player,
+            'layer': layer,
+            'pool_entry': pool_entry,
+            'transition': transition,
+            'warm': warm,
+            'started_at': time.perf_counter(),
+            'barrier': barrier,
+            'ready': False,  # バリア待ちで最初のフレームが用意できたか
+            'ready_stage': None,  # 準備完了の理由（トレースのステージ名）
+            'in_ms': in_ms,
+            'in_point_seeked': warm or not in_ms,
+            'previous_range': self.active_range,
+        }
+        self.active_range = cue_range
+
+        # 旧プレーヤーを切り離し、新プレーヤーを UI に接続する（旧プレーヤーは再生を続ける）
+        self.outgoing = (self.active_player, self.active_layer, self.active_pool_entry)
+        self._unbind(self.active_player)
+        self._bind(player, layer, pool_entry)
+        player.setLoops(loops)
+
+        if self.window is not None:
+            sink = self.window.video_layers[layer].videoSink()
+            sink.videoFrameChanged.connect(self._on_pending_frame)
+        self.tracer.mark('set_source' if not warm else 'warm_player_bound')
+        if not warm:
+            if self.source_loader is not None:
+                self.source_loader(player, index, file_path)
+            else:
+                player.setSource(QUrl.fromLocalFile(file_path))
+            # イン点へのシークは読み込み後に _on_pending_status で行う（読み込み前のシークを捨てるバックエンドがある）
+            # イン点より前のフレームは _on_pending_frame で見送り、イン点のフレームで切り替える
+            if in_ms and player.mediaStatus() in (QMediaPlayer.MediaStatus.LoadedMedia,
+                                                  QMediaPlayer.MediaStatus.BufferedMedia):
+                self._seek_to_in_point()
+        elif player.position() != in_ms:
+            player.setPosition(in_ms)
+        if barrier is not None:
+            # 先頭フレームまでデコードして待つ（背面レイヤーなので画面には出ない）
+            barrier.released.connect(self._on_barrier_released)
+            player.pause()
+            if warm:
+                self.pending['ready'] = True
+                self.pending['ready_stage'] = STAGE_FIRST_FRAME
+                barrier.arrive()
+            return
+        self.tracer.mark('play_called')
+        player.play()
+        self.first_frame_timer.start(FIRST_FRAME_TIMEOUT_MS)
+
+    # 全出力の準備がそろったら（またはタイムアウトしたら）再生を始める
+    def _on_barrier_released(self):
+        pending = self.pending
+        if pending is None or pending['barrier'] is None:
+            return
+        pending['barrier'] = None
+        self.tracer.mark('play_called')
+        pending['player'].play()
+        if pending['ready']:
+            self._begin_transition(pending['ready_stage'])
+        else:
+            self.first_frame_timer.start(FIRST_FRAME_TIMEOUT_MS)
+
+    def play(self):
+        if self.active_player is not None:
+            self.active_player.play()
+
+    def pause(self):
+        if self.active_player is not None:
+            self.active_player.pause()
+
+    # 再生中のキューのループ設定を変えるメソッド
+    def set_loop(self, loop):
+        if self.active_range is not None:
+            self.active_range['loop'] = loop
+        elif self.active_player is not None:
+            self.active_player.setLoops(QMediaPlayer.Loops.Infinite if loop else 1)
+
+    def stop(self):
+        self._abort_pending()
+        self._finish_transition()
+        self.out_timer.stop()
+        if self.active_player is not None:
+            self.active_player.stop()
+
+    def playbackState(self):
+        return self.active_player.playbackState()
+
+    def _bind(self, player, layer, pool_entry=None):
+        self.active_player = player
+        self.active_layer = layer
+        self.active_pool_entry = pool_entry
+        player.setAudioOutput(self.audio_outputs[layer])
+        if self.audio_tap is not None:
+            player.setAudioBufferOutput(self.audio_tap)
+        if self.window is not None:
+            player.setVideoOutput(self.window.video_layers[layer])
+        player.positionChanged.connect(self.positionChanged)
+        player.durationChanged.connect(self.durationChanged)
+        player.playbackStateChanged.connect(self.playbackStateChanged)
+        player.mediaStatusChanged.connect(self.mediaStatusChanged)
+        player.mediaStatusChanged.connect(self._on_pending_status)
+        player.errorOccurred.connect(self.errorOccurred)
+        # プールのプレーヤーは読み込み済みなので長さを通知し直す
+        if pool_entry is not None:
+            self.durationChanged.emit(player.duration())
+
+    def _unbind(self, player):
+        if self.audio_tap is not None:
+            player.setAudioBufferOutput(None)
+        player.positionChanged.disconnect(self.positionChanged)
+        player.durationChanged.disconnect(self.durationChanged)
+        player.playbackStateChanged.disconnect(self.playbackStateChanged)
+        player.mediaStatusChanged.disconnect(self.mediaStatusChanged)
+        player.mediaStatusChanged.disconnect(self._on_pending_status)
+        player.errorOccurred.disconnect(self.errorOccurred)
+
+    # 背面レイヤーに最初のフレームが届いたらトランジションを開始する
+    def _on_pending_frame(self, frame):
+        if self.pending is None or not frame.isValid() or self._before_in_point(frame):
+            return
+        if self.pending['barrier'] is not None:
+            # 他の出力の準備を待つ
+            if not self.pending['ready']:
+                self.pending['ready'] = True
+                self.pending['ready_stage'] = STAGE_FIRST_FRAME
+                self.pending['barrier'].arrive()
+            return
+        self._begin_transition()
+
+    # シーク前に出てきたイン点より前のフレームか
+    def _before_in_point(self, frame):
+        in_us = self.pending['in_ms'] * 1000
+        if not in_us or frame.startTime() < 0:
+            return False
+        end_us = frame.endTime() if frame.endTime() > frame.startTime() else frame.startTime() + IN_POINT_TOLERANCE_US
+        return end_us <= in_us
+
+    # アウト点が近づいたら残り時間でタイマーを張り直す（通知のたびに見積もりを更新する）
+    def _track_out_point(self, position):
+        cue_range = self.active_range
+        if cue_range is None or cue_range['out_ms'] is None \
+                or self.active_player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+            return
+        remaining_ms = cue_range['out_ms'] - position
+        if remaining_ms <= 0:
+            self._on_out_point()
+        elif remaining_ms <= OUT_POINT_HORIZON_MS:
+            rate = self.active_player.playbackRate() or 1.0
+            self.out_timer.start(max(0, int(remaining_ms / rate)))
+        else:
+            # アウト点の手前から後ろへシークした場合は張ってあったタイマーを捨てる
+            self.out_timer.stop()
+
+    def _on_out_point(self):
+        self.out_timer.stop()
+        cue_range = self.active_range
+        player = self.active_player
+        if cue_range is None or player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+            return
+        if cue_range['loop']:
+            player.setPosition(cue_range['in_ms'])
+        else:
+            # アウト点のフレームで止めておく
+            player.pause()
+            self.out_point_reached.emit()
+
+    def _on_active_state(self, state):
+        if state != QMediaPlayer.PlaybackState.PlayingState:
+            self.out_timer.stop()
+
+    # アウト点のないループ区間はファイルの終わりでイン点に戻す
+    def _on_active_status(self, status):
+        cue_range = self.active_range
+        if status == QMediaPlayer.MediaStatus.EndOfMedia and cue_range is not None and cue_range['loop']:
+            self.active_player.setPosition(cue_range['in_ms'])
+            self.active_player.play()
+
+    # 映像のないメディアやエラーの場合は待たずに切り替える
+    def _on_pending_status(self, status):
+        if self.pending is None or self.pending['player'] is not self.active_player:
+            return
+        self.tracer.mark(f"media_status_{status.name}")
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia) \
+                and not self.pending['in_point_seeked']:
+            self._seek_to_in_point()
+        if self.pending['barrier'] is not None:
+            # 映像のないメディアや読み込めないメディアはすぐに準備完了とみなす
+            stage = self._stage_without_frame(status)
+            if not self.pending['ready'] and stage is not None:
+                self.pending['ready'] = True
+                self.pending['ready_stage'] = stage
+                self.pending['barrier'].arrive()
+            return
+        stage = self._stage_without_frame(status)
+        if stage is not None:
+            self._begin_transition(stage)
+
+    # フレームを待たずに切り替えるメディアの状態ならトレースのステージ名、そうでなければ None
+    def _stage_without_frame(self, status):
+        if status == QMediaPlayer.MediaStatus.InvalidMedia:
+            return STAGE_INVALID_MEDIA
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia) \
+                and not self.active_player.hasVideo():
+            return STAGE_NO_VIDEO
+        return None
+
+    def _seek_to_in_point(self):
+        self.pending['in_point_seeked'] = True
+        self.pending['player'].setPosition(self.pending['in_ms'])
+
+    def _on_first_frame_timeout(self):
+        if self.pending is not None:
+            self._begin_transition(STAGE_FIRST_FRAME_TIMEOUT)
+
+    def _disconnect_pending_sink(self):
+        if self.window is None or self.pending is None:
+            return
+        sink = self.window.video_layers[self.pending['layer']].videoSink()
+        try:
+            sink.videoFrameChanged.disconnect(self._on_pending_frame)
+        except TypeError:
+            pass
+
+    # stage はトレースを閉じるステージ名。最初のフレームが実際に届いた場合だけレイテンシとして通知する
+    def _begin_transition(self, stage=None):
+        stage = stage or STAGE_FIRST_FRAME
+        pending = self.pending
+        self.first_frame_timer.stop()
+        self._disconnect_pending_sink()
+        self.pending = None
+        latency_ms = (time.perf_counter() - pending['started_at']) * 1000
+        self.tracer.end(stage)
+        if stage == STAGE_FIRST_FRAME:
+            self.first_frame_presented.emit(latency_ms, pending['warm'])
+
+        transition = pending['transition']
+        duration = transition.get('duration', 0)
+        if transition['type'] == TRANSITION_CUT or duration <= 0 or self.window is None:
+            self._cut()
+            return
+
+        new_layer = self.window.video_layers[pending['layer']]
+        old_layer = self.window.video_layers[1 - pending['layer']]
+        new_audio = self.audio_outputs[pending['layer']]
+        old_audio = self.audio_outputs[1 - pending['layer']]
+        dip = transition['type'] == TRANSITION_DIP_TO_BLACK
+
+        self.window.raise_back_layer()
+        new_layer.setOpacity(0.0)
+
+        # 映像の不透明度と 2 系統の音量を同時にランプさせる
+        def step(value):
+            t = float(value)
+            if dip:
+                old_layer.setOpacity(max(0.0, 1.0 - 2 * t))
+                new_layer.setOpacity(max(0.0, 2 * t - 1.0))
+            else:
+                new_layer.setOpacity(t)
+            old_audio.setVolume(self.volume * (1.0 - t))
+            new_audio.setVolume(self.volume * t)
+
+        self.animation = QVariantAnimation(self)
+        self.animation.setStartValue(0.0)
+        self.animation.setEndValue(1.0)
+        self.animation.setDuration(int(duration))
+        self.animation.setEasingCurve(QEasingCurve.Type.Linear)
+        self.animation.valueChanged.connect(step)
+        self.animation.finished.connect(self._finish_transition)
+        self.animation.start()
+
+    def _cut(self):
+        self.audio_outputs[self.active_layer].setVolume(self.volume)
+        self._finish_transition()
+
+    # トランジションを完了させて旧プレーヤーを解放するメソッド
+    def _finish_transition(self):
+        if self.animation is not None:
+            animation = self.animation
+            self.animation = None
+            animation.stop()
+        if self.outgoing is None:
+            return
+        old_player, old_layer, old_pool_entry = self.outgoing
+        self.outgoing = None
+
+        if self.window is not None:
+            self.window.set_front_layer(self.active_layer)
+            self.front_sink_changed.emit(self.front_sink())
+        self.audio_outputs[self.active_layer].setVolume(self.volume)
+
+        if old_player is self.active_player:
+            return
+        old_player.setAudioOutput(None)
+        old_player.setVideoOutput(None)
+        if old_pool_entry is not None and self.player_pool is not None:
+            self.player_pool.give_back(old_pool_entry[0], old_player, old_pool_entry[1], old_pool_entry[2])
+        else:
+            old_player.stop()
+
+    # 最初のフレーム待ちのキューを破棄するメソッド（新しいキューが来た場合など）
+    def _abort_pending(self):
+        if self.pending is None:
+            return
+        pending = self.pending
+        self.first_frame_timer.stop()
+        self._disconnect_pending_sink()
+        self.pending = None
+        if pending['barrier'] is not None:
+            pending['barrier'].released.disconnect(self._on_barrier_released)
+            if not pending['ready']:
+                pending['barrier'].arrive()  # 他の出力を待たせない
+
+        # まだ表示されていないので、旧プレーヤーを UI に戻す
+        player = pending['player']
+        self._unbind(player)
+        player.setAudioOutput(None)
+        player.setVideoOutput(None)
+        if pending['pool_entry'] is not None and self.player_pool is not None:
+            self.player_pool.give_back(pending['pool_entry'][0], player, pending['pool_entry'][1],
+                                       pending['pool_entry'][2])
+        else:
+            # 読み込み途中のソースを外してデマルチプレクサ・デコーダーの準備を打ち切る
+            player.stop()
+            player.setSource(QUrl())
+        self.tracer.mark('pending_load_cancelled')
+        old_player, old_layer, old_pool_entry = self.outgoing
+        self.outgoing = None
+        self.active_range = pending['previous_range']
+        self._bind(old_player, old_layer, old_pool_entry)
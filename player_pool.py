@@ -0,0 +1,150 @@
+from PyQt6.QtCore import QObject, QUrl
+from PyQt6.QtMultimedia import QMediaPlayer, QVideoSink
+
+DEFAULT_POOL_CAPACITY = 9
+
+
+# 事前に開いておいた QMediaPlayer のプール
+# 各スロットのメディアを読み込み済み・イン点のフレームで一時停止した状態で保持し、
+# キューの切り替え時にデマルチプレクサのオープンやデコーダの初期化を省く
+class PlayerPool(QObject):
+    def __init__(self, capacity=DEFAULT_POOL_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.enabled = False
+        self.capacity = capacity  # 同時に保持するプレーヤー数（メモリ予算）
+        self.players = {}  # スロット番号 -> QMediaPlayer
+        self.sources = {}  # スロット番号 -> ファイルパス
+        self.in_points = {}  # スロット番号 -> 待機している位置（イン点、ミリ秒）
+        self.sinks = {}  # QMediaPlayer -> 描画先のないヘッドレス QVideoSink
+        self.armed = set()  # スケジュール済みのキュー用に容量外でも保持するスロット番号
+        self.source_loader = None  # プレーヤーにソースを設定する関数 (player, index, file_path)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.clear()
+
+    def set_capacity(self, capacity):
+        self.capacity = max(0, int(capacity))
+
+    # video_paths に合わせてプールを更新するメソッド（exclude は再生中のスロット）
+    # order は優先して準備するスロットの順番（省略時は番号順）
+    def sync(self, video_paths, exclude=None, order=None):
+        if not self.enabled:
+            return
+        wanted = {}
+        for index in (order if order is not None else sorted(video_paths)):
+            cue = video_paths.get(index, {})
+            path = cue.get('path')
+            if not path or index == exclude:
+                continue
+            if len(wanted) >= self.capacity:
+                break
+            wanted[index] = (path, cue.get('in_ms', 0))
+
+        for index in list(self.players):
+            if index in self.armed:
+                continue
+            path, in_ms = wanted.get(index, (None, 0))
+            if path != self.sources.get(index):
+                self._discard(index)
+            elif in_ms != self.in_points.get(index):
+                self._position(index, in_ms)
+        for index, (path, in_ms) in wanted.items():
+            if index not in self.players:
+                self._preload(index, path, in_ms)
+
+    # 指定した時刻に出すキューを、プールの有効/無効や容量に関係なく準備しておく
+    def arm(self, index, file_path, in_ms=0):
+        self.armed.add(index)
+        if self.sources.get(index) == file_path:
+            if self.in_points.get(index) != in_ms:
+                self._position(index, in_ms)
+            return
+        if index in self.players:
+            self._discard(index)
+        self._preload(index, file_path, in_ms)
+
+    def disarm(self, index):
+        if index in self.armed:
+            self.armed.discard(index)
+            if not self.enabled and index in self.players:
+                self._discard(index)
+
+    # 準備済みのプレーヤーを取り出す（なければ None）
+    def take(self, index, file_path):
+        if (not self.enabled and index not in self.armed) or self.sources.get(index) != file_path:
+            return None
+        self.armed.discard(index)
+        player = self.players.pop(index)
+        self.sources.pop(index)
+        self.in_points.pop(index, None)
+        return player
+
+    # 再生を終えたプレーヤーをイン点に戻してプールへ返す
+    def give_back(self, index, player, file_path, in_ms=0):
+        if not self.enabled or index in self.players or len(self.players) >= self.capacity:
+            self._dispose(player)
+            return
+        player.setAudioOutput(None)
+        player.setVideoOutput(self.sinks[player])
+        player.setLoops(1)
+        player.setPosition(in_ms)
+        player.pause()
+        self.players[index] = player
+        self.sources[index] = file_path
+        self.in_points[index] = in_ms
+
+    # 再生するファイルが差し替わったスロットのプレーヤーを開き直す（再生用プロキシへの切り替えなど）
+    def reload(self, index):
+        if index not in self.players:
+            return
+        file_path, in_ms = self.sources[index], self.in_points.get(index, 0)
+        self._discard(index)
+        self._preload(index, file_path, in_ms)
+
+    def owns(self, player):
+        return player in self.sinks
+
+    def clear(self):
+        for index in list(self.players):
+            if index not in self.armed:
+                self._discard(index)
+
+    def _preload(self, index, file_path, in_ms=0):
+        player = QMediaPlayer(self)
+        sink = QVideoSink(player)
+        self.sinks[player] = sink
+        player.setVideoOutput(sink)
+        if self.source_loader is not None:
+            self.source_loader(player, index, file_path)
+        else:
+            player.setSource(QUrl.fromLocalFile(file_path))
+        # イン点へ移動して一時停止にすると、そのフレームまでデコードされた状態で待機する
+        # （直前のキーフレームからのデコードはここで済ませ、キューの時点では払わない）
+        if in_ms:
+            player.setPosition(in_ms)
+        player.pause()
+        self.players[index] = player
+        self.sources[index] = file_path
+        self.in_points[index] = in_ms
+
+    # 待機中のプレーヤーの位置だけを合わせ直す
+    def _position(self, index, in_ms):
+        player = self.players[index]
+        player.setPosition(in_ms)
+        player.pause()
+        self.in_points[index] = in_ms
+
+    def _discard(self, index):
+        player = self.players.pop(index)
+        self.sources.pop(index, None)
+        self.in_points.pop(index, None)
+        self._dispose(player)
+
+    def _dispose(self, player):
+        player.stop()
+        player.setVideoOutput(None)
+        player.setAudioOutput(None)
+        self.sinks.pop(player, None)
+        player.deleteLater()
@@ -1,29 +1,88 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
-from PyQt6.QtMultimediaWidgets import QVideoWidget
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QKeyEvent
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QFrame
+from PyQt6.QtMultimediaWidgets import QGraphicsVideoItem
+from PyQt6.QtOpenGLWidgets import QOpenGLWidget
+from PyQt6.QtCore import Qt, QSizeF, QRectF
+from PyQt6.QtGui import QKeyEvent, QBrush, QColor
+from tracing import get_tracer
 
 
 # 動画再生専用のウィンドウクラス
+# A/B 2 枚の映像レイヤーを重ねて持ち、トランジション時に合成・入れ替えを行う
 class PlayerWindow(QWidget):
     # コンストラクタ
     def __init__(self, controller):
         super().__init__()
         self.controller = controller  # メインコントローラーへの参照を保持
         self.setStyleSheet("background-color: black;")  # 背景色を黒に設定
-        
-        # ビデオ表示用のウィジェットを作成
-        self.video_widget = QVideoWidget()
-        
+
+        # 映像レイヤーを重ねるためのシーンとビュー
+        self.scene = QGraphicsScene(self)
+        self.scene.setBackgroundBrush(QBrush(QColor("black")))
+        self.view = QGraphicsView(self.scene)
+        self.view.setFrameShape(QFrame.Shape.NoFrame)
+        self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.view.setFocusPolicy(Qt.FocusPolicy.NoFocus)  # キー入力はウィンドウで受け取る
+        # 既定のビューポートは GUI スレッドの QPainter で毎フレーム描くため、OpenGL で合成する
+        self.view.setViewport(QOpenGLWidget())
+        self.view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+
+        # ビデオ表示用のレイヤー（A/B）を作成
+        self.video_layers = []
+        for _ in range(2):
+            layer = QGraphicsVideoItem()
+            layer.setAspectRatioMode(Qt.AspectRatioMode.KeepAspectRatio)
+            self.scene.addItem(layer)
+            self.video_layers.append(layer)
+        self.front_index = 0
+        self._restack()
+
         # レイアウトを設定
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)  # ウィンドウのマージンをなくす
-        layout.addWidget(self.video_widget)
+        layout.addWidget(self.view)
         self.setLayout(layout)
 
         # カーソルを非表示にする
         self.setCursor(Qt.CursorShape.BlankCursor)
 
+    # 現在表示中（前面）のレイヤー
+    @property
+    def video_widget(self):
+        return self.video_layers[self.front_index]
+
+    # 次のキューを準備する背面のレイヤー
+    @property
+    def back_video_widget(self):
+        return self.video_layers[1 - self.front_index]
+
+    # 前面と背面のレイヤーを入れ替えるメソッド
+    def swap_layers(self):
+        self.set_front_layer(1 - self.front_index)
+
+    # 指定したレイヤーを前面にして不透明度を戻すメソッド
+    def set_front_layer(self, index):
+        self.front_index = index
+        self._restack()
+        for layer in self.video_layers:
+            layer.setOpacity(1.0)
+
+    # 背面レイヤーを前面の上に重ねる（クロスフェード中の合成用）
+    def raise_back_layer(self):
+        self.back_video_widget.setZValue(2)
+
+    def _restack(self):
+        self.video_widget.setZValue(1)
+        self.back_video_widget.setZValue(0)
+
+    # ウィンドウサイズに合わせてレイヤーを拡大縮小する
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        size = self.view.viewport().size()
+        self.scene.setSceneRect(QRectF(0, 0, size.width(), size.height()))
+        for layer in self.video_layers:
+            layer.setSize(QSizeF(size.width(), size.height()))
+
     # キーが押されたときのイベントハンドラ
     def keyPressEvent(self, event: QKeyEvent):
         key = event.key()
@@ -47,9 +106,13 @@ class PlayerWindow(QWidget):
             Qt.Key.Key_4: 3, Qt.Key.Key_5: 4, Qt.Key.Key_6: 5,
             Qt.Key.Key_7: 6, Qt.Key.Key_8: 7, Qt.Key.Key_9: 8,
         }
-        # 押されたキーがマッピングにあれば、対応するビデオを再生
+        # 押されたキーがマッピングにあれば、表示中のバンクの対応するビデオを再生
         if key in key_map:
-            self.controller.play_video_from_button(key_map[key])
+            get_tracer().begin('keyboard', 'key_press_event')
+            self.controller.play_slot(key_map[key])
+        # PageUp/PageDown でバンクを切り替え
+        elif key in (Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            self.controller.change_bank(-1 if key == Qt.Key.Key_PageUp else 1)
         else:
             # それ以外のキーはデフォルトの処理に任せる
             super().keyPressEvent(event)
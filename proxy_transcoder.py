@@ -0,0 +1,171 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from app_paths import cache_dir, content_hash, low_priority_command
+
+# すべてのフレームがキーフレームの再生用ファイル（シーク・ループ・イン点で前のフレームをデコードしない）
+PROXY_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-tune", "fastdecode", "-crf", "18",
+                    "-g", "1", "-keyint_min", "1", "-sc_threshold", "0", "-pix_fmt", "yuv420p"]
+PROXY_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+# もともと全フレームがキーフレームのコーデックは変換しない
+INTRA_CODECS = {"mjpeg", "prores", "dnxhd", "ffv1", "hap", "rawvideo", "png", "qtrle", "utvideo"}
+LOAD_RECHECK_S = 5  # 空きコアを待つ変換がロードアベレージを見直す間隔
+
+
+# 再生に使っていない CPU コア数（再生のために 1 コアは残す）
+# own_jobs には自分で動かしている変換の数を渡す（ロードアベレージに含まれている分を差し引く）
+def free_cores(own_jobs=0):
+    cores = os.cpu_count() or 1
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = 0.0
+    return max(1, int(cores - max(0.0, load - own_jobs)) - 1)
+
+
+# 割り当てられたクリップを全フレームキーフレームの再生用ファイルにバックグラウンドで変換するキュー
+# 同時に動かす ffmpeg は、各変換を始める時点の空いているコア数まで（各 ffmpeg は 1 スレッド・低優先度）。
+# 変換結果は元ファイルの内容ハッシュをキーにキャッシュし、同じ内容なら再変換しない
+class ProxyTranscoder(QObject):
+    # 元ファイルのパスと進捗（0.0〜1.0）
+    progress = pyqtSignal(str, float)
+    # 元ファイルのパスと再生用ファイルのパス
+    proxy_ready = pyqtSignal(str, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir("proxies")
+        self.ffmpeg = shutil.which("ffmpeg")
+        # スレッドはコア数まで用意し、実際に ffmpeg を動かす数は _acquire_slot で絞る
+        self.executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="proxy")
+        self.lock = threading.Lock()
+        self.slots = threading.Condition()
+        self.running = 0  # 動いている ffmpeg の数
+        self.proxies = {}  # 元ファイルのパス -> 再生用ファイルのパス
+        self.jobs = {}  # 元ファイルのパス -> {'fraction', 'cancel', 'process'}
+
+    def available(self):
+        return self.ffmpeg is not None
+
+    # info はメディア調査の結果（duration_ms と streams を使う）
+    def request(self, file_path, info):
+        if not self.ffmpeg or file_path in self.proxies or file_path in self.jobs:
+            return
+        video = [s for s in info.get('streams', []) if s.get('type') == 'video']
+        if not video or video[0].get('codec') in INTRA_CODECS:
+            return
+        job = self.jobs[file_path] = {'fraction': 0.0, 'cancel': threading.Event(), 'process': None}
+        self.executor.submit(self._lookup_or_transcode, job, file_path, info.get('duration_ms', 0))
+
+    # 再生に使うパス（変換済みならそのファイル）
+    def playout_path(self, file_path):
+        return self.proxies.get(file_path, file_path)
+
+    def progress_of(self, file_path):
+        job = self.jobs.get(file_path)
+        return job['fraction'] if job else None
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            job['cancel'].set()
+            with self.lock:
+                if job['process'] is not None:
+                    job['process'].terminate()
+        self.jobs.clear()
+        with self.slots:
+            self.slots.notify_all()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _lookup_or_transcode(self, job, file_path, duration_ms):
+        if job['cancel'].is_set():
+            return
+        try:
+            digest = content_hash(file_path, full=True)
+        except OSError as e:
+            self._finish(job, file_path, None, str(e))
+            return
+        proxy_path = os.path.join(self.cache_dir, f"{digest}.mp4")
+        if os.path.exists(proxy_path):
+            self._finish(job, file_path, proxy_path)
+            return
+        if not self._acquire_slot(job):
+            return
+        # 取り消し後に同じパスで登録し直したジョブと一時ファイルを取り合わないよう、スレッドごとに分ける
+        tmp_path = f"{proxy_path}.{threading.get_ident()}.tmp.mp4"
+        try:
+            error = self._transcode(job, file_path, duration_ms, tmp_path)
+        finally:
+            with self.slots:
+                self.running -= 1
+                self.slots.notify()
+        if job['cancel'].is_set():
+            return
+        if error is not None:
+            self._finish(job, file_path, None, error)
+            return
+        os.replace(tmp_path, proxy_path)
+        self._finish(job, file_path, proxy_path)
+
+    # 空いているコアができるまで待つ（取り消されたら False）
+    def _acquire_slot(self, job):
+        with self.slots:
+            while not job['cancel'].is_set() and self.running >= free_cores(self.running):
+                self.slots.wait(LOAD_RECHECK_S)
+            if job['cancel'].is_set():
+                return False
+            self.running += 1
+            return True
+
+    # ffmpeg で変換する（成功なら None、失敗ならエラーメッセージを返す）
+    def _transcode(self, job, file_path, duration_ms, tmp_path):
+        command = ([self.ffmpeg, "-v", "error", "-nostats", "-y", "-i", file_path, "-map", "0:v:0", "-map", "0:a?",
+                    "-threads", "1"] + PROXY_VIDEO_ARGS + PROXY_AUDIO_ARGS +
+                   ["-movflags", "+faststart", "-progress", "pipe:1", tmp_path])
+        # stderr はパイプにしない（エラーが多いと stdout を読み終える前にパイプが詰まり ffmpeg と止め合う）
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            try:
+                process = subprocess.Popen(low_priority_command(command), stdout=subprocess.PIPE, stderr=stderr,
+                                           text=True)
+            except OSError as e:
+                return str(e)
+            with self.lock:
+                job['process'] = process
+            # -progress の out_time_us から進捗を求める
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and duration_ms and value.isdigit():
+                    fraction = min(1.0, int(value) / 1000 / duration_ms)
+                    if fraction - job['fraction'] >= 0.01:
+                        job['fraction'] = fraction
+                        self.progress.emit(file_path, fraction)
+            process.wait()
+            stderr.seek(0)
+            error = stderr.read().strip()
+        if job['cancel'].is_set() or process.returncode != 0:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return error.splitlines()[-1] if error else f"ffmpeg exited with {process.returncode}"
+        return None
+
+    # 取り消された古いジョブは、同じパスで後から登録されたジョブの状態を消さない
+    def _finish(self, job, file_path, proxy_path, error=None):
+        if self.jobs.get(file_path) is not job:
+            return
+        self.jobs.pop(file_path, None)
+        # 別スレッドからの emit は GUI スレッドへキューイングされる
+        if proxy_path is None:
+            print(f"Proxy for {file_path} failed: {error}")
+            self.failed.emit(file_path, error or "")
+            return
+        self.proxies[file_path] = proxy_path
+        self.proxy_ready.emit(file_path, proxy_path)
@@ -0,0 +1,174 @@
+import os
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QIODevice, QUrl, pyqtSignal
+
+DEFAULT_RAM_BUDGET_MB = 2048
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+# メモリ上のバッファを QMediaPlayer.setSourceDevice に渡すための読み取り専用デバイス
+# バッファはスロット間で共有し、プレーヤーごとに読み取り位置だけを持つ
+class MemoryMediaDevice(QIODevice):
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = memoryview(buffer)
+        self.open(QIODevice.OpenModeFlag.ReadOnly)
+
+    def isSequential(self):
+        return False
+
+    def size(self):
+        return len(self.buffer)
+
+    def bytesAvailable(self):
+        return len(self.buffer) - self.pos() + super().bytesAvailable()
+
+    def readData(self, max_size):
+        start = self.pos()
+        return bytes(self.buffer[start:start + max_size])
+
+    def writeData(self, data):
+        return -1
+
+
+# スロットごとのメディアをメモリに読み込んでおく仕組み
+# 全体のメモリ予算を超えると最も長く使われていないスロットから解放し、
+# 予算に収まらないスロットは OS のページキャッシュへの先読みだけを行う
+class MediaPreloader(QObject):
+    # スロット番号, 読み込み済みバイト数, 総バイト数
+    progress = pyqtSignal(int, 'qint64', 'qint64')
+    # スロット番号, メモリに常駐しているバイト数（先読みのみ・解放済みなら 0）
+    resident_changed = pyqtSignal(int, 'qint64')
+    # ワーカースレッドから GUI スレッドへ読み込み完了を通知する
+    # スロット番号, パス, バッファ（失敗なら None）, その読み込みのキャンセル用 Event
+    _loaded = pyqtSignal(int, str, object, object)
+
+    def __init__(self, budget_mb=DEFAULT_RAM_BUDGET_MB, parent=None):
+        super().__init__(parent)
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.buffers = OrderedDict()  # スロット番号 -> (パス, bytearray) 使用順
+        self.loading = {}  # スロット番号 -> キャンセル用 Event
+        self.lock = threading.Lock()
+        self._loaded.connect(self._on_loaded)
+
+    def set_budget_mb(self, budget_mb):
+        self.budget_bytes = max(0, int(budget_mb)) * 1024 * 1024
+        self._evict_over_budget()
+
+    def resident_bytes(self):
+        with self.lock:
+            return sum(len(data) for _, data in self.buffers.values())
+
+    # スロットのメモリ読み込みを開始するメソッド
+    def preload(self, index, file_path):
+        self.release(index)
+        try:
+            total = os.path.getsize(file_path)
+        except OSError:
+            return
+        if total > self.budget_bytes:
+            # 予算を超えるファイルはページキャッシュに先読みさせるだけにする
+            threading.Thread(target=self._readahead, args=(file_path,), daemon=True).start()
+            self.resident_changed.emit(index, 0)
+            return
+        cancel = threading.Event()
+        self.loading[index] = cancel
+        threading.Thread(target=self._load, args=(index, file_path, total, cancel), daemon=True).start()
+
+    # スロットのバッファを解放するメソッド
+    def release(self, index):
+        cancel = self.loading.pop(index, None)
+        if cancel is not None:
+            cancel.set()
+        with self.lock:
+            released = self.buffers.pop(index, None)
+        if released is not None:
+            self.resident_changed.emit(index, 0)
+
+    # 再生用のデバイスを返す（メモリにない場合は None）
+    def device_for(self, index, file_path, parent=None):
+        with self.lock:
+            entry = self.buffers.get(index)
+            if entry is None or entry[0] != file_path:
+                return None
+            self.buffers.move_to_end(index)
+            return MemoryMediaDevice(entry[1], parent)
+
+    # プレーヤーにソースを設定するメソッド（メモリにあればバッファから、なければファイルから）
+    def apply_source(self, player, index, file_path):
+        device = self.device_for(index, file_path, player)
+        if device is not None:
+            player.setSourceDevice(device, QUrl.fromLocalFile(file_path))
+        else:
+            player.setSource(QUrl.fromLocalFile(file_path))
+
+    def _load(self, index, file_path, total, cancel):
+        data = bytearray(total)
+        view = memoryview(data)
+        loaded = 0
+        error = None
+        try:
+            with open(file_path, 'rb', buffering=0) as f:
+                while loaded < total and not cancel.is_set():
+                    count = f.readinto(view[loaded:loaded + READ_CHUNK_SIZE])
+                    if not count:
+                        break
+                    loaded += count
+                    self.progress.emit(index, loaded, total)
+                size = os.fstat(f.fileno()).st_size
+            # 読み込み中にファイルが縮んだ・伸びた場合は不完全なので使わない
+            if not cancel.is_set() and (loaded != total or size != total):
+                error = f"size changed while reading ({loaded} of {total} bytes, now {size})"
+        except OSError as e:
+            error = str(e)
+        view.release()
+        if cancel.is_set():
+            return
+        if error is not None:
+            print(f"Failed to preload {file_path}: {error}")
+            self._loaded.emit(index, file_path, None, cancel)
+            return
+        self._loaded.emit(index, file_path, data, cancel)
+
+    # data が None なら読み込み失敗（ファイルから再生する）
+    def _on_loaded(self, index, file_path, data, cancel):
+        if self.loading.get(index) is not cancel:
+            return  # 読み込み中に解放された、または新しい読み込みに置き換えられた
+        del self.loading[index]
+        if data is None:
+            self.resident_changed.emit(index, 0)
+            return
+        with self.lock:
+            self.buffers[index] = (file_path, data)
+        self.resident_changed.emit(index, len(data))
+        self._evict_over_budget(keep=index)
+
+    def _evict_over_budget(self, keep=None):
+        while self.resident_bytes() > self.budget_bytes:
+            with self.lock:
+                victims = [i for i in self.buffers if i != keep]
+                if not victims:
+                    break
+                victim = victims[0]
+                file_path, _ = self.buffers.pop(victim)
+            self.resident_changed.emit(victim, 0)
+            threading.Thread(target=self._readahead, args=(file_path,), daemon=True).start()
+
+    @staticmethod
+    def _readahead(file_path):
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                # posix_fadvise がない環境では読み捨ててキャッシュを温める
+                while os.read(fd, READ_CHUNK_SIZE):
+                    pass
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
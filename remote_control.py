@@ -0,0 +1,375 @@
+import hmac
+import json
+import time
+import struct
+import asyncio
+import ipaddress
+import threading
+from urllib.parse import urlsplit, parse_qs
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+from PyQt6.QtMultimedia import QMediaPlayer
+from tracing import get_tracer
+
+DEFAULT_OSC_PORT = 9000
+DEFAULT_HTTP_PORT = 9080
+STATE_PUSH_INTERVAL_MS = 100  # 購読者へ状態を送る最短間隔
+HTTP_MAX_HEADER_BYTES = 16 * 1024
+HTTP_READ_TIMEOUT_S = 10  # 要求を送ってこない接続を閉じるまでの時間
+SSE_MAX_BUFFER_BYTES = 256 * 1024  # 読まれずに溜まった送信データがこれを超えた SSE の購読者は切る
+HTTP_REASONS = {200: "OK", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed"}
+
+PLAYBACK_STATE_NAMES = {
+    QMediaPlayer.PlaybackState.StoppedState: "stopped",
+    QMediaPlayer.PlaybackState.PlayingState: "playing",
+    QMediaPlayer.PlaybackState.PausedState: "paused",
+}
+
+
+# --- OSC 1.0 の最小限のエンコード/デコード（int32・float32・文字列とバンドル） ---
+
+def _osc_pad(data):
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+def _osc_read_string(data, offset):
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode("utf-8", "replace"), (end // 4 + 1) * 4
+
+
+def encode_osc_message(address, *args):
+    tags = ","
+    payload = b""
+    for arg in args:
+        if isinstance(arg, bool) or isinstance(arg, int):
+            tags += "i"
+            payload += struct.pack(">i", int(arg))
+        elif isinstance(arg, float):
+            tags += "f"
+            payload += struct.pack(">f", arg)
+        else:
+            tags += "s"
+            payload += _osc_pad(str(arg).encode("utf-8"))
+    return _osc_pad(address.encode("utf-8")) + _osc_pad(tags.encode("ascii")) + payload
+
+
+# パケットを (アドレス, 引数リスト) のリストに分解する（バンドルは展開する）
+def decode_osc_packet(data):
+    if data.startswith(b"#bundle\0"):
+        messages = []
+        offset = 16  # "#bundle" + タイムタグ
+        while offset + 4 <= len(data):
+            size = struct.unpack_from(">i", data, offset)[0]
+            messages.extend(decode_osc_packet(data[offset + 4:offset + 4 + size]))
+            offset += 4 + size
+        return messages
+    address, offset = _osc_read_string(data, 0)
+    if offset >= len(data):
+        return [(address, [])]
+    tags, offset = _osc_read_string(data, offset)
+    args = []
+    for tag in tags[1:]:
+        if tag == "i":
+            args.append(struct.unpack_from(">i", data, offset)[0])
+            offset += 4
+        elif tag == "f":
+            args.append(struct.unpack_from(">f", data, offset)[0])
+            offset += 4
+        elif tag == "s":
+            value, offset = _osc_read_string(data, offset)
+            args.append(value)
+        elif tag == "T":
+            args.append(True)
+        elif tag == "F":
+            args.append(False)
+    return [(address, args)]
+
+
+# OSC/UDP と HTTP で受けた操作を Qt スレッドへ渡すリモート操作サーバー
+# asyncio のイベントループを専用スレッドで回し、コマンドはシグナルの emit だけで GUI スレッドへ渡す
+# （受信側がメインスレッドにあるのでキュー接続になり、余計な中継キューを挟まない）
+#
+#   OSC:  /cue <番号>  /toggle  /stop  /bank <番号>  /subscribe [ポート]  /unsubscribe  /ping [...]
+#   HTTP: POST /cue/<番号>  /toggle  /stop  /bank/<番号>（状態を変える操作は POST のみ）
+#         GET /state  /ping、GET /events は Server-Sent Events で状態を送り続ける
+# キュー番号・バンク番号は Stream Deck の表示と同じ 1 始まり
+# token を指定すると、HTTP は Authorization: Bearer <token> か ?token=<token> が一致しない要求を拒否する
+# （ブラウザからの読み取りを許さないよう CORS ヘッダーは付けない）
+# OSC には認証がないので、ループバック以外で待ち受けるときは osc_allow（送信元アドレスのリスト、
+# "*" ですべて許可）を指定しない限り OSC を起動しない
+class RemoteControlServer(QObject):
+    cue_requested = pyqtSignal(int)  # 0 始まりのキュー番号
+    toggle_requested = pyqtSignal()
+    stop_requested = pyqtSignal()
+    bank_requested = pyqtSignal(int)  # 0 始まりのバンク番号
+
+    def __init__(self, host="127.0.0.1", osc_port=DEFAULT_OSC_PORT, http_port=DEFAULT_HTTP_PORT, token=None,
+                 osc_allow=None, parent=None):
+        super().__init__(parent)
+        self.host = host
+        self.token = token or None
+        self.osc_allow = set(osc_allow) if osc_allow else None
+        self.osc_port = osc_port
+        self.http_port = http_port
+        self.tracer = get_tracer()
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.state_lock = threading.Lock()
+        self.state = {'cue': None, 'position_ms': 0, 'duration_ms': 0, 'playback': "stopped", 'playing': []}
+        self.state_version = 0
+        self.osc_transport = None
+        self.osc_subscribers = set()  # (host, port)
+        self.event_streams = set()  # SSE の StreamWriter
+        self._servers = []
+
+    # --- 起動・停止 ---
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="remote-control", daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(2)
+            self.thread = None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_servers())
+        except OSError as e:
+            print(f"Remote control server could not start: {e}")
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.create_task(self._push_state_loop())
+        try:
+            self.loop.run_forever()
+        finally:
+            for server in self._servers:
+                server.close()
+            if self.osc_transport is not None:
+                self.osc_transport.close()
+            for writer in self.event_streams:
+                writer.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    # ループバックのアドレスか（名前は localhost だけをループバックとみなす）
+    @staticmethod
+    def is_loopback(host):
+        if host == "localhost":
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    async def _start_servers(self):
+        if self.osc_port is not None and self.osc_allow is None and not self.is_loopback(self.host):
+            print(f"Remote control: OSC is not started on {self.host} because it has no authentication; "
+                  f"set an allowlist of sender addresses (or '*') to enable it")
+            self.osc_port = None
+        if self.osc_port is not None:
+            self.osc_transport, _ = await self.loop.create_datagram_endpoint(
+                lambda: _OscProtocol(self), local_addr=(self.host, self.osc_port))
+            self.osc_port = self.osc_transport.get_extra_info('sockname')[1]
+        if self.http_port is not None:
+            server = await asyncio.start_server(self._handle_http, self.host, self.http_port)
+            self.http_port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+        print(f"Remote control: OSC udp/{self.osc_port}, HTTP tcp/{self.http_port} on {self.host}")
+
+    # --- コマンド（サーバースレッドで呼ばれ、シグナルで Qt スレッドへ渡す） ---
+
+    def dispatch(self, command, number=None, source='remote'):
+        if command == "cue" and number is not None and number >= 1:
+            self.tracer.begin(source, 'remote_command')
+            self.cue_requested.emit(number - 1)
+        elif command == "toggle":
+            self.toggle_requested.emit()
+        elif command == "stop":
+            self.stop_requested.emit()
+        elif command == "bank" and number is not None and number >= 1:
+            self.bank_requested.emit(number - 1)
+        else:
+            return False
+        return True
+
+    def handle_osc(self, data, addr):
+        if self.osc_allow is not None and "*" not in self.osc_allow and addr[0] not in self.osc_allow:
+            return
+        try:
+            messages = decode_osc_packet(data)
+        except (ValueError, struct.error):
+            return
+        for address, args in messages:
+            command = address.rstrip("/").rsplit("/", 1)[-1]
+            number = int(args[0]) if args and isinstance(args[0], (int, float)) else None
+            if command == "subscribe":
+                self.osc_subscribers.add((addr[0], number or addr[1]))
+                self._send_osc_state((addr[0], number or addr[1]))
+            elif command == "unsubscribe":
+                self.osc_subscribers.discard((addr[0], number or addr[1]))
+            elif command == "ping":
+                self.osc_transport.sendto(encode_osc_message("/pong", *args), addr)
+            else:
+                self.dispatch(command, number, 'osc')
+
+    async def _handle_http(self, reader, writer):
+        try:
+            header = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HTTP_READ_TIMEOUT_S)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        if len(header) > HTTP_MAX_HEADER_BYTES:
+            writer.close()
+            return
+        lines = header.decode("latin-1").split("\r\n")
+        parts = lines[0].split()
+        if len(parts) < 2 or parts[0] not in ("GET", "POST"):
+            await self._http_reply(writer, 405, {'error': "method not allowed"})
+            return
+        method = parts[0]
+        url = urlsplit(parts[1])
+        segments = [s for s in url.path.split("/") if s]
+        if not self._authorized(lines[1:], url.query):
+            await self._http_reply(writer, 401, {'error': "unauthorized"})
+            return
+
+        if segments in (["events"], ["state"], ["ping"]) and method != "GET":
+            await self._http_reply(writer, 405, {'error': "method not allowed"})
+            return
+        if segments == ["events"]:
+            await self._serve_events(writer)
+            return
+        if segments == ["state"]:
+            await self._http_reply(writer, 200, self._state_snapshot())
+            return
+        if segments == ["ping"]:
+            await self._http_reply(writer, 200, {'pong': time.time()})
+            return
+        if method != "POST":
+            # 状態を変える操作はリンクや画像の読み込みから実行されないよう POST に限る
+            await self._http_reply(writer, 405, {'error': "commands require POST"})
+            return
+        command = segments[0] if segments else ""
+        number = None
+        if len(segments) > 1:
+            try:
+                number = int(segments[1])
+            except ValueError:
+                number = None
+        if self.dispatch(command, number, 'http'):
+            await self._http_reply(writer, 200, {'ok': True})
+        else:
+            await self._http_reply(writer, 404, {'error': "unknown command"})
+
+    # トークンが設定されていれば Authorization ヘッダーかクエリの token と比べる
+    def _authorized(self, header_lines, query):
+        if self.token is None:
+            return True
+        supplied = parse_qs(query).get("token", [""])[0]
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "authorization" and value.strip().lower().startswith("bearer "):
+                supplied = value.strip()[7:].strip()
+        return hmac.compare_digest(supplied.encode("utf-8"), self.token.encode("utf-8"))
+
+    async def _http_reply(self, writer, status, body):
+        data = json.dumps(body).encode("utf-8")
+        extra = "WWW-Authenticate: Bearer\r\n" if status == 401 else ""
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n{extra}\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _serve_events(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n")
+        writer.write(self._sse_frame(self._state_snapshot()))
+        self.event_streams.add(writer)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            self.event_streams.discard(writer)
+
+    # --- 状態の通知（Qt スレッドから呼ばれるスロット。値を置くだけで送信はサーバースレッド） ---
+
+    @pyqtSlot(int, int, int)
+    def update_position(self, index, position, duration):
+        with self.state_lock:
+            self.state.update(cue=index + 1, position_ms=position, duration_ms=duration)
+            self.state_version += 1
+
+    @pyqtSlot(int, bool)
+    def update_playback_state(self, index, is_playing):
+        with self.state_lock:
+            playing = set(self.state['playing'])
+            if is_playing:
+                playing.add(index + 1)
+            else:
+                playing.discard(index + 1)
+            self.state['playing'] = sorted(playing)
+            self.state_version += 1
+
+    @pyqtSlot(QMediaPlayer.PlaybackState)
+    def update_global_playback_state(self, state):
+        with self.state_lock:
+            self.state['playback'] = PLAYBACK_STATE_NAMES.get(state, "stopped")
+            self.state_version += 1
+
+    def _state_snapshot(self):
+        with self.state_lock:
+            return dict(self.state, playing=list(self.state['playing']))
+
+    # 変化があったときだけ STATE_PUSH_INTERVAL_MS ごとに購読者へ送る
+    async def _push_state_loop(self):
+        sent_version = -1
+        while True:
+            await asyncio.sleep(STATE_PUSH_INTERVAL_MS / 1000)
+            with self.state_lock:
+                version = self.state_version
+            if version == sent_version or not (self.osc_subscribers or self.event_streams):
+                continue
+            sent_version = version
+            snapshot = self._state_snapshot()
+            for subscriber in list(self.osc_subscribers):
+                self._send_osc_state(subscriber, snapshot)
+            frame = self._sse_frame(snapshot)
+            for writer in list(self.event_streams):
+                # 読まない購読者の送信バッファが際限なく伸びないよう、溜まりすぎたら切る
+                if writer.is_closing() or writer.transport.get_write_buffer_size() > SSE_MAX_BUFFER_BYTES:
+                    self.event_streams.discard(writer)
+                    writer.close()
+                    continue
+                writer.write(frame)
+
+    def _send_osc_state(self, subscriber, snapshot=None):
+        snapshot = snapshot or self._state_snapshot()
+        if self.osc_transport is None:
+            return
+        self.osc_transport.sendto(encode_osc_message(
+            "/state", snapshot['cue'] or 0, snapshot['position_ms'], snapshot['duration_ms'],
+            snapshot['playback']), subscriber)
+
+    @staticmethod
+    def _sse_frame(snapshot):
+        return f"event: state\ndata: {json.dumps(snapshot)}\n\n".encode("utf-8")
+
+
+class _OscProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.handle_osc(data, addr)
@@ -0,0 +1,255 @@
+import os
+import mmap
+import shutil
+import struct
+import subprocess
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QPoint, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor
+from PyQt6.QtWidgets import QSlider, QLabel, QStyle, QStyleOptionSlider
+from app_paths import cache_dir, content_hash, low_priority_command
+
+PREVIEW_INTERVAL_MS = 2000  # スプライトシートに取り出す間隔
+PREVIEW_TILE_WIDTH = 160
+PREVIEW_TILE_HEIGHT = 90
+PREVIEW_JPEG_QUALITY = 6  # ffmpeg の -q:v（2〜31、小さいほど高画質）
+EXTRACT_TIMEOUT_S = 600
+MAX_OPEN_SHEETS = 4  # 同時に開いておくスプライトシートの数
+
+# スプライトシートのファイル形式: ヘッダー、タイルごとの開始位置の表（タイル数 + 1 個）、
+# 時刻順に並べた JPEG のタイル。タイル 1 枚は数 KB なので 2 時間のクリップでも十数 MB に収まり、
+# ホバー時は表から範囲を引いて小さな JPEG を 1 枚デコードするだけ
+SHEET_MAGIC = b"PVSJ"
+SHEET_HEADER = struct.Struct("<4sHHHII")  # magic, タイル幅, タイル高さ, 予約, 間隔 ms, タイル数
+SHEET_OFFSETS = struct.Struct("<II")  # タイルの開始位置と次のタイルの開始位置
+
+
+# ディスク上のスプライトシートをメモリマップで開いたもの
+class SeekPreviewSheet:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.file.close()
+            raise
+        try:
+            magic, self.tile_width, self.tile_height, _, self.interval_ms, self.count = \
+                SHEET_HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            magic = None
+        if magic != SHEET_MAGIC or len(self.map) < SHEET_HEADER.size + (self.count + 1) * 4:
+            self.close()
+            raise ValueError(f"not a seek preview sheet: {path}")
+
+    # 再生位置に最も近いタイルの画像（タイル 1 枚分の JPEG だけをデコードする）
+    def frame_at(self, position_ms):
+        if self.count == 0:
+            return None
+        tile = min(self.count - 1, max(0, int(round(position_ms / self.interval_ms))))
+        start, end = SHEET_OFFSETS.unpack_from(self.map, SHEET_HEADER.size + tile * 4)
+        image = QImage.fromData(self.map[start:end], "JPEG")
+        return None if image.isNull() else image
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# 作成済みのスプライトシートの一覧と、開いているシートの LRU
+# シートはプレビューを出すときに初めて開き、開いておくのは MAX_OPEN_SHEETS 個まで
+# （キューが数千あってもファイル記述子を使い切らない）
+class SeekPreviewSheets:
+    def __init__(self, max_open=MAX_OPEN_SHEETS):
+        self.max_open = max_open
+        self.paths = {}  # ファイルパス -> スプライトシートのパス
+        self.open_sheets = OrderedDict()  # ファイルパス -> SeekPreviewSheet
+
+    def add(self, file_path, sheet_path):
+        self.paths[file_path] = sheet_path
+        # 作り直されたシートは次に使うときに開き直す
+        old = self.open_sheets.pop(file_path, None)
+        if old is not None:
+            old.close()
+
+    def get(self, file_path):
+        sheet = self.open_sheets.get(file_path)
+        if sheet is not None:
+            self.open_sheets.move_to_end(file_path)
+            return sheet
+        sheet_path = self.paths.get(file_path)
+        if sheet_path is None:
+            return None
+        try:
+            sheet = SeekPreviewSheet(sheet_path)
+        except (OSError, ValueError) as e:
+            print(f"Failed to open seek preview {sheet_path}: {e}")
+            self.paths.pop(file_path, None)
+            return None
+        self.open_sheets[file_path] = sheet
+        while len(self.open_sheets) > self.max_open:
+            self.open_sheets.popitem(last=False)[1].close()
+        return sheet
+
+    def close_all(self):
+        for sheet in self.open_sheets.values():
+            sheet.close()
+        self.open_sheets.clear()
+
+
+# クリップごとのスプライトシートをバックグラウンドで 1 度だけ作り、内容ハッシュをキーにディスクへ保存する
+class SeekPreviewGenerator(QObject):
+    # ファイルパスとスプライトシートのパス
+    sheet_ready = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir("seek_previews")
+        self.ffmpeg = shutil.which("ffmpeg")
+        # キューのトリガーを妨げないようにワーカーは 1 つだけにする
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seek-preview")
+        self.in_flight = set()
+
+    def request(self, file_path):
+        if not self.ffmpeg or file_path in self.in_flight:
+            return
+        self.in_flight.add(file_path)
+        self.executor.submit(self._lookup_or_extract, file_path)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _lookup_or_extract(self, file_path):
+        try:
+            digest = content_hash(file_path)
+        except OSError:
+            self.in_flight.discard(file_path)
+            return
+        sheet_path = os.path.join(
+            self.cache_dir, f"{digest}_{PREVIEW_INTERVAL_MS}_{PREVIEW_TILE_WIDTH}x{PREVIEW_TILE_HEIGHT}.jsprite")
+        if os.path.exists(sheet_path) or self._extract(file_path, sheet_path):
+            self.in_flight.discard(file_path)
+            # 別スレッドからの emit は GUI スレッドへキューイングされる
+            self.sheet_ready.emit(file_path, sheet_path)
+        else:
+            self.in_flight.discard(file_path)
+
+    # ffmpeg で一定間隔のフレームを縮小した JPEG として一時ディレクトリに書き出し、1 つのファイルにまとめる
+    def _extract(self, file_path, sheet_path):
+        size = f"{PREVIEW_TILE_WIDTH}:{PREVIEW_TILE_HEIGHT}"
+        video_filter = (f"fps=1000/{PREVIEW_INTERVAL_MS},"
+                        f"scale={size}:force_original_aspect_ratio=decrease,pad={size}:(ow-iw)/2:(oh-ih)/2")
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as tiles_dir:
+            command = [self.ffmpeg, "-v", "error", "-i", file_path, "-an", "-vf", video_filter,
+                       "-c:v", "mjpeg", "-pix_fmt", "yuvj420p", "-q:v", str(PREVIEW_JPEG_QUALITY),
+                       "-threads", "1", os.path.join(tiles_dir, "%06d.jpg")]
+            try:
+                result = subprocess.run(low_priority_command(command), stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE, timeout=EXTRACT_TIMEOUT_S)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                print(f"Seek preview for {file_path} failed: {e}")
+                return False
+            tiles = sorted(os.listdir(tiles_dir))
+            if result.returncode != 0 or not tiles:
+                return False
+            tile_paths = [os.path.join(tiles_dir, name) for name in tiles]
+            return self._write_sheet(sheet_path, tile_paths)
+
+    @staticmethod
+    def _write_sheet(sheet_path, tile_paths):
+        tmp_path = sheet_path + ".tmp"
+        try:
+            offsets = [SHEET_HEADER.size + (len(tile_paths) + 1) * 4]
+            for path in tile_paths:
+                offsets.append(offsets[-1] + os.path.getsize(path))
+            with open(tmp_path, 'wb') as f:
+                f.write(SHEET_HEADER.pack(SHEET_MAGIC, PREVIEW_TILE_WIDTH, PREVIEW_TILE_HEIGHT, 0,
+                                          PREVIEW_INTERVAL_MS, len(tile_paths)))
+                f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+                for path in tile_paths:
+                    with open(path, 'rb') as tile:
+                        shutil.copyfileobj(tile, f)
+        except OSError as e:
+            print(f"Failed to write seek preview {sheet_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        os.replace(tmp_path, sheet_path)
+        return True
+
+
+# マウスを乗せた位置のプレビューフレームを表示するシークバー
+# preview_provider(位置 ms) が QImage を返す間は、ドラッグ中も出力はシークせずプレビューだけを動かし、
+# 離したときに 1 度だけ seek_requested を出す。プレビューがないクリップでは従来どおりドラッグ中にシークする
+class PreviewSeekSlider(QSlider):
+    seek_requested = pyqtSignal(int)
+
+    def __init__(self, orientation=Qt.Orientation.Horizontal, parent=None):
+        super().__init__(orientation, parent)
+        self.preview_provider = None
+        self.time_formatter = lambda ms: f"{ms // 1000}s"
+        self.setMouseTracking(True)
+        self.popup = QLabel(None, Qt.WindowType.ToolTip | Qt.WindowType.FramelessWindowHint)
+        self.popup.setStyleSheet("background-color: black; padding: 1px;")
+        self.sliderMoved.connect(self._on_slider_moved)
+        self.sliderReleased.connect(self._on_slider_released)
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        if not self.isSliderDown():
+            self._show_preview(self._value_at(event.position().x()), event.position().x())
+
+    def leaveEvent(self, event):
+        if not self.isSliderDown():
+            self.popup.hide()
+        super().leaveEvent(event)
+
+    def _on_slider_moved(self, value):
+        if self._show_preview(value, self._x_of(value)):
+            return
+        self.seek_requested.emit(value)
+
+    def _on_slider_released(self):
+        if self.popup.isVisible():
+            self.popup.hide()
+            self.seek_requested.emit(self.value())
+
+    # スライダー上の x 座標に対応する値
+    def _value_at(self, x):
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderHandle, self)
+        span = groove.width() - handle.width()
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(),
+                                              int(x - groove.x() - handle.width() / 2), max(1, span))
+
+    def _x_of(self, value):
+        span = max(1, self.maximum() - self.minimum())
+        return (value - self.minimum()) * self.width() / span
+
+    def _show_preview(self, value, x):
+        image = self.preview_provider(value) if self.preview_provider is not None else None
+        if image is None:
+            self.popup.hide()
+            return False
+        # 下端に位置の時刻を重ねる
+        pixmap = QPixmap.fromImage(image)
+        painter = QPainter(pixmap)
+        painter.fillRect(0, pixmap.height() - 16, pixmap.width(), 16, QColor(0, 0, 0, 160))
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawText(pixmap.rect().adjusted(0, 0, 0, -2),
+                         Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom, self.time_formatter(value))
+        painter.end()
+        self.popup.setPixmap(pixmap)
+        self.popup.adjustSize()
+        anchor = self.mapToGlobal(QPoint(int(x), 0))
+        self.popup.move(anchor.x() - self.popup.width() // 2, anchor.y() - self.popup.height() - 4)
+        self.popup.show()
+        return True
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import threading
+import traceback
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, Qt
+from app_paths import cache_dir
+
+HEARTBEAT_INTERVAL_MS = 20
+DEFAULT_STALL_THRESHOLD_MS = 100
+SAMPLE_INTERVAL_MS = 50  # 停止中にスタックを採取する間隔
+MAX_SAMPLES_PER_STALL = 20
+RECENT_STALLS = 100
+
+
+# GUI スレッドの停止を監視するウォッチドッグ
+# GUI スレッドのタイマーでハートビートを刻み、別スレッドがその遅れを測る。
+# しきい値を超えたら GUI スレッドの Python スタックを採取し、停止時間と一緒にログへ残す
+class MainThreadWatchdog(QObject):
+    def __init__(self, threshold_ms=DEFAULT_STALL_THRESHOLD_MS, log_path=None, parent=None):
+        super().__init__(parent)
+        self.threshold_s = threshold_ms / 1000
+        self.log_path = log_path or os.path.join(cache_dir(), "stalls.log")
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.recent_stalls = deque(maxlen=RECENT_STALLS)  # (開始時刻, 停止時間 ms, スタック)
+        self.running = False
+        self.thread = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setTimerType(Qt.TimerType.PreciseTimer)
+        self.heartbeat.setInterval(HEARTBEAT_INTERVAL_MS)
+        self.heartbeat.timeout.connect(self._beat)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.last_beat = time.monotonic()
+        self.heartbeat.start()
+        self.thread = threading.Thread(target=self._watch, name="main-thread-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.heartbeat.stop()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _beat(self):
+        self.last_beat = time.monotonic()
+
+    # GUI スレッドの現在のスタック
+    def _sample_main_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame))
+
+    def _watch(self):
+        poll_s = HEARTBEAT_INTERVAL_MS / 1000
+        allowance_s = HEARTBEAT_INTERVAL_MS / 1000  # タイマー間隔そのものは停止に数えない
+        while self.running:
+            time.sleep(poll_s)
+            beat = self.last_beat
+            if time.monotonic() - beat - allowance_s < self.threshold_s:
+                continue
+
+            # 停止中: ハートビートが再開するまでスタックを採取し続ける
+            samples = []
+            stall_started = beat + allowance_s
+            while self.running and self.last_beat == beat:
+                if len(samples) < MAX_SAMPLES_PER_STALL:
+                    stack = self._sample_main_stack()
+                    if stack and (not samples or samples[-1][1] != stack):
+                        samples.append((time.monotonic() - stall_started, stack))
+                time.sleep(SAMPLE_INTERVAL_MS / 1000)
+            duration_ms = (self.last_beat - stall_started) * 1000
+            self._report(time.time() - (time.monotonic() - stall_started), duration_ms, samples)
+
+    def _report(self, wall_started, duration_ms, samples):
+        self.recent_stalls.append((wall_started, duration_ms, samples[0][1] if samples else ""))
+        started_text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall_started))
+        lines = [f"[{started_text}] Main thread stalled for {duration_ms:.0f} ms"]
+        for offset_s, stack in samples:
+            lines.append(f"  sample at +{offset_s * 1000:.0f} ms:")
+            lines.extend("    " + line for line in stack.rstrip().splitlines())
+        message = "\n".join(lines)
+        print(message.splitlines()[0])
+        try:
+            with open(self.log_path, 'a') as f:
+                f.write(message + "\n")
+        except OSError:
+            pass
@@ -1,65 +1,142 @@
 
 import threading
+import time
 import io
-import sys
 import textwrap
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 from PyQt6.QtMultimedia import QMediaPlayer
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from StreamDeck.DeviceManager import DeviceManager
 from StreamDeck.Transport.Transport import TransportError
-
-TIME_DISPLAY_KEY = 9
-PAUSE_KEY = 10
+from font_registry import get_font_registry
+from tracing import get_tracer
+from deck_session import DeckSession, ROLE_OPERATOR, ROLE_MIRROR
+from cue_library import SLOTS_PER_BANK, cue_index
+from thumbnails import scaled_thumbnail
+
+TIME_FONT_SIZE = 13
+REFERENCE_KEY_SIZE = 72  # key width the drawing coordinates and font sizes were designed for
+RESCAN_INTERVAL_S = 2.0
+METER_STEPS = 12  # segments per meter bar; levels are quantised so repeated faces hit the render cache
+METER_FLOOR_DB = -60.0
 
 class StreamDeckHandler(QObject):
     key_pressed = pyqtSignal(int)
     pause_key_pressed = pyqtSignal()
-
-    def __init__(self):
+    stop_key_pressed = pyqtSignal()
+    bank_step_requested = pyqtSignal(int)
+
+    # enumerate_decks: callable returning deck objects; defaults to the USB DeviceManager.
+    # A simulated backend (fake_streamdeck) can be plugged in here for offline testing.
+    # deck_roles: serial number -> role (see deck_session). The first deck without an entry
+    # becomes the operator deck and any further ones mirror it.
+    # show_meter: put the audio level meter on the bank status key (see deck_layout).
+    def __init__(self, enumerate_decks=None, deck_roles=None, show_meter=False):
         super().__init__()
+        self.enumerate_decks = enumerate_decks or (lambda: DeviceManager().enumerate())
+        self.deck_roles = dict(deck_roles or {})
+        self.show_meter = show_meter
+        self.meter_request = ('meter', ())
         self.opened_decks = []
-        self.key_states = {i: {'text': "", 'playing': False} for i in range(9)}
-        self.deck = None
+        self.sessions = []
+        # Global cue index -> what its key shows. Only cues the controller has reported are stored;
+        # the keys show the page of the current bank.
+        self.key_states = {}
+        # Cue indexes whose key shows as playing, so playback changes don't scan every cue
+        self.playing_keys = set()
+        self.bank = 0
         self.playback_state = QMediaPlayer.PlaybackState.StoppedState
         self.last_position = 0
         self.last_duration = 0
+        self.fonts = get_font_registry()
+        self.tracer = get_tracer()
+        self._sessions_lock = threading.Lock()
+        self._lost_ids = set()  # decks dropped after a transport error, waiting to come back
+        self._rescan_thread = None
+        self._shutting_down = False
 
         self.streamdeck_thread = threading.Thread(target=self.init_streamdeck)
         self.streamdeck_thread.daemon = True
         self.streamdeck_thread.start()
 
     def cleanup(self):
-        for deck in self.opened_decks:
-            with deck:
-                deck.reset()
-                deck.close()
+        self._shutting_down = True
+        with self._sessions_lock:
+            sessions, self.sessions = self.sessions, []
+            decks, self.opened_decks = self.opened_decks, []
+        for session in sessions:
+            session.stop()
+        for deck in decks:
+            try:
+                with deck:
+                    deck.reset()
+                    deck.close()
+            except TransportError:
+                pass
         print("Stream Decks released.")
 
+    def _state(self, index):
+        state = self.key_states.get(index)
+        if state is None:
+            state = self.key_states[index] = {'text': "", 'playing': False, 'info': "", 'thumb': ""}
+        return state
+
+    def _update_state(self, index, field, value):
+        if index < 0:
+            return
+        self._state(index)[field] = value
+        self._redraw_key(index)
+        self._prebuild_slot_faces(index)
+
     @pyqtSlot(int, str)
     def update_key_with_filename(self, key_index, filename):
-        if 0 <= key_index < 9:
-            self.key_states[key_index]['text'] = filename
-            self._redraw_key(key_index)
+        self._update_state(key_index, 'text', filename)
+
+    # Duration (or "ERR" for media that failed to probe) shown at the bottom of the key
+    @pyqtSlot(int, str)
+    def update_key_info(self, key_index, info_text):
+        self._update_state(key_index, 'info', info_text)
+
+    # Poster frame drawn behind the key's text
+    @pyqtSlot(int, str)
+    def update_key_thumbnail(self, key_index, thumbnail_path):
+        self._update_state(key_index, 'thumb', thumbnail_path)
+
+    # Show another bank: the page's key images come from each deck's cache and are sent as one batch
+    @pyqtSlot(int)
+    def set_bank(self, bank):
+        if bank == self.bank:
+            return
+        self.bank = bank
+        self._redraw_page()
+        self._warm_neighbour_banks()
+
+    # Decks with more cue keys show more cues; the page is the largest window any deck shows
+    def _page_size(self):
+        sessions = self._current_sessions()
+        return max((s.cue_count for s in sessions), default=SLOTS_PER_BANK)
 
     @pyqtSlot(int, bool)
     def update_key_playback_state(self, key_index, is_playing):
-        if 0 <= key_index < 9:
-            self.key_states[key_index]['playing'] = is_playing
+        if key_index >= 0:
+            self._state(key_index)['playing'] = is_playing
+            if is_playing:
+                self.playing_keys.add(key_index)
+            else:
+                self.playing_keys.discard(key_index)
             self._redraw_key(key_index)
 
-            any_video_playing = any(s['playing'] for s in self.key_states.values())
-            if not any_video_playing:
+            if not self.playing_keys:
                 self._clear_time_display()
 
     @pyqtSlot(QMediaPlayer.PlaybackState)
     def update_global_playback_state(self, state):
         self.playback_state = state
-        self._redraw_pause_key()  # Redraw pause key on any state change
         if state == QMediaPlayer.PlaybackState.StoppedState:
             self._clear_time_display()
             self._clear_pause_key()
         else:
+            self._redraw_pause_key()
             # Time display is handled by position updates, but we need to draw it once when pausing.
             self._redraw_time_display(self.last_position, self.last_duration)
 
@@ -69,39 +146,120 @@ class StreamDeckHandler(QObject):
         self.last_duration = duration
         self._redraw_time_display(position, duration)
 
-    def _redraw_key(self, key):
-        if not self.deck:
+    # Per-channel peak levels from the controller's meter, as segment counts
+    @pyqtSlot(object)
+    def update_audio_levels(self, levels):
+        if not self.show_meter:
             return
+        steps = tuple(max(0, min(METER_STEPS, round((peak_db - METER_FLOOR_DB) / -METER_FLOOR_DB * METER_STEPS)))
+                      for peak_db, _ in levels[:2])
+        if steps != self.meter_request[1]:
+            self.meter_request = ('meter', steps)
+            self._post(('meter',), self.meter_request)
+
+    def _current_sessions(self):
+        with self._sessions_lock:
+            return list(self.sessions)
+
+    # Slots only describe the wanted state of a logical target (see deck_layout.TARGETS).
+    # Every deck maps it to its own keys and renders/writes it on its own worker thread.
+    def _post(self, target, request, sessions=None):
+        for session in sessions if sessions is not None else self._current_sessions():
+            session.post(target, request)
+
+    def _slot_request(self, index, playing=None):
+        state = self.key_states.get(index)
+        if state is None:
+            return ('slot', str(index + 1), "", bool(playing), "", "")
+        if playing is None:
+            playing = state['playing']
+        return ('slot', str(index + 1), state['text'], playing, state['info'], state['thumb'])
+
+    # Cue keys are numbered from the first cue of the current bank
+    def _offset_of(self, index):
+        return index - cue_index(self.bank, 0)
+
+    def _redraw_key(self, index, sessions=None):
+        offset = self._offset_of(index)
+        if 0 <= offset < self._page_size():
+            self._post(('slot', offset), self._slot_request(index), sessions)
+
+    # Keys whose image only changes with the bank
+    def _control_items(self):
+        return [(('bank',), ('bank', str(self.bank + 1))),
+                (('stop',), ('stop',)),
+                (('bank_prev',), ('bank_prev',)),
+                (('bank_next',), ('bank_next',))]
+
+    def _redraw_page(self, sessions=None):
+        first = cue_index(self.bank, 0)
+        items = [(('slot', offset), self._slot_request(first + offset)) for offset in range(self._page_size())]
+        items += self._control_items()
+        for session in sessions if sessions is not None else self._current_sessions():
+            session.post_many(items)
+
+    # Render the loaded cues one bank either side of each deck's window into its cache,
+    # so paging on stays a lookup
+    def _warm_neighbour_banks(self):
+        first = cue_index(self.bank, 0)
+        for session in self._current_sessions():
+            window = range(first, first + session.cue_count)
+            for index in range(max(0, first - SLOTS_PER_BANK), first + session.cue_count + SLOTS_PER_BANK):
+                if index not in window and self.key_states.get(index, {}).get('text'):
+                    session.worker.warm(self._slot_request(index))
+
+    def _redraw_time_display(self, position, duration, sessions=None):
+        self._post(('time',), ('time', self.format_time(position), self.format_time(duration - position)), sessions)
+
+    def _clear_time_display(self, sessions=None):
+        self._post(('time',), ('blank',), sessions)
+        self.meter_request = ('meter', ())
+        self._post(('meter',), self.meter_request, sessions)
+
+    def _redraw_pause_key(self, sessions=None):
+        self._post(('pause',), ('pause', self.playback_state), sessions)
+
+    def _clear_pause_key(self, sessions=None):
+        self._post(('pause',), ('blank',), sessions)
+
+    # Queue the other face of a newly loaded slot so the first cue press is a lookup
+    def _prebuild_slot_faces(self, index):
+        offset = self._offset_of(index)
+        request = self._slot_request(index, not self.key_states[index]['playing'])
+        for session in self._current_sessions():
+            if -SLOTS_PER_BANK <= offset < session.cue_count + SLOTS_PER_BANK:
+                session.worker.warm(request)
+
+    # Turn a key request into the deck's native image bytes through that deck's render cache
+    def _render_request(self, deck, request):
+        for session in self._current_sessions():
+            if session.deck is deck:
+                return session.render(deck, request)
+        return self._render_uncached(deck, request)
+
+    def _render_uncached(self, deck, request):
+        kind = request[0]
+        if kind == 'slot':
+            _, number, text, playing, info, thumb = request
+            image = self.render_key_image(deck, number, text, "red" if playing else "black", info, thumb)
+        elif kind == 'time':
+            _, pos_text, rem_text = request
+            image = self.render_time_text_image(deck, pos_text, rem_text)
+        elif kind == 'pause':
+            image = self.render_pause_key_image(deck, request[1])
+        elif kind in ('stop', 'bank_prev', 'bank_next'):
+            image = self.render_transport_key_image(deck, kind)
+        elif kind == 'bank':
+            image = self.render_bank_key_image(deck, request[1])
+        elif kind == 'meter':
+            image = self.render_meter_key_image(deck, request[1])
+        else:
+            image = Image.new("RGB", deck.key_image_format()['size'], "black")
+        return self._encode_image(deck, image)
 
-        state = self.key_states.get(key)
-        if not state:
-            return
-
-        bg_color = "red" if state['playing'] else "black"
-        number = str(key + 1)
-
-        image = self.render_key_image(self.deck, number, state['text'], bg_color)
-        self._send_image_to_key(key, image)
-
-    def _redraw_time_display(self, position, duration):
-        if not self.deck or self.deck.key_count() <= TIME_DISPLAY_KEY:
-            return
-        image = self.render_time_display_image(self.deck, position, duration)
-        self._send_image_to_key(TIME_DISPLAY_KEY, image)
-
-    def _clear_time_display(self):
-        if not self.deck or self.deck.key_count() <= TIME_DISPLAY_KEY:
-            return
-        image = Image.new("RGB", self.deck.key_image_format()['size'], "black")
-        self._send_image_to_key(TIME_DISPLAY_KEY, image)
-
-    def _redraw_pause_key(self):
-        if not self.deck or self.deck.key_count() <= PAUSE_KEY:
-            return
-        image = self.render_pause_key_image(self.deck)
-        self._send_image_to_key(PAUSE_KEY, image)
-
-    def render_pause_key_image(self, deck):
+    def render_pause_key_image(self, deck, playback_state=None):
+        if playback_state is None:
+            playback_state = self.playback_state
         image = Image.new("RGB", deck.key_image_format()['size'], "black")
         draw = ImageDraw.Draw(image)
         
@@ -110,7 +268,7 @@ class StreamDeckHandler(QObject):
         
         icon_color = "white"
 
-        if self.playback_state == QMediaPlayer.PlaybackState.PlayingState:
+        if playback_state == QMediaPlayer.PlaybackState.PlayingState:
             # Draw Pause icon (two vertical bars)
             bar_width = width / 6
             bar_height = height / 2
@@ -126,7 +284,7 @@ class StreamDeckHandler(QObject):
             x1_right = center_x + gap + bar_width
             draw.rectangle([x0_right, y0, x1_right, y1], fill=icon_color)
 
-        elif self.playback_state == QMediaPlayer.PlaybackState.PausedState:
+        elif playback_state == QMediaPlayer.PlaybackState.PausedState:
             # Draw Play icon (a triangle)
             triangle_height = height / 2
             triangle_width = triangle_height * 0.866  # Equilateral-ish
@@ -144,76 +302,159 @@ class StreamDeckHandler(QObject):
 
         return image
 
-    def _clear_pause_key(self):
-        if not self.deck or self.deck.key_count() <= PAUSE_KEY:
-            return
-        image = Image.new("RGB", self.deck.key_image_format()['size'], "black")
-        self._send_image_to_key(PAUSE_KEY, image)
+    def render_transport_key_image(self, deck, kind):
+        width, height = deck.key_image_format()['size']
+        image = Image.new("RGB", (width, height), "black")
+        draw = ImageDraw.Draw(image)
+        center_x, center_y = width / 2, height / 2
+        half = min(width, height) / 4
 
-    def _send_image_to_key(self, key, image):
-        if not self.deck:
-            return
-        try:
-            key_format = self.deck.key_image_format()
-            image_format = key_format['format']
-            flip_x, flip_y = key_format['flip']
-            rotation = key_format['rotation']
-
-            if flip_x:
-                image = image.transpose(Image.FLIP_LEFT_RIGHT)
-            if flip_y:
-                image = image.transpose(Image.FLIP_TOP_BOTTOM)
-            if rotation != 0:
-                image = image.rotate(rotation)
-
-            with io.BytesIO() as buff:
-                image.save(buff, format=image_format.lower())
-                self.deck.set_key_image(key, buff.getvalue())
-        except TransportError as e:
-            print(f"Lost connection to Stream Deck: {e}")
-            print("Please restart the application to reconnect.")
-            self.deck = None
-
-    def render_key_image(self, deck, number_text, filename_text, bg_color="black"):
-        # (Same as before, but without time display)
-        if sys.platform == "win32":
-            jp_font_path = "C:/Windows/Fonts/meiryo.ttc"
-            en_font_path = "C:/Windows/Fonts/arial.ttf"
-        elif sys.platform == "darwin":
-            jp_font_path = "/System/Library/Fonts/Supplemental/ヒラギノ角ゴシック W3.ttc"
-            en_font_path = "/System/Library/Fonts/Supplemental/Arial.ttf"
-        else:  # Linux
-            jp_font_path = "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"
-            en_font_path = "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
-
-        image = Image.new("RGB", deck.key_image_format()['size'], bg_color)
+        if kind == 'stop':
+            draw.rectangle([center_x - half, center_y - half, center_x + half, center_y + half], fill="white")
+        else:
+            # Bank arrows: a triangle pointing left or right with a bar at its tip
+            direction = -1 if kind == 'bank_prev' else 1
+            tip_x = center_x + direction * half
+            base_x = center_x - direction * half
+            draw.polygon([(base_x, center_y - half), (base_x, center_y + half), (tip_x, center_y)], fill="white")
+            bar_x = tip_x + direction * half / 4
+            draw.rectangle([min(tip_x, bar_x), center_y - half, max(tip_x, bar_x), center_y + half], fill="white")
+        return image
+
+    def render_bank_key_image(self, deck, bank_text):
+        width, height = deck.key_image_format()['size']
+        scale = self._key_scale(deck)
+        image = Image.new("RGB", (width, height), "black")
         draw = ImageDraw.Draw(image)
+        draw.text((width / 2, height * 0.1), text="BANK", font=self.fonts.font(round(12 * scale)),
+                  anchor="ma", fill="white")
+        draw.text((width / 2, height * 0.9), text=bank_text, font=self.fonts.font(round(28 * scale)),
+                  anchor="md", fill="white")
+        return image
+
+    # One vertical segmented bar per channel (up to two), green / yellow / red from the bottom
+    def render_meter_key_image(self, deck, steps):
+        width, height = deck.key_image_format()['size']
+        image = Image.new("RGB", (width, height), "black")
+        draw = ImageDraw.Draw(image)
+        margin = width * 0.15
+        gap = width * 0.1
+        bars = max(1, len(steps))
+        bar_width = (width - 2 * margin - gap * (bars - 1)) / bars
+        segment = (height - 2 * margin) / METER_STEPS
+        for bar, lit in enumerate(steps):
+            left = margin + bar * (bar_width + gap)
+            for step in range(METER_STEPS):
+                bottom = height - margin - step * segment
+                if step >= lit:
+                    color = (40, 40, 40)
+                elif step >= METER_STEPS - 1:
+                    color = "red"
+                elif step >= METER_STEPS * 3 // 4:
+                    color = "yellow"
+                else:
+                    color = "lime"
+                draw.rectangle([left, bottom - segment + 1, left + bar_width, bottom], fill=color)
+        return image
 
+    # Drawing is laid out for a 72 px key and scaled to the deck's native key size
+    def _key_scale(self, deck):
+        return deck.key_image_format()['size'][0] / REFERENCE_KEY_SIZE
+
+    def _time_font_size(self, deck):
+        return max(TIME_FONT_SIZE, round(TIME_FONT_SIZE * self._key_scale(deck)))
+
+    def _encode_image(self, deck, image):
+        key_format = deck.key_image_format()
+        image_format = key_format['format']
+        flip_x, flip_y = key_format['flip']
+        rotation = key_format['rotation']
+
+        if flip_x:
+            image = image.transpose(Image.FLIP_LEFT_RIGHT)
+        if flip_y:
+            image = image.transpose(Image.FLIP_TOP_BOTTOM)
+        if rotation != 0:
+            image = image.rotate(rotation)
+
+        with io.BytesIO() as buff:
+            image.save(buff, format=image_format.lower())
+            return buff.getvalue()
+
+    # Called from a worker thread when the USB transport fails: drop that deck only and
+    # keep looking for it in the background so it comes back without a restart
+    def _on_transport_error(self, deck, error):
+        print(f"Lost connection to Stream Deck '{deck.id()}': {error}")
+        with self._sessions_lock:
+            self.sessions = [s for s in self.sessions if s.deck is not deck]
+            if deck in self.opened_decks:
+                self.opened_decks.remove(deck)
+            if self._shutting_down:
+                return
+            self._lost_ids.add(deck.id())
         try:
-            num_font = ImageFont.truetype(jp_font_path, 24, index=0)
-            file_font = ImageFont.truetype(jp_font_path, 14, index=0)
-            large_font = ImageFont.truetype(jp_font_path, 48, index=0)
-        except IOError:
+            deck.close()
+        except Exception:
+            pass
+        self._start_rescan()
+
+    def _start_rescan(self):
+        with self._sessions_lock:
+            if self._rescan_thread is not None and self._rescan_thread.is_alive():
+                return
+            self._rescan_thread = threading.Thread(target=self._rescan_loop, daemon=True)
+            self._rescan_thread.start()
+
+    def _rescan_loop(self):
+        while not self._shutting_down:
+            time.sleep(RESCAN_INTERVAL_S)
+            with self._sessions_lock:
+                if not self._lost_ids:
+                    return
+                open_ids = {s.id for s in self.sessions}
             try:
-                num_font = ImageFont.truetype(en_font_path, 24)
-                file_font = ImageFont.truetype(en_font_path, 14)
-                large_font = ImageFont.truetype(en_font_path, 48)
-            except IOError:
-                num_font = ImageFont.load_default()
-                file_font = ImageFont.load_default()
-                large_font = ImageFont.load_default()
-
-        if not filename_text:
-            draw.text((image.width / 2, 5), text=number_text, font=num_font, anchor="ma", fill="white")
-        else:
-            draw.text((image.width / 2, 5), text=number_text, font=num_font, anchor="ma", fill="white")
+                decks = self.enumerate_decks()
+            except Exception as e:
+                print(f"Stream Deck re-enumeration failed: {e}")
+                continue
+            for deck in decks:
+                if deck.id() in open_ids or self._shutting_down:
+                    continue
+                if self.configure_deck(deck):
+                    with self._sessions_lock:
+                        self._lost_ids.discard(deck.id())
+                    print(f"Reconnected Stream Deck '{deck.id()}'.")
+
+    def render_key_image(self, deck, number_text, filename_text, bg_color="black", info_text="", thumbnail_path=""):
+        # Fonts come from the process-wide registry, so no font file is opened here
+        scale = self._key_scale(deck)
+        num_font = self.fonts.font(round(24 * scale))
+        file_font = self.fonts.font(round(14 * scale))
+
+        size = deck.key_image_format()['size']
+        image = Image.new("RGB", size, bg_color)
+        if thumbnail_path:
+            # The poster frame is downscaled to this deck's key size once and cached on disk
+            scaled_path = scaled_thumbnail(thumbnail_path, size[0], size[1])
+            if scaled_path:
+                with Image.open(scaled_path) as thumbnail:
+                    poster = Image.blend(thumbnail.convert("RGB"), Image.new("RGB", size, "black"), 0.5)
+                border = round(6 * scale) if bg_color != "black" else 0
+                image.paste(poster.crop((border, border, size[0] - border, size[1] - border)), (border, border))
+        draw = ImageDraw.Draw(image)
+
+        draw.text((image.width / 2, 5 * scale), text=number_text, font=num_font, anchor="ma", fill="white")
+        if filename_text:
             wrapper = textwrap.TextWrapper(width=12)
             lines = wrapper.wrap(text=filename_text)
-            y = 30
+            y = 30 * scale
             for line in lines:
-                draw.text((5, y), text=line, font=file_font, fill="white")
+                draw.text((5 * scale, y), text=line, font=file_font, fill="white")
                 bbox = file_font.getbbox(line)
                 y += bbox[3] + 2
+        if info_text:
+            info_color = "yellow" if info_text == "ERR" else "white"
+            draw.text((image.width / 2, image.height - 3 * scale), text=info_text, font=file_font, anchor="md", fill=info_color)
         return image
 
     # ミリ秒を hh:mm:ss 形式の文字列にフォーマットするメソッド
@@ -224,67 +465,107 @@ class StreamDeckHandler(QObject):
         return f"{hours:02}:{minutes:02}:{seconds:02}"
     
     def render_time_display_image(self, deck, position, duration):
-        if sys.platform == "win32":
-            jp_font_path = "C:/Windows/Fonts/meiryo.ttc"
-            en_font_path = "C:/Windows/Fonts/arial.ttf"
-        elif sys.platform == "darwin":
-            jp_font_path = "/System/Library/Fonts/Supplemental/ヒラギノ角ゴシック W3.ttc"
-            en_font_path = "/System/Library/Fonts/Supplemental/Arial.ttf"
-        else:  # Linux
-            jp_font_path = "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"
-            en_font_path = "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"
-            
-        image = Image.new("RGB", deck.key_image_format()['size'], "black")
-        draw = ImageDraw.Draw(image)
-        try:
-            time_font = ImageFont.truetype(jp_font_path, 13, index=0)
-        except IOError:
-            try:
-                time_font = ImageFont.truetype(en_font_path, 13)
-            except IOError:
-                time_font = ImageFont.load_default()
+        return self.render_time_text_image(deck, self.format_time(position), self.format_time(duration - position))
 
-        pos_text = self.format_time(position)
-        rem_text = self.format_time(duration - position)
-        
-        draw.text((deck.key_image_format()['size'][0] / 2, 35), text=pos_text, font=time_font, anchor="ms", fill="white")
-        draw.text((deck.key_image_format()['size'][0] / 2, 65), text=f"-{rem_text}", font=time_font, anchor="ms", fill="white")
+    def render_time_text_image(self, deck, pos_text, rem_text):
+        width, height = deck.key_image_format()['size']
+        image = Image.new("RGB", (width, height), "black")
+
+        # Blit cached digit glyphs instead of rasterizing the text every tick
+        size = self._time_font_size(deck)
+        self.fonts.draw_text_centered(image, width / 2, height * 35 / REFERENCE_KEY_SIZE, pos_text, size)
+        self.fonts.draw_text_centered(image, width / 2, height * 65 / REFERENCE_KEY_SIZE, f"-{rem_text}", size)
         return image
 
     def init_streamdeck(self):
-        streamdecks = DeviceManager().enumerate()
+        # Load fonts and time glyphs before the first key is drawn
+        self.fonts.warm_glyphs(TIME_FONT_SIZE)
+        streamdecks = self.enumerate_decks()
         if not streamdecks:
             print("No Stream Deck found.")
             return
 
-        self.deck = streamdecks[0]
-        self.configure_deck(self.deck)
+        for deck in streamdecks:
+            self.configure_deck(deck)
+
+    def _role_for(self, serial):
+        role = self.deck_roles.get(serial)
+        if role:
+            return role
+        with self._sessions_lock:
+            has_operator = any(s.role == ROLE_OPERATOR for s in self.sessions)
+        return ROLE_MIRROR if has_operator else ROLE_OPERATOR
 
     def configure_deck(self, deck):
         try:
             deck.open()
-            self.opened_decks.append(deck)
         except TransportError:
             print(f"Could not open Stream Deck '{deck.id()}'. It might be in use by another application or permissions are missing.")
-            self.deck = None
-            return
+            return False
 
-        with deck:
-            deck.reset()
-            deck.set_brightness(50)
+        try:
+            with deck:
+                deck.reset()
+                deck.set_brightness(50)
+            session = DeckSession(deck, self._role_for(deck.get_serial_number()),
+                                  self._render_uncached, self._on_transport_error, self.show_meter)
+        except TransportError as e:
+            print(f"Could not initialise Stream Deck '{deck.id()}': {e}")
+            return False
 
-        for key in range(9):
-            self._redraw_key(key)
-        
-        self._clear_time_display()
-        self._clear_pause_key()
+        self.fonts.warm_glyphs(self._time_font_size(deck))
+        self._prebuild_static_images(session)
+
+        # From here on the session's worker thread owns all image transfers to this deck
+        session.start()
+        with self._sessions_lock:
+            self.opened_decks.append(deck)
+            self.sessions.append(session)
+
+        print(f"Stream Deck '{deck.id()}' ({deck.deck_type()}): {session.role}, "
+              f"{session.cue_count} cue keys")
+        only_this = [session]
+        self._redraw_page(only_this)
+        if self.playback_state == QMediaPlayer.PlaybackState.StoppedState:
+            self._clear_time_display(only_this)
+            self._clear_pause_key(only_this)
+        else:
+            self._redraw_time_display(self.last_position, self.last_duration, only_this)
+            self._redraw_pause_key(only_this)
 
         deck.set_key_callback(self.key_change_callback)
+        return True
+
+    # Encode the images that do not depend on playback position up front,
+    # so steady-state redraws are dictionary lookups
+    def _prebuild_static_images(self, session):
+        requests = [('blank',),
+                    ('pause', QMediaPlayer.PlaybackState.PlayingState),
+                    ('pause', QMediaPlayer.PlaybackState.PausedState)]
+        requests += [request for _, request in self._control_items()]
+        first = cue_index(self.bank, 0)
+        for offset in range(session.cue_count):
+            requests.append(self._slot_request(first + offset, False))
+            requests.append(self._slot_request(first + offset, True))
+        for request in requests:
+            session.render(session.deck, request)
 
     def key_change_callback(self, deck, key, state):
-        if state:
-            if 0 <= key <= 8:
-                self.key_pressed.emit(key)
-            elif key == PAUSE_KEY:
-                self.pause_key_pressed.emit()
+        if not state:
+            return
+        session = next((s for s in self._current_sessions() if s.deck is deck), None)
+        if session is None or not session.accepts_input:
+            return
+        target = session.target_for(key)
+        if target is None:
+            return
+        if target[0] == 'slot':
+            self.tracer.begin('streamdeck', 'deck_key_callback')
+            self.key_pressed.emit(cue_index(self.bank, target[1]))
+        elif target[0] == 'pause':
+            self.pause_key_pressed.emit()
+        elif target[0] == 'stop':
+            self.stop_key_pressed.emit()
+        elif target[0] in ('bank_prev', 'bank_next'):
+            self.bank_step_requested.emit(-1 if target[0] == 'bank_prev' else 1)
 
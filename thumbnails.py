@@ -0,0 +1,185 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, QUrl, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage
+from PyQt6.QtMultimedia import QMediaPlayer, QVideoSink
+from app_paths import cache_dir, content_hash, low_priority_command
+
+BASE_THUMBNAIL_WIDTH = 320
+BUTTON_ICON_SIZE = QSize(64, 36)
+THUMBNAIL_POSITION_RATIO = 0.1  # 全体の 10% の位置のフレームを代表フレームにする
+EXTRACT_TIMEOUT_S = 30
+
+
+# キャッシュ内の縮小済みサムネイルのパス（なければ基本サムネイルから一度だけ作成する）
+# QImage を使うのでどのスレッドからでも呼べる
+def scaled_thumbnail(base_path, width, height):
+    root, _ = os.path.splitext(base_path)
+    scaled_path = f"{root}_{width}x{height}.png"
+    if not os.path.exists(scaled_path):
+        image = QImage(base_path)
+        if image.isNull():
+            return None
+        scaled = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                              Qt.TransformationMode.SmoothTransformation)
+        # 中央を切り出してキーやアイコンの形に合わせる
+        x = (scaled.width() - width) // 2
+        y = (scaled.height() - height) // 2
+        scaled.copy(x, y, width, height).save(scaled_path + ".tmp", "PNG")
+        os.replace(scaled_path + ".tmp", scaled_path)
+    return scaled_path
+
+
+# 各クリップの代表フレームをバックグラウンドで取り出し、内容ハッシュをキーにディスクへ保存する
+class ThumbnailExtractor(QObject):
+    # ファイルパスと基本サムネイルのパス
+    thumbnail_ready = pyqtSignal(str, str)
+    # ワーカースレッドから GUI スレッドへ QVideoSink での抽出を依頼する
+    _queue_sink_extraction = pyqtSignal(str, int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir("thumbnails")
+        self.ffmpeg = shutil.which("ffmpeg")
+        # キューのトリガーを妨げないようにワーカーは 1 つだけにする
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self.in_flight = set()
+        # ffmpeg がない環境では QVideoSink でヘッドレスにデコードする
+        self.sink_queue = []
+        self.sink_player = None
+        self.sink = None
+        self.sink_current = None
+        self.sink_seeked = False
+        # フレームもエラーも届かないファイルで後続の抽出を止めない
+        self.sink_timer = QTimer(self)
+        self.sink_timer.setSingleShot(True)
+        self.sink_timer.setInterval(EXTRACT_TIMEOUT_S * 1000)
+        self.sink_timer.timeout.connect(self._on_sink_timeout)
+        self._queue_sink_extraction.connect(self._start_sink_extraction)
+
+    # duration_ms が分かっていれば代表フレームの位置に使う
+    def request(self, file_path, duration_ms=0):
+        if file_path in self.in_flight:
+            return
+        self.in_flight.add(file_path)
+        self.executor.submit(self._lookup_or_extract, file_path, duration_ms)
+
+    def shutdown(self):
+        self.sink_timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _lookup_or_extract(self, file_path, duration_ms):
+        try:
+            digest = content_hash(file_path)
+        except OSError:
+            self.in_flight.discard(file_path)
+            return
+        base_path = os.path.join(self.cache_dir, f"{digest}.png")
+        if os.path.exists(base_path):
+            self._finish(file_path, base_path)
+            return
+        position_ms = int(duration_ms * THUMBNAIL_POSITION_RATIO) if duration_ms else 1000
+        if self.ffmpeg:
+            self._extract_with_ffmpeg(file_path, position_ms, base_path)
+        else:
+            # QMediaPlayer は GUI スレッドで扱う必要があるのでシグナル経由で依頼する
+            self._queue_sink_extraction.emit(file_path, position_ms, base_path)
+
+    def _extract_with_ffmpeg(self, file_path, position_ms, base_path):
+        command = [self.ffmpeg, "-v", "error", "-ss", f"{position_ms / 1000:.3f}", "-i", file_path,
+                   "-frames:v", "1", "-vf", f"scale={BASE_THUMBNAIL_WIDTH}:-2", "-y", base_path + ".tmp.png"]
+        try:
+            subprocess.run(low_priority_command(command), capture_output=True, timeout=EXTRACT_TIMEOUT_S)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if os.path.exists(base_path + ".tmp.png"):
+            os.replace(base_path + ".tmp.png", base_path)
+            self._finish(file_path, base_path)
+        elif position_ms > 0:
+            # 短いクリップなどでシーク位置にフレームがなければ先頭を使う
+            self._extract_with_ffmpeg(file_path, 0, base_path)
+        else:
+            self.in_flight.discard(file_path)
+
+    def _finish(self, file_path, base_path):
+        scaled_thumbnail(base_path, BUTTON_ICON_SIZE.width(), BUTTON_ICON_SIZE.height())
+        self.in_flight.discard(file_path)
+        self.thumbnail_ready.emit(file_path, base_path)
+
+    def _start_sink_extraction(self, file_path, position_ms, base_path):
+        self.sink_queue.append((file_path, position_ms, base_path))
+        if self.sink_current is None:
+            self._next_sink_extraction()
+
+    def _next_sink_extraction(self):
+        if not self.sink_queue:
+            self.sink_current = None
+            return
+        if self.sink_player is None:
+            self.sink_player = QMediaPlayer(self)
+            self.sink = QVideoSink(self)
+            self.sink_player.setVideoOutput(self.sink)
+            self.sink.videoFrameChanged.connect(self._on_sink_frame)
+            self.sink_player.mediaStatusChanged.connect(self._on_sink_status)
+            self.sink_player.errorOccurred.connect(self._on_sink_error)
+        self.sink_current = self.sink_queue.pop(0)
+        self.sink_seeked = False
+        self.sink_player.setSource(QUrl.fromLocalFile(self.sink_current[0]))
+        self.sink_timer.start()
+
+    # 読み込み前のシークを捨てるバックエンドがあるので、読み込みが終わってから代表フレームへ移動する
+    def _on_sink_status(self, status):
+        if self.sink_current is None or self.sink_seeked:
+            return
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            if not self.sink_player.hasVideo():
+                # 音声だけのファイルにはサムネイルがない
+                self._fail_sink_extraction()
+                return
+            self.sink_seeked = True
+            self.sink_player.setPosition(self.sink_current[1])
+            self.sink_player.pause()
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self._fail_sink_extraction()
+
+    # フレームの参照だけ受け取り、変換・縮小・保存はワーカーで行う（GUI スレッドで全解像度の画像を扱わない）
+    def _on_sink_frame(self, frame):
+        if self.sink_current is None or not self.sink_seeked or not frame.isValid():
+            return
+        file_path, _, base_path = self.sink_current
+        self._end_sink_extraction()
+        self.executor.submit(self._save_sink_frame, frame, file_path, base_path)
+
+    def _save_sink_frame(self, frame, file_path, base_path):
+        image = frame.toImage()
+        if image.isNull():
+            self.in_flight.discard(file_path)
+            return
+        image = image.scaledToWidth(BASE_THUMBNAIL_WIDTH, Qt.TransformationMode.SmoothTransformation)
+        if not image.save(base_path + ".tmp.png", "PNG"):
+            self.in_flight.discard(file_path)
+            return
+        os.replace(base_path + ".tmp.png", base_path)
+        self._finish(file_path, base_path)
+
+    def _on_sink_error(self, error, error_string=""):
+        if self.sink_current is not None:
+            self._fail_sink_extraction()
+
+    def _on_sink_timeout(self):
+        if self.sink_current is not None:
+            print(f"Thumbnail extraction for {self.sink_current[0]} timed out")
+            self._fail_sink_extraction()
+
+    def _fail_sink_extraction(self):
+        self.in_flight.discard(self.sink_current[0])
+        self._end_sink_extraction()
+
+    def _end_sink_extraction(self):
+        self.sink_timer.stop()
+        self.sink_current = None
+        self.sink_player.stop()
+        self.sink_player.setSource(QUrl())
+        self._next_sink_extraction()
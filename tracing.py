@@ -0,0 +1,131 @@
+import json
+import time
+import threading
+import statistics
+from collections import deque
+
+HISTOGRAM_SIZE = 512  # ステージごとに保持するサンプル数
+EVENT_BUFFER_SIZE = 8192  # Chrome トレース用に保持するイベント数
+TRACE_STALE_NS = 10 * 1_000_000_000  # 10 秒以上終わらないトレースは破棄する
+
+
+# ボタン押下から最初のフレームまでの各ステージにモノトニック時刻を記録するトレーサー
+# ステージ間の所要時間をリングバッファに貯め、統計と JSON / Chrome トレース形式で出力する
+class LatencyTracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.next_id = 1
+        self.current = None  # 進行中のトレース {'id', 'source', 'stages': [(stage, ns, tid)]}
+        self.histograms = {}  # ステージ名 -> deque（前のステージからの ms）
+        self.totals = deque(maxlen=HISTOGRAM_SIZE)  # 入力から最初のフレームまでの ms
+        self.events = deque(maxlen=EVENT_BUFFER_SIZE)  # (trace_id, source, stage, ns, tid)
+
+    # 新しいトレースを開始する（入力の発生源ごとに呼ぶ）
+    def begin(self, source, stage=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._abandon_current()
+            self.current = {'id': self.next_id, 'source': source, 'stages': []}
+            self.next_id += 1
+            self._mark_locked(stage or f"input_{source}")
+
+    # 進行中のトレースにステージを記録する。トレースがなければ source で開始する
+    def mark(self, stage, source=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            now = time.monotonic_ns()
+            if self.current is not None and now - self.current['stages'][0][1] > TRACE_STALE_NS:
+                self._abandon_current()
+            if self.current is None:
+                if source is None:
+                    return
+                self.current = {'id': self.next_id, 'source': source, 'stages': []}
+                self.next_id += 1
+            self._mark_locked(stage, now)
+
+    # トレースを完了させてヒストグラムに反映する
+    def end(self, stage):
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.current is None:
+                return
+            self._mark_locked(stage)
+            stages = self.current['stages']
+            for (_, prev_ns, _), (name, ns, _) in zip(stages, stages[1:]):
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = deque(maxlen=HISTOGRAM_SIZE)
+                histogram.append((ns - prev_ns) / 1e6)
+            self.totals.append((stages[-1][1] - stages[0][1]) / 1e6)
+            self.current = None
+
+    def reset(self):
+        with self.lock:
+            self.current = None
+            self.histograms.clear()
+            self.totals.clear()
+            self.events.clear()
+
+    def _mark_locked(self, stage, now=None):
+        now = now or time.monotonic_ns()
+        tid = threading.get_ident()
+        self.current['stages'].append((stage, now, tid))
+        self.events.append((self.current['id'], self.current['source'], stage, now, tid))
+
+    def _abandon_current(self):
+        self.current = None
+
+    # ステージごとの統計（件数・平均・中央値・p95・最大）
+    def stats(self):
+        with self.lock:
+            histograms = {name: list(samples) for name, samples in self.histograms.items()}
+            histograms['total'] = list(self.totals)
+        result = {}
+        for name, samples in histograms.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            result[name] = {
+                'count': len(ordered),
+                'mean_ms': statistics.fmean(ordered),
+                'p50_ms': statistics.median(ordered),
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max_ms': ordered[-1],
+            }
+        return result
+
+    def export_json(self, path):
+        with self.lock:
+            events = [{'trace': t, 'source': src, 'stage': stage, 'monotonic_ns': ns, 'thread': tid}
+                      for t, src, stage, ns, tid in self.events]
+        with open(path, 'w') as f:
+            json.dump({'stats': self.stats(), 'events': events}, f, indent=2)
+
+    # chrome://tracing や Perfetto で開ける形式で出力する
+    def export_chrome_trace(self, path):
+        with self.lock:
+            events = list(self.events)
+        trace_events = []
+        previous = {}
+        for trace_id, source, stage, ns, tid in events:
+            prev = previous.get(trace_id)
+            if prev is not None:
+                trace_events.append({'name': stage, 'cat': source, 'ph': 'X', 'pid': 1, 'tid': tid,
+                                     'ts': prev / 1000, 'dur': (ns - prev) / 1000, 'args': {'trace': trace_id}})
+            else:
+                trace_events.append({'name': stage, 'cat': source, 'ph': 'i', 's': 't', 'pid': 1, 'tid': tid,
+                                     'ts': ns / 1000, 'args': {'trace': trace_id}})
+            previous[trace_id] = ns
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+
+_tracer = LatencyTracer()
+
+
+def get_tracer():
+    return _tracer
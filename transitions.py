@@ -0,0 +1,6 @@
+# Transition kinds and the default used by new cues. Kept free of Qt so the cue model
+# (cue_library) can import it without pulling in Qt multimedia.
+TRANSITION_CUT = "cut"
+TRANSITION_CROSSFADE = "crossfade"
+TRANSITION_DIP_TO_BLACK = "dip"
+DEFAULT_TRANSITION = {'type': TRANSITION_CUT, 'duration': 0}
@@ -0,0 +1,97 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from tracing import get_tracer
+
+DEFAULT_DEBOUNCE_MS = 150  # 最後に出したキューからこの時間内の入力はまとめる
+
+
+# キューの入力（ボタン・数字キー・Stream Deck・リモート）をまとめて出力へ渡す調停役
+# 出力が静かなときの入力はすぐに accepted を出す（単発の操作に遅れを足さない）。
+# 直前に出したキューから debounce_ms 以内の入力は保留して、最後のものだけを期間の終わりに出す。
+# 同じ出力に向けた新しい入力は保留中の入力を置き換え、期間の終わりの時点で出力中のキューと
+# 同じなら何も出さないので、連打やチャタリングでもボタンの色や再生状態の通知がばたつかない。
+# 出力は番号の集合で表し、重なる出力を持つ入力どうしだけが互いを置き換える
+class TriggerArbiter(QObject):
+    accepted = pyqtSignal(int)  # キュー番号
+    superseded = pyqtSignal(int)  # 新しい入力に置き換えられて出なかったキュー番号
+
+    def __init__(self, debounce_ms=DEFAULT_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.debounce_ms = debounce_ms
+        self.tracer = get_tracer()
+        self.quiet_at_ns = {}  # 出力番号 -> 次の入力をすぐに出してよい時刻
+        self.last_index = {}  # 出力番号 -> 最後に出したキュー番号
+        self.held = []  # 保留中の入力 {'index', 'outputs', 'timer'}
+        self.counts = {'submitted': 0, 'accepted': 0, 'superseded': 0, 'bounced': 0}
+
+    # 入力を受け付ける。immediate なら保留せずにすぐ出す（スケジューラーなど時刻が決まっている入力用）
+    def submit(self, index, outputs=(0,), immediate=False):
+        outputs = frozenset(outputs)
+        now_ns = time.monotonic_ns()
+        self.counts['submitted'] += 1
+        self._drop_held(outputs)
+        if immediate or self.debounce_ms <= 0:
+            self._accept(index, outputs, now_ns)
+            return
+        quiet_at_ns = max((self.quiet_at_ns.get(o, 0) for o in outputs), default=0)
+        if now_ns >= quiet_at_ns:
+            self._accept(index, outputs, now_ns)
+            return
+        if self._already_showing(index, outputs):
+            # 出したばかりのキューをもう一度押した（チャタリング）
+            self.counts['bounced'] += 1
+            self.tracer.mark('arbiter_bounced')
+            return
+        self.tracer.mark('arbiter_held')
+        held = {'index': index, 'outputs': outputs, 'timer': None}
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.timeout.connect(lambda h=held: self._release(h))
+        timer.start(max(0, (quiet_at_ns - now_ns + 999_999) // 1_000_000))
+        held['timer'] = timer
+        self.held.append(held)
+
+    # 停止などで出力が空になったときに呼ぶ（次の入力は同じキューでも出す）
+    def reset(self):
+        for held in self.held:
+            held['timer'].stop()
+            held['timer'].deleteLater()
+        self.held.clear()
+        self.quiet_at_ns.clear()
+        self.last_index.clear()
+
+    def has_pending(self):
+        return bool(self.held)
+
+    def _release(self, held):
+        if held not in self.held:
+            return
+        self.held.remove(held)
+        held['timer'].deleteLater()
+        if self._already_showing(held['index'], held['outputs']):
+            # 途中の入力を経て出力中のキューに戻った: 状態は変えない
+            self.counts['bounced'] += 1
+            return
+        self._accept(held['index'], held['outputs'], time.monotonic_ns())
+
+    def _accept(self, index, outputs, now_ns):
+        quiet_at_ns = now_ns + self.debounce_ms * 1_000_000
+        for output in outputs:
+            self.quiet_at_ns[output] = quiet_at_ns
+            self.last_index[output] = index
+        self.counts['accepted'] += 1
+        self.tracer.mark('arbiter_accepted')
+        self.accepted.emit(index)
+
+    def _already_showing(self, index, outputs):
+        return all(self.last_index.get(o) == index for o in outputs)
+
+    # 出力が重なる保留中の入力を取り消す
+    def _drop_held(self, outputs):
+        for held in [h for h in self.held if h['outputs'] & outputs]:
+            self.held.remove(held)
+            held['timer'].stop()
+            held['timer'].deleteLater()
+            self.counts['superseded'] += 1
+            self.superseded.emit(held['index'])
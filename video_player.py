@@ -2,14 +2,31 @@ import sys
 import json
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QGridLayout, QWidget, 
                              QFileDialog, QHBoxLayout, QVBoxLayout, QSlider, QStyle, 
-                             QComboBox, QLabel, QMenuBar, QMenu, QSizePolicy, QCheckBox)
+                             QComboBox, QLabel, QMenuBar, QMenu, QSizePolicy, QCheckBox, QInputDialog, QMessageBox,
+                             QSpinBox)
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QMediaDevices
 from PyQt6.QtCore import Qt, QUrl, QTimer, pyqtSignal
-from PyQt6.QtGui import QKeyEvent, QCloseEvent
-from player_window import PlayerWindow
-if sys.platform == 'darwin':
-    from objclib import hide_menubar_and_dock
-    
+from PyQt6.QtGui import QKeyEvent, QCloseEvent, QIcon
+from display_scheduler import DisplayRefreshScheduler, DEFAULT_REFRESH_INTERVAL_MS
+from media_probe import MediaProbe
+from keyframe_index import KeyframeIndexer, keyframe_before
+from proxy_transcoder import ProxyTranscoder
+from seek_preview import SeekPreviewGenerator, SeekPreviewSheets, PreviewSeekSlider
+from audio_meter import AudioLevelMeter, AudioMeterWidget
+from confidence_monitor import (ConfidenceMonitor, ConfidenceMonitorWidget, DEFAULT_MONITOR_FPS,
+                                DEFAULT_MONITOR_CPU_PERCENT)
+from tracing import get_tracer
+from diagnostics_panel import DiagnosticsPanel
+from ram_preload import MediaPreloader, DEFAULT_RAM_BUDGET_MB
+from thumbnails import ThumbnailExtractor, scaled_thumbnail, BUTTON_ICON_SIZE
+from player_pool import PlayerPool, DEFAULT_POOL_CAPACITY
+from output_stack import StartBarrier
+from transitions import TRANSITION_CUT, TRANSITION_CROSSFADE, TRANSITION_DIP_TO_BLACK, DEFAULT_TRANSITION
+from output_group import OutputGroup
+from cue_library import CueLibrary, SLOTS_PER_BANK, cue_index, split_index
+from trigger_arbiter import TriggerArbiter, DEFAULT_DEBOUNCE_MS
+from cue_scheduler import CueScheduler, DEFAULT_LEAD_TIME_MS, parse_timecode, format_timecode, SCHEDULE_WALL
+
 
 # メインのビデオプレーヤーコントローラークラス
 class VideoPlayer(QMainWindow):
@@ -17,6 +34,10 @@ class VideoPlayer(QMainWindow):
     playback_state_changed = pyqtSignal(int, bool)
     position_updated = pyqtSignal(int, int, int)
     global_playback_state_changed = pyqtSignal(QMediaPlayer.PlaybackState)
+    slot_info_changed = pyqtSignal(int, str)
+    slot_thumbnail_changed = pyqtSignal(int, str)
+    bank_changed = pyqtSignal(int)
+    audio_levels_changed = pyqtSignal(object)  # [(ピーク dBFS, RMS dBFS), ...]
 
     # コンストラクタ
     def __init__(self):
@@ -45,8 +66,11 @@ class VideoPlayer(QMainWindow):
         self.controls_layout.addWidget(self.stop_button)
 
         # シークバー（再生位置のスライダー）
-        self.seek_slider = QSlider(Qt.Orientation.Horizontal)
-        self.seek_slider.sliderMoved.connect(self.set_position)
+        # マウスを乗せた位置のフレームをスプライトシートから表示する（出力はシークしない）
+        self.seek_slider = PreviewSeekSlider(Qt.Orientation.Horizontal)
+        self.seek_slider.seek_requested.connect(self.set_position)
+        self.seek_slider.preview_provider = self.seek_preview_image
+        self.seek_slider.time_formatter = self.format_time
         self.seek_slider.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred) # シークバーを拡張
         self.controls_layout.addWidget(self.seek_slider)
 
@@ -57,7 +81,35 @@ class VideoPlayer(QMainWindow):
         self.time_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter) # 右揃えと垂直中央揃え
         self.controls_layout.addWidget(self.time_label)
 
-        # ビデオ選択ボタン用のグリッドレイアウト
+        # 音声レベルメーター（出力先の確認用）
+        self.meter_widget = AudioMeterWidget()
+        self.controls_layout.addWidget(self.meter_widget)
+
+        # バンク（9 キューずつのページ）の切り替え
+        bank_layout = QHBoxLayout()
+        bank_layout.addWidget(QLabel("バンク:"))
+        prev_bank_button = QPushButton("◀")
+        prev_bank_button.setFixedWidth(30)
+        prev_bank_button.clicked.connect(lambda: self.change_bank(-1))
+        bank_layout.addWidget(prev_bank_button)
+        self.bank_spinbox = QSpinBox()
+        self.bank_spinbox.setRange(1, 1)
+        self.bank_spinbox.valueChanged.connect(lambda value: self.set_bank(value - 1))
+        bank_layout.addWidget(self.bank_spinbox)
+        next_bank_button = QPushButton("▶")
+        next_bank_button.setFixedWidth(30)
+        next_bank_button.clicked.connect(lambda: self.change_bank(1))
+        bank_layout.addWidget(next_bank_button)
+        self.bank_label = QLabel("")
+        bank_layout.addWidget(self.bank_label)
+        bank_layout.addStretch()
+        # 本番出力のコンフィデンスモニター（縮小・間引きした映像）
+        self.monitor_widget = ConfidenceMonitorWidget()
+        self.monitor_widget.setVisible(False)
+        bank_layout.addWidget(self.monitor_widget)
+        self.main_layout.addLayout(bank_layout)
+
+        # ビデオ選択ボタン用のグリッドレイアウト（表示中のバンクの分だけ）
         self.grid_layout = QGridLayout()
         self.main_layout.addLayout(self.grid_layout)
 
@@ -88,30 +140,96 @@ class VideoPlayer(QMainWindow):
         # --- 設定用のUI要素ここまで ---
 
         # 変数の初期化
-        self.video_paths = {}  # ビデオファイルのパスを格納する辞書
+        # 割り当てたファイルをバックグラウンドで調べる（長さ・コーデック・解像度・エラー）
+        self.media_probe = MediaProbe(parent=self)
+        self.media_probe.probed.connect(self.media_probed)
+        # イン点の入力に使うキーフレーム位置の索引（バックグラウンドで作る）
+        self.keyframes = KeyframeIndexer(self)
+        # シーク・ループを軽くする全フレームキーフレームの再生用ファイル（任意、ffmpeg があるとき）
+        self.proxies = ProxyTranscoder(self)
+        self.proxies.progress.connect(self.proxy_progress)
+        self.proxies.proxy_ready.connect(self.proxy_finished)
+        self.proxies.failed.connect(self.proxy_progress)
+        self.proxy_enabled = False
+        # シークバーのプレビュー用スプライトシート（使うときに開き、開いておくのは数個まで）
+        self.seek_previews = SeekPreviewGenerator(self)
+        self.seek_previews.sheet_ready.connect(self.seek_preview_loaded)
+        self.preview_sheets = SeekPreviewSheets()
+        # 再生中の音声のレベル（NumPy と Qt 6.8 の QAudioBufferOutput があるとき）
+        self.audio_meter = AudioLevelMeter(parent=self)
+        self.audio_meter.levels_changed.connect(self.meter_widget.set_levels)
+        self.audio_meter.levels_changed.connect(self.audio_levels_changed)
+        if self.audio_meter.available:
+            self.audio_meter.start()
+        else:
+            self.meter_widget.setToolTip("音声レベルメーターには NumPy と Qt 6.8 以降が必要です")
+        # 出力 1 の前面レイヤーの映像を縮小して表示する（変換はワーカースレッド、GUI には縮小済みの画像だけ）
+        self.confidence_monitor = ConfidenceMonitor(parent=self)
+        self.confidence_monitor.frame_ready.connect(self.monitor_widget.set_image)
+        self.media_info = {}  # ファイルパス -> 調査結果
+        # 代表フレームのサムネイル（バックグラウンドで抽出してディスクにキャッシュ）
+        self.thumbnails = ThumbnailExtractor(self)
+        self.thumbnails.thumbnail_ready.connect(self.thumbnail_loaded)
+        self.thumbnail_paths = {}  # ファイルパス -> 基本サムネイルのパス
+        self.video_paths = CueLibrary()  # 全キューの設定（グローバル番号 -> パス・ループなど）
+        self.current_bank = 0  # コントローラーと Stream Deck に表示中のバンク
         self.play_buttons = []  # 再生ボタンの参照を格納するリスト
         self.loop_checkboxes = []  # ループチェックボックスの参照を格納するリスト
+        self.ram_checkboxes = []  # メモリ読み込みチェックボックスの参照を格納するリスト
+        self.ram_labels = []  # メモリ読み込み状態ラベルの参照を格納するリスト
+        # 遅いストレージ向けのメモリ読み込み
+        self.preloader = MediaPreloader(DEFAULT_RAM_BUDGET_MB, self)
+        self.preloader.progress.connect(self.ram_preload_progress)
+        self.preloader.resident_changed.connect(self.ram_resident_changed)
         self.current_playing_button_index = -1  # 現在再生中のビデオのインデックス
+        self.output_group_rows = []  # 追加した出力グループの設定行
         self.create_buttons()  # ボタンを生成
+        self.update_bank_range()
 
         # 現在再生中のファイル名表示ラベル
         self.current_playing_file_name = "停止中"
         self.current_video_label = QLabel(self.current_playing_file_name)
         self.main_layout.addWidget(self.current_video_label)
 
+        # キューのレイテンシ計測
+        self.tracer = get_tracer()
+        self.diagnostics_panel = None
+
         # メディアプレーヤー関連のオブジェクトを初期化
         self.player_window = None  # 再生ウィンドウのインスタンス
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
+        # 事前読み込み済みプレーヤーのプール
+        self.player_pool = PlayerPool(DEFAULT_POOL_CAPACITY, self)
+        # 出力グループ（それぞれ再生ウィンドウ・A/B プレーヤー・音声出力を持つ）
+        # 事前読み込みプールはメイン出力（出力 1）だけが使う
+        # メモリに読み込んだスロットはバッファから再生する
+        self.player_pool.source_loader = self.playout_source
+        main_group = OutputGroup("出力 1", self, self.player_pool, self.playout_source, self)
+        main_group.stack.first_frame_presented.connect(self.log_cue_latency)
+        main_group.stack.front_sink_changed.connect(self.confidence_monitor.set_sink)
+        self.output_groups = [main_group]
+        self.output = None  # UI（時間表示・シークバー）に接続している出力
+        self.current_cue_groups = [main_group]  # 現在のキューを出している出力グループ
+        self.cue_latency_log = []  # キューから最初のフレームまでの時間
         self.switch_audio_device(self.audio_selector.currentIndex())  # デフォルトの音声出力先を設定
 
-        # メディアプレーヤーのシグナルをスロットに接続
-        self.media_player.errorOccurred.connect(self.media_player_error)
-        self.media_player.positionChanged.connect(self.position_changed)
-        self.media_player.durationChanged.connect(self.duration_changed)
-        self.media_player.playbackStateChanged.connect(self.update_play_pause_icon)
-        self.media_player.mediaStatusChanged.connect(self.media_status_changed)
+        # 表示更新スケジューラー（シークバー・時間表示・Stream Deck への通知をまとめる）
+        self.display_scheduler = DisplayRefreshScheduler(DEFAULT_REFRESH_INTERVAL_MS, self)
+        self.display_scheduler.slider_position_changed.connect(self.refresh_seek_slider)
+        self.display_scheduler.displayed_time_changed.connect(self.refresh_time_display)
+
+        # メディアプレーヤーのシグナルをスロットに接続（出力エンジンがアクティブなプレーヤーから中継する）
+        self._bind_ui_output(main_group.stack)
+
+        # キュー入力の調停（連打・チャタリングをまとめて出力へ渡す）
+        self.trigger_arbiter = TriggerArbiter(DEFAULT_DEBOUNCE_MS, parent=self)
+        self.trigger_arbiter.accepted.connect(self.play_video_from_button)
+
+        # 時刻指定・連鎖キューのスケジューラー
+        self.cue_scheduler = CueScheduler(DEFAULT_LEAD_TIME_MS, parent=self)
+        self.cue_scheduler.prearm_requested.connect(self.prearm_cue)
+        self.cue_scheduler.disarm_requested.connect(self.player_pool.disarm)
+        self.cue_scheduler.trigger.connect(self.play_scheduled_cue)
+        main_group.stack.first_frame_presented.connect(self.cue_scheduler.on_output_started)
         
         # デフォルトのフォントサイズと最前面表示を設定
         self.set_font_size("medium")
@@ -127,13 +245,206 @@ class VideoPlayer(QMainWindow):
         # アプリ起動時にコントローラーの表示状態をメニューバーに反映 
         self.toggle_controller_visibility(self.controller_visible)
         
+    # 現在出力に接続されているプレーヤー
+    @property
+    def media_player(self):
+        return self.output.active_player
+
+    # UI に接続する出力を切り替えるメソッド（キューの最初の出力グループを表示する）
+    def _bind_ui_output(self, stack):
+        if self.output is stack:
+            return
+        if self.output is not None:
+            self.output.set_audio_tap(None)
+            self.output.errorOccurred.disconnect(self.media_player_error)
+            self.output.positionChanged.disconnect(self.position_changed)
+            self.output.durationChanged.disconnect(self.duration_changed)
+            self.output.playbackStateChanged.disconnect(self.update_play_pause_icon)
+            self.output.mediaStatusChanged.disconnect(self.media_status_changed)
+            self.output.out_point_reached.disconnect(self.cue_finished)
+        self.output = stack
+        stack.errorOccurred.connect(self.media_player_error)
+        stack.positionChanged.connect(self.position_changed)
+        stack.durationChanged.connect(self.duration_changed)
+        stack.playbackStateChanged.connect(self.update_play_pause_icon)
+        stack.mediaStatusChanged.connect(self.media_status_changed)
+        stack.out_point_reached.connect(self.cue_finished)
+        if self.audio_meter.output is not None:
+            stack.set_audio_tap(self.audio_meter.output)
+
+    # 出力中のプールプレーヤーのスロット番号
+    def _active_pool_index(self):
+        entry = self.output_groups[0].stack.active_pool_entry
+        return entry[0] if entry else None
+
+    # 再生に使うファイル（再生用プロキシが有効で変換済みならそちら）
+    def playout_path(self, file_path):
+        return self.proxies.playout_path(file_path) if self.proxy_enabled else file_path
+
+    # プレーヤーにソースを設定するメソッド（プール・出力グループ共通。メモリにあればバッファから）
+    def playout_source(self, player, index, file_path):
+        self.preloader.apply_source(player, index, self.playout_path(file_path))
+
+    # 再生用プロキシの作成の有効/無効を切り替えるメソッド
+    def set_proxy_enabled(self, enabled):
+        self.proxy_action.setChecked(enabled)
+        if enabled == self.proxy_enabled:
+            return
+        self.proxy_enabled = enabled
+        if enabled:
+            for index in self.video_paths.loaded_indices():
+                file_path = self.video_paths[index]['path']
+                info = self.media_info.get(file_path)
+                if info is not None and not info.get('error'):
+                    self.proxies.request(file_path, info)
+        else:
+            self.proxies.cancel_all()
+        # 待機中のプレーヤーとメモリ上のバッファを再生するファイルに合わせ直す
+        for index in self.video_paths.loaded_indices():
+            self._reload_playout(index)
+            self.update_slot_button(index)
+
+    def _reload_playout(self, index):
+        self.player_pool.reload(index)
+        if self.video_paths[index].get('preload_ram'):
+            self.preloader.preload(index, self.playout_path(self.video_paths[index]['path']))
+
+    # 再生用プロキシの進捗を表示するメソッド
+    def proxy_progress(self, file_path, *_):
+        for index in self.video_paths.indices_for_path(file_path):
+            self.update_slot_button(index)
+
+    # 再生用プロキシができたら次のキューから切り替える（再生中のキューはそのまま）
+    def proxy_finished(self, file_path, proxy_path):
+        print(f"Proxy ready: {file_path} -> {proxy_path}")
+        for index in self.video_paths.indices_for_path(file_path):
+            if self.proxy_enabled:
+                self._reload_playout(index)
+            self.update_slot_button(index)
+
+    # 事前読み込みの有効/無効を切り替えるメソッド
+    def set_preload_enabled(self, enabled):
+        self.player_pool.set_enabled(enabled)
+        self.preload_action.setChecked(enabled)
+        self._sync_pool(self._active_pool_index())
+
+    # 事前読み込みで待機させるプレーヤー数を設定するメソッド（1 つごとにデコーダとバッファのメモリを使う）
+    def ask_preload_slots(self):
+        capacity, ok = QInputDialog.getInt(self, "事前読み込み", "待機させるプレーヤーの数:",
+                                           self.player_pool.capacity, 0, 99, 1)
+        if ok:
+            self.player_pool.set_capacity(capacity)
+            self._sync_pool(self._active_pool_index())
+
+    # 表示中のバンクに近いキューから順にプールを準備するメソッド
+    def _sync_pool(self, exclude=None):
+        self.player_pool.sync(self.video_paths, exclude=exclude, order=self.video_paths.warm_order(self.current_bank))
+
+    # キュー番号が表示中のバンクにあればボタン位置（0〜8）、なければ None
+    def _slot_of(self, index):
+        bank, slot = split_index(index)
+        return slot if bank == self.current_bank and index >= 0 else None
+
+    # 表示中のバンクのスロット番号からキューを再生するメソッド（数字キー・ボタン用）
+    def play_slot(self, slot):
+        self.trigger_cue(cue_index(self.current_bank, slot))
+
+    # 入力からキューを出すメソッド（調停役を通して play_video_from_button に届く）
+    def trigger_cue(self, index):
+        self.trigger_arbiter.submit(index, self.video_paths.get(index, {}).get('outputs') or [0])
+
+    # バンクを切り替えるメソッド（作り直すのは 9 スロット分の表示だけ）
+    def set_bank(self, bank):
+        bank = max(0, min(bank, self.video_paths.bank_count() - 1))
+        if bank == self.current_bank:
+            return
+        self.current_bank = bank
+        self.bank_spinbox.blockSignals(True)
+        self.bank_spinbox.setValue(bank + 1)
+        self.bank_spinbox.blockSignals(False)
+        self.refresh_bank_page()
+        self.bank_changed.emit(bank)
+        self._sync_pool(self._active_pool_index())
+
+    def change_bank(self, delta):
+        self.set_bank(self.current_bank + delta)
+
+    # 読み込み済みのキューに合わせてバンクの範囲と表示を更新するメソッド
+    def update_bank_range(self):
+        self.bank_spinbox.blockSignals(True)
+        self.bank_spinbox.setRange(1, self.video_paths.bank_count())
+        self.bank_spinbox.setValue(self.current_bank + 1)
+        self.bank_spinbox.blockSignals(False)
+        first = cue_index(self.current_bank, 0) + 1
+        self.bank_label.setText(f"キュー {first}〜{first + SLOTS_PER_BANK - 1}"
+                                f"（読み込み済み {self.video_paths.loaded_count()}）")
+
+    # 表示中のバンクのボタン群をライブラリの内容で更新するメソッド
+    def refresh_bank_page(self):
+        for index in self.video_paths.bank_indices(self.current_bank):
+            self.refresh_slot_widgets(index)
+        self.update_bank_range()
+
+    def refresh_slot_widgets(self, index):
+        slot = self._slot_of(index)
+        if slot is None:
+            return
+        cue = self.video_paths.get(index, {})
+        if cue.get('path'):
+            self.update_slot_button(index)
+        else:
+            button = self.play_buttons[slot]
+            button.setText(f"Load Video {index + 1}")
+            button.setToolTip("")
+            button.setIcon(QIcon())
+            button.setEnabled(False)
+        self._set_button_playing(index, index == self.current_playing_button_index)
+        for checkbox, checked in ((self.loop_checkboxes[slot], cue.get('loop', False)),
+                                  (self.ram_checkboxes[slot], cue.get('preload_ram', False))):
+            checkbox.blockSignals(True)
+            checkbox.setChecked(checked)
+            checkbox.blockSignals(False)
+        self.ram_labels[slot].setText(self._ram_label_text(index))
+
+    # 再生中のキューのボタンを赤くする（表示中のバンクにあるときだけ）
+    def _set_button_playing(self, index, playing):
+        slot = self._slot_of(index)
+        if slot is not None:
+            self.play_buttons[slot].setStyleSheet("background-color: red;" if playing else "")
+
+    def _ram_label_text(self, index):
+        if not self.video_paths.get(index, {}).get('preload_ram'):
+            return ""
+        entry = self.preloader.buffers.get(index)
+        if entry is not None:
+            return f"{len(entry[1]) / (1024 * 1024):.0f}MB"
+        return "0%" if index in self.preloader.loading else "先読み"
+
+    # レイテンシの診断パネルを表示するメソッド
+    def show_diagnostics_panel(self):
+        if self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self.tracer, self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+
+    # キューから最初のフレームが出力されるまでの時間を記録するメソッド
+    def log_cue_latency(self, latency_ms, warm):
+        path = "warm" if warm else "cold"
+        self.cue_latency_log.append((path, latency_ms))
+        print(f"Cue to first frame: {latency_ms:.1f} ms ({path})")
+
     def media_status_changed(self, status):
         if status == QMediaPlayer.MediaStatus.EndOfMedia:
             if self.current_playing_button_index != -1:
-                if self.media_player.loops() != QMediaPlayer.Loops.Infinite:
-                    self.playback_state_changed.emit(self.current_playing_button_index, False)
-                    self.play_buttons[self.current_playing_button_index].setStyleSheet("")
-                    self.current_playing_button_index = -1
+                if not self.video_paths.get(self.current_playing_button_index, {}).get('loop', False):
+                    self.cue_finished()
+
+    # ループしないキューが終わった（ファイルの終わりかアウト点）ときの処理
+    def cue_finished(self):
+        if self.current_playing_button_index != -1:
+            self.playback_state_changed.emit(self.current_playing_button_index, False)
+            self._set_button_playing(self.current_playing_button_index, False)
+            self.current_playing_button_index = -1
 
     # メニューバーを作成するメソッド
     def create_menu(self):
@@ -158,18 +469,65 @@ class VideoPlayer(QMainWindow):
         view_menu.addSeparator()
         self.hide_controller_action = view_menu.addAction("コントローラーを隠す")
         self.hide_controller_action.triggered.connect(lambda: self.toggle_controller_visibility())
+        diagnostics_action = view_menu.addAction("診断パネル")
+        diagnostics_action.triggered.connect(self.show_diagnostics_panel)
+        monitor_menu = view_menu.addMenu("コンフィデンスモニター")
+        self.monitor_action = monitor_menu.addAction("表示")
+        self.monitor_action.setCheckable(True)
+        self.monitor_action.toggled.connect(self.set_monitor_enabled)
+        monitor_rate_action = monitor_menu.addAction("フレームレートと CPU 上限...")
+        monitor_rate_action.triggered.connect(self.ask_monitor_rate)
+
+        # 「再生」メニュー
+        playback_menu = menubar.addMenu("再生")
+        self.preload_action = playback_menu.addAction("キューを事前読み込み")
+        self.preload_action.setCheckable(True)
+        self.preload_action.toggled.connect(self.set_preload_enabled)
+        preload_slots_action = playback_menu.addAction("事前読み込みするキューの数...")
+        preload_slots_action.triggered.connect(self.ask_preload_slots)
+        self.proxy_action = playback_menu.addAction("再生用プロキシを作成（シーク・ループ用）")
+        self.proxy_action.setCheckable(True)
+        self.proxy_action.setEnabled(self.proxies.available())
+        self.proxy_action.toggled.connect(self.set_proxy_enabled)
+        ram_budget_action = playback_menu.addAction("メモリ読み込みの予算...")
+        ram_budget_action.triggered.connect(self.ask_ram_budget)
+        debounce_action = playback_menu.addAction("連打をまとめる時間...")
+        debounce_action.triggered.connect(self.ask_trigger_debounce)
+        lead_time_action = playback_menu.addAction("スケジュールの準備時間...")
+        lead_time_action.triggered.connect(self.ask_schedule_lead_time)
+        clear_schedule_action = playback_menu.addAction("スケジュールをすべて解除")
+        clear_schedule_action.triggered.connect(self.cue_scheduler.clear)
+
+        # 「出力」メニュー（複数スクリーンへの同時出力）
+        output_menu = menubar.addMenu("出力")
+        add_output_action = output_menu.addAction("出力グループを追加")
+        add_output_action.triggered.connect(lambda: self.add_output_group())
+        remove_output_action = output_menu.addAction("最後の出力グループを削除")
+        remove_output_action.triggered.connect(self.remove_output_group)
     
     # 設定をJSONファイルにエクスポートするメソッド
     def export_settings(self):
-        # video_pathsのキーが数値だとJSONで問題になる可能性があるため文字列に変換
-        video_paths_str_keys = {str(k): v for k, v in self.video_paths.items()}
-
         settings = {
-            'video_paths': video_paths_str_keys,
+            # キーはJSON用に文字列へ変換し、ファイルを割り当てたキューだけを書き出す
+            'video_paths': self.video_paths.to_dict(),
+            'current_bank': self.current_bank,
             'screen_index': self.screen_selector.currentIndex(),
             'audio_index': self.audio_selector.currentIndex(),
             'font_size': self.font_size,
             'controller_visible': self.controller_visible,
+            'display_refresh_ms': self.display_scheduler.interval_ms,
+            'preload_enabled': self.player_pool.enabled,
+            'proxy_enabled': self.proxy_enabled,
+            'preload_slots': self.player_pool.capacity,
+            'ram_budget_mb': self.preloader.budget_bytes // (1024 * 1024),
+            'output_groups': [{'screen_index': g.screen_index, 'audio_index': g.audio_index}
+                              for g in self.output_groups[1:]],
+            'schedule': self.cue_scheduler.to_list(),
+            'schedule_lead_ms': self.cue_scheduler.lead_time_ms,
+            'trigger_debounce_ms': self.trigger_arbiter.debounce_ms,
+            'monitor_enabled': self.confidence_monitor.enabled,
+            'monitor_fps': self.confidence_monitor.fps,
+            'monitor_cpu_percent': self.confidence_monitor.cpu_percent,
         }
 
         # ファイル保存ダイアログを開く
@@ -188,9 +546,15 @@ class VideoPlayer(QMainWindow):
             with open(load_path, 'r') as f:
                 settings = json.load(f)
 
-            video_paths_str_keys = settings.get('video_paths', {})
-            # JSONのキー（文字列）を整数に変換してvideo_pathsを再構築
-            self.video_paths = {int(k): v for k, v in video_paths_str_keys.items()}
+            # JSONのキー（文字列）を整数に変換してキューライブラリを再構築
+            previous = self.video_paths.loaded_indices()
+            self.video_paths = CueLibrary(settings.get('video_paths', {}))
+            # 新しい設定で空になったキューは Stream Deck からも消す
+            for index in previous:
+                if not self.video_paths.get(index, {}).get('path'):
+                    self.video_loaded.emit(index, "")
+            self.current_bank = max(0, min(settings.get('current_bank', 0), self.video_paths.bank_count() - 1))
+            self.bank_changed.emit(self.current_bank)
 
             # スクリーンインデックスの検証と適用
             screen_index = settings.get('screen_index', 0)
@@ -207,39 +571,126 @@ class VideoPlayer(QMainWindow):
             # フォントサイズの適用
             self.set_font_size(settings.get('font_size', 'medium'))
 
+            # 表示更新間隔の適用
+            self.display_scheduler.set_interval(settings.get('display_refresh_ms', DEFAULT_REFRESH_INTERVAL_MS))
+
+            # 追加の出力グループを復元
+            while len(self.output_groups) > 1:
+                self.remove_output_group()
+            for group_settings in settings.get('output_groups', []):
+                self.add_output_group(group_settings.get('screen_index', 0), group_settings.get('audio_index', 0))
+
+            # 事前読み込み設定の適用
+            self.player_pool.set_capacity(settings.get('preload_slots', DEFAULT_POOL_CAPACITY))
+            self.set_preload_enabled(settings.get('preload_enabled', False))
+            self.set_proxy_enabled(settings.get('proxy_enabled', False) and self.proxies.available())
+            self.preloader.set_budget_mb(settings.get('ram_budget_mb', DEFAULT_RAM_BUDGET_MB))
+
             # コントローラーの表示状態を復元
             self.controller_visible = settings.get('controller_visible', True)
             self.showPlayerWindow()
 
+            # コンフィデンスモニターの設定
+            self.confidence_monitor.set_rate(settings.get('monitor_fps', DEFAULT_MONITOR_FPS),
+                                             settings.get('monitor_cpu_percent', DEFAULT_MONITOR_CPU_PERCENT))
+            self.set_monitor_enabled(settings.get('monitor_enabled', False))
+
             # UIを読み込んだ設定に合わせて更新
             self.update_ui_from_settings()
 
+            # スケジュールの復元
+            self.trigger_arbiter.debounce_ms = settings.get('trigger_debounce_ms', DEFAULT_DEBOUNCE_MS)
+            self.cue_scheduler.lead_time_ms = settings.get('schedule_lead_ms', DEFAULT_LEAD_TIME_MS)
+            self.cue_scheduler.load_list(settings.get('schedule', []))
+            self._sync_pool(self._active_pool_index())
+
     # 読み込んだ設定に基づいてUI（ボタンの表示など）を更新するメソッド
+    # ボタンは表示中のバンクの分だけ更新し、Stream Deck と調査・メモリ読み込みは全キューに対して行う
     def update_ui_from_settings(self):
-        for i in range(9):
-            video_info = self.video_paths.get(i)
-            if video_info and video_info.get('path'):
-                file_path = video_info['path']
-                filename = file_path.split('/')[-1]
-                self.video_loaded.emit(i, filename)
-                button = self.play_buttons[i]
-                button.setToolTip(filename) # ボタンにマウスオーバーでフルパス表示
-                # ファイル名が長すぎる場合は省略
-                max_len = 25
-                if len(filename) > max_len:
-                    display_name = filename[:max_len-3] + "..."
-                else:
-                    display_name = filename
-                button.setText(display_name)
-                button.setEnabled(True)
-                self.loop_checkboxes[i].setChecked(video_info.get('loop', False))
+        # メモリ読み込みの対象から外れたキューのバッファを解放
+        for index in set(self.preloader.buffers) | set(self.preloader.loading):
+            if not self.video_paths.get(index, {}).get('preload_ram'):
+                self.preloader.release(index)
+        for index in self.video_paths.loaded_indices():
+            video_info = self.video_paths[index]
+            file_path = video_info['path']
+            self.video_loaded.emit(index, file_path.split('/')[-1])
+            if video_info.get('preload_ram'):
+                self.preloader.preload(index, self.playout_path(file_path))
+            self.media_probe.probe(file_path)
+        self.refresh_bank_page()
+
+    # スロットの再生ボタンの表示（ファイル名・長さ・エラー）を更新するメソッド
+    def update_slot_button(self, index):
+        slot = self._slot_of(index)
+        if slot is None:
+            return
+        file_path = self.video_paths.get(index, {}).get('path')
+        button = self.play_buttons[slot]
+        filename = file_path.split('/')[-1]
+        # ファイル名が長すぎる場合は省略
+        max_len = 25
+        if len(filename) > max_len:
+            display_name = filename[:max_len-3] + "..."
+        else:
+            display_name = filename
+
+        tooltip = filename # ボタンにマウスオーバーでフルパス表示
+        info = self.media_info.get(file_path)
+        if info is not None:
+            if info.get('error'):
+                display_name = f"⚠ {display_name}"
+                tooltip += f"\n再生できない可能性があります: {info['error']}"
             else:
-                # 読み込まれていないスロットのUIをリセット
-                button = self.play_buttons[i]
-                button.setText(f"Load Video {i + 1}")
-                button.setToolTip("")
-                button.setEnabled(False)
-                self.loop_checkboxes[i].setChecked(False)
+                display_name += f"  [{self.format_time(info['duration_ms'])}]"
+                if info.get('width'):
+                    tooltip += f"\n{info['width']}x{info['height']}"
+                codecs = ", ".join(s['codec'] for s in info.get('streams', []) if s.get('codec'))
+                if codecs:
+                    tooltip += f"  {codecs}"
+        cue = self.video_paths.get(index, {})
+        if cue.get('in_ms') or cue.get('out_ms') is not None:
+            out_text = format_timecode(cue['out_ms']) if cue.get('out_ms') is not None else "終わり"
+            tooltip += f"\nイン {format_timecode(cue.get('in_ms', 0))} / アウト {out_text}"
+        if self.proxy_enabled:
+            fraction = self.proxies.progress_of(file_path)
+            if fraction is not None:
+                display_name += f"  (プロキシ {fraction * 100:.0f}%)"
+            elif self.proxies.playout_path(file_path) != file_path:
+                tooltip += "\n再生用プロキシで再生"
+        button.setToolTip(tooltip)
+        button.setText(display_name)
+        button.setEnabled(True)
+        thumbnail_path = self.thumbnail_paths.get(file_path)
+        if thumbnail_path:
+            button.setIcon(QIcon(scaled_thumbnail(thumbnail_path, BUTTON_ICON_SIZE.width(), BUTTON_ICON_SIZE.height())))
+            button.setIconSize(BUTTON_ICON_SIZE)
+        else:
+            button.setIcon(QIcon())
+
+    # バックグラウンドでのメディア調査が終わったときの処理
+    def media_probed(self, file_path, info):
+        self.media_info[file_path] = info
+        if info.get('error'):
+            status_text = "ERR"
+        else:
+            status_text = self.format_time(info['duration_ms'])
+        for index in self.video_paths.indices_for_path(file_path):
+            self.update_slot_button(index)
+            self.slot_info_changed.emit(index, status_text)
+        if not info.get('error'):
+            self.thumbnails.request(file_path, info['duration_ms'])
+            self.keyframes.request(file_path)
+            self.seek_previews.request(file_path)
+            if self.proxy_enabled:
+                self.proxies.request(file_path, info)
+
+    # サムネイルの抽出が終わったときの処理
+    def thumbnail_loaded(self, file_path, base_path):
+        self.thumbnail_paths[file_path] = base_path
+        for index in self.video_paths.indices_for_path(file_path):
+            self.update_slot_button(index)
+            self.slot_thumbnail_changed.emit(index, base_path)
 
     def showPlayerWindow(self):
         self.setVisible(self.controller_visible)
@@ -273,39 +724,365 @@ class VideoPlayer(QMainWindow):
         # スタイルシートを使ってフォントサイズを適用
         QApplication.instance().setStyleSheet(f"* {{ font-size: {font_size}pt; }}")
 
-    # 9つのビデオコントロールボタン群を作成するメソッド
+    # 表示中のバンクの 9 スロット分だけボタン群を作成するメソッド
+    # バンクを切り替えてもウィジェットは作り直さず、表示内容だけ差し替える
     def create_buttons(self):
-        for i in range(9):
+        for i in range(SLOTS_PER_BANK):
             row = i // 3
-            base_col = (i % 3) * 3  # 各スロットに3列（再生、読込、ループ）使う
+            base_col = (i % 3) * 5  # 各スロットに5列（再生、読込、ループ、RAM、RAM状態）使う
 
             # 再生ボタン
             play_button = QPushButton(f"Load Video {i + 1}")
-            play_button.clicked.connect(lambda checked, idx=i: self.play_video_from_button(idx))
+            play_button.clicked.connect(lambda checked, s=i: self.play_slot(s))
             play_button.setEnabled(False) # 最初は無効
+            # 右クリックでスロットごとの設定メニューを表示
+            play_button.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            play_button.customContextMenuRequested.connect(
+                lambda pos, b=play_button, s=i: self.show_slot_menu(b, cue_index(self.current_bank, s), pos))
             self.grid_layout.addWidget(play_button, row, base_col)
             self.play_buttons.append(play_button)
 
             # 読込ボタン ("...")
             load_button = QPushButton("...")
             load_button.setFixedWidth(30)
-            load_button.clicked.connect(lambda checked, b=play_button, idx=i: self.load_video(b, idx))
+            load_button.clicked.connect(lambda checked, b=play_button, s=i: self.load_video(b, cue_index(self.current_bank, s)))
             self.grid_layout.addWidget(load_button, row, base_col + 1)
 
             # ループ再生チェックボックス
             loop_checkbox = QCheckBox("ループ")
-            loop_checkbox.toggled.connect(lambda checked, idx=i: self.toggle_video_loop_setting(idx, checked))
+            loop_checkbox.toggled.connect(
+                lambda checked, s=i: self.toggle_video_loop_setting(cue_index(self.current_bank, s), checked))
             self.grid_layout.addWidget(loop_checkbox, row, base_col + 2)
             self.loop_checkboxes.append(loop_checkbox)
 
-            # ビデオパス辞書を初期化
-            self.video_paths[i] = {'path': None, 'loop': False}
+            # メモリ読み込みチェックボックスと状態表示（進捗・常駐サイズ）
+            ram_checkbox = QCheckBox("RAM")
+            ram_checkbox.toggled.connect(
+                lambda checked, s=i: self.toggle_ram_preload(cue_index(self.current_bank, s), checked))
+            self.grid_layout.addWidget(ram_checkbox, row, base_col + 3)
+            self.ram_checkboxes.append(ram_checkbox)
+            ram_label = QLabel("")
+            ram_label.setFixedWidth(70)
+            self.grid_layout.addWidget(ram_label, row, base_col + 4)
+            self.ram_labels.append(ram_label)
+
+    # スロットのメモリ読み込みを切り替えるメソッド
+    def toggle_ram_preload(self, index, enabled):
+        self.video_paths.edit(index)['preload_ram'] = enabled
+        file_path = self.video_paths[index].get('path')
+        slot = self._slot_of(index)
+        if enabled and file_path:
+            if slot is not None:
+                self.ram_labels[slot].setText("0%")
+            self.preloader.preload(index, self.playout_path(file_path))
+        else:
+            self.preloader.release(index)
+            if slot is not None:
+                self.ram_labels[slot].setText("")
+
+    # メモリ読み込みの進捗を表示するメソッド
+    def ram_preload_progress(self, index, loaded, total):
+        slot = self._slot_of(index)
+        if total > 0 and slot is not None:
+            self.ram_labels[slot].setText(f"{loaded * 100 // total}%")
+
+    # メモリに常駐しているサイズを表示するメソッド
+    def ram_resident_changed(self, index, resident):
+        if resident > 0:
+            # 読み込み完了前に待機させたプレーヤーはファイルを開いているので、メモリから開き直す
+            self.player_pool.reload(index)
+        slot = self._slot_of(index)
+        if slot is None:
+            return
+        if not self.video_paths.get(index, {}).get('preload_ram'):
+            self.ram_labels[slot].setText("")
+        elif resident > 0:
+            self.ram_labels[slot].setText(f"{resident / (1024 * 1024):.0f}MB")
+        else:
+            self.ram_labels[slot].setText("先読み")
+
+    # メモリ読み込みの予算を設定するメソッド
+    def ask_ram_budget(self):
+        budget_mb, ok = QInputDialog.getInt(self, "メモリ予算", "メモリ読み込みに使う上限 (MB):",
+                                            self.preloader.budget_bytes // (1024 * 1024), 0, 1024 * 1024, 256)
+        if ok:
+            self.preloader.set_budget_mb(budget_mb)
+
+    # スロットを出す出力グループのリスト（未設定ならメイン出力）
+    def groups_for_slot(self, index):
+        routing = self.video_paths.get(index, {}).get('outputs') or [0]
+        groups = [self.output_groups[i] for i in routing if 0 <= i < len(self.output_groups)]
+        return groups or [self.output_groups[0]]
+
+    # 出力グループを追加するメソッド（スクリーン・音声出力先の選択行も追加する）
+    def add_output_group(self, screen_index=None, audio_index=0):
+        number = len(self.output_groups) + 1
+        group = OutputGroup(f"出力 {number}", self, None, self.playout_source, self)
+        if screen_index is None:
+            screen_index = min(number - 1, len(self.screens) - 1)
+        screen_index = screen_index if 0 <= screen_index < len(self.screens) else 0
+        audio_index = audio_index if 0 <= audio_index < len(self.audio_devices) else 0
+        self.output_groups.append(group)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel(f"{group.name} モニタ:"))
+        screen_selector = QComboBox()
+        screen_selector.addItems([screen.name() or f"Screen {i + 1}" for i, screen in enumerate(self.screens)])
+        screen_selector.setCurrentIndex(screen_index)
+        screen_selector.currentIndexChanged.connect(lambda i, g=group: self.switch_group_screen(g, i))
+        row.addWidget(screen_selector)
+        row.addWidget(QLabel("音声出力先:"))
+        audio_selector = QComboBox()
+        audio_selector.addItems([device.description() for device in self.audio_devices])
+        audio_selector.setCurrentIndex(audio_index)
+        audio_selector.currentIndexChanged.connect(lambda i, g=group: self.switch_group_audio_device(g, i))
+        row.addWidget(audio_selector)
+        row_widget = QWidget()
+        row_widget.setLayout(row)
+        self.main_layout.insertWidget(self.main_layout.indexOf(self.current_video_label), row_widget)
+        self.output_group_rows.append(row_widget)
+
+        group.screen_index = screen_index
+        group.create_window(self.screens[screen_index] if self.screens else QApplication.primaryScreen())
+        self.switch_group_audio_device(group, audio_index)
+        self.showPlayerWindow()
+        return group
+
+    # 最後に追加した出力グループを削除するメソッド
+    def remove_output_group(self):
+        if len(self.output_groups) <= 1:
+            return
+        group = self.output_groups.pop()
+        if group in self.current_cue_groups:
+            self.current_cue_groups.remove(group)
+        if self.output is group.stack:
+            self._bind_ui_output(self.output_groups[0].stack)
+        group.close()
+        row_widget = self.output_group_rows.pop()
+        row_widget.deleteLater()
+        # 削除したグループへの割り当てを外す
+        for video_info in self.video_paths.values():
+            if video_info.get('outputs'):
+                video_info['outputs'] = [i for i in video_info['outputs'] if i < len(self.output_groups)] or [0]
+
+    def switch_group_screen(self, group, screen_index):
+        group.screen_index = screen_index
+        if 0 <= screen_index < len(self.screens):
+            group.move_to_screen(self.screens[screen_index])
+
+    def switch_group_audio_device(self, group, index):
+        if 0 <= index < len(self.audio_devices):
+            group.audio_index = index
+            group.set_audio_device(self.audio_devices[index])
+
+    # スロットの出力先を切り替えるメソッド
+    def toggle_slot_output(self, index, group_index, enabled):
+        outputs = set(self.video_paths.get(index, {}).get('outputs') or [0])
+        if enabled:
+            outputs.add(group_index)
+        else:
+            outputs.discard(group_index)
+        self.video_paths.edit(index)['outputs'] = sorted(outputs) or [0]
+
+    # スロットの設定メニュー（トランジションの選択）を表示するメソッド
+    def show_slot_menu(self, button, index, pos):
+        menu = QMenu(self)
+        transition_menu = menu.addMenu("トランジション")
+        current = self.video_paths.get(index, {}).get('transition') or DEFAULT_TRANSITION
+        choices = [
+            ("カット", TRANSITION_CUT, 0),
+            ("クロスフェード 250ms", TRANSITION_CROSSFADE, 250),
+            ("クロスフェード 500ms", TRANSITION_CROSSFADE, 500),
+            ("クロスフェード 1000ms", TRANSITION_CROSSFADE, 1000),
+            ("黒フェード 500ms", TRANSITION_DIP_TO_BLACK, 500),
+            ("黒フェード 1000ms", TRANSITION_DIP_TO_BLACK, 1000),
+        ]
+        for label, kind, duration in choices:
+            action = transition_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(current.get('type') == kind and current.get('duration', 0) == duration)
+            action.triggered.connect(lambda checked, idx=index, k=kind, d=duration: self.set_slot_transition(idx, k, d))
+        if len(self.output_groups) > 1:
+            outputs_menu = menu.addMenu("出力先")
+            routing = self.video_paths.get(index, {}).get('outputs') or [0]
+            for group_index, group in enumerate(self.output_groups):
+                action = outputs_menu.addAction(group.name)
+                action.setCheckable(True)
+                action.setChecked(group_index in routing)
+                action.toggled.connect(lambda checked, idx=index, g=group_index: self.toggle_slot_output(idx, g, checked))
+        range_menu = menu.addMenu("イン点・アウト点")
+        in_action = range_menu.addAction("イン点を設定...")
+        in_action.triggered.connect(lambda checked, idx=index: self.ask_in_point(idx))
+        out_action = range_menu.addAction("アウト点を設定...")
+        out_action.triggered.connect(lambda checked, idx=index: self.ask_out_point(idx))
+        if index == self.current_playing_button_index:
+            range_menu.addSeparator()
+            here_in = range_menu.addAction("現在の再生位置をイン点に")
+            here_in.triggered.connect(lambda checked, idx=index: self.set_slot_range(
+                idx, self.media_player.position(), self.video_paths.get(idx, {}).get('out_ms')))
+            here_out = range_menu.addAction("現在の再生位置をアウト点に")
+            here_out.triggered.connect(lambda checked, idx=index: self.set_slot_range(
+                idx, self.video_paths.get(idx, {}).get('in_ms', 0), self.media_player.position()))
+        cue = self.video_paths.get(index, {})
+        if cue.get('in_ms') or cue.get('out_ms') is not None:
+            range_menu.addSeparator()
+            clear_action = range_menu.addAction("イン点・アウト点を解除")
+            clear_action.triggered.connect(lambda checked, idx=index: self.clear_slot_range(idx))
+        schedule_menu = menu.addMenu("スケジュール")
+        at_action = schedule_menu.addAction("時刻を指定して再生...")
+        at_action.triggered.connect(lambda checked, idx=index: self.ask_schedule_at(idx))
+        after_action = schedule_menu.addAction("他のキューの再生位置で再生...")
+        after_action.triggered.connect(lambda checked, idx=index: self.ask_schedule_after(idx))
+        entries = self.cue_scheduler.entries_for(index)
+        if entries:
+            schedule_menu.addSeparator()
+            for entry in entries:
+                if entry['kind'] == SCHEDULE_WALL:
+                    label = f"解除: {entry['clock']}"
+                else:
+                    label = f"解除: キュー {entry['after'] + 1} の {format_timecode(entry['position_ms'])}"
+                action = schedule_menu.addAction(label)
+                action.triggered.connect(lambda checked, entry_id=entry['id']: self.cue_scheduler.cancel(entry_id))
+        menu.exec(button.mapToGlobal(pos))
+
+    # イン点を入力するメソッド（キーフレームの索引があれば直前のキーフレームに合わせるか選べる）
+    def ask_in_point(self, index):
+        cue = self.video_paths.get(index, {})
+        text, ok = QInputDialog.getText(self, "イン点を設定", f"キュー {index + 1} のイン点 (MM:SS.mmm):",
+                                        text=format_timecode(cue.get('in_ms', 0)))
+        if not ok or not text:
+            return
+        try:
+            in_ms = parse_timecode(text)
+        except ValueError as e:
+            print(f"Invalid in point: {e}")
+            return
+        keyframes = self.keyframes.keyframes_for(cue.get('path'))
+        if keyframes:
+            keyframe_ms = keyframe_before(keyframes, in_ms)
+            if keyframe_ms != in_ms:
+                answer = QMessageBox.question(
+                    self, "イン点を設定",
+                    f"イン点は直前のキーフレーム ({format_timecode(keyframe_ms)}) から {in_ms - keyframe_ms} ms 後です。\n"
+                    "キーフレームに合わせますか？（合わせない場合も事前読み込みでそのフレームから始まります）")
+                if answer == QMessageBox.StandardButton.Yes:
+                    in_ms = keyframe_ms
+        self.set_slot_range(index, in_ms, cue.get('out_ms'))
+
+    def ask_out_point(self, index):
+        cue = self.video_paths.get(index, {})
+        current = cue.get('out_ms')
+        text, ok = QInputDialog.getText(self, "アウト点を設定",
+                                        f"キュー {index + 1} のアウト点 (MM:SS.mmm、空欄で終わりまで):",
+                                        text=format_timecode(current) if current is not None else "")
+        if not ok:
+            return
+        try:
+            self.set_slot_range(index, cue.get('in_ms', 0), parse_timecode(text) if text.strip() else None)
+        except ValueError as e:
+            print(f"Invalid out point: {e}")
+
+    # スロットのイン点・アウト点を設定するメソッド（out_ms が None なら終わりまで）
+    def set_slot_range(self, index, in_ms, out_ms):
+        cue = self.video_paths.edit(index)
+        cue['in_ms'] = max(0, int(in_ms))
+        cue['out_ms'] = int(out_ms) if out_ms is not None else None
+        if cue['out_ms'] is not None and cue['out_ms'] <= cue['in_ms']:
+            print(f"Out point must be after the in point; clearing out point of cue {index + 1}")
+            cue['out_ms'] = None
+        self.update_slot_button(index)
+        # 待機中のプレーヤーをイン点に合わせ直す
+        self._sync_pool(self._active_pool_index())
+
+    def clear_slot_range(self, index):
+        self.set_slot_range(index, 0, None)
+
+    # 壁時計の時刻でキューを出す予定を入力するメソッド
+    def ask_schedule_at(self, index):
+        text, ok = QInputDialog.getText(self, "時刻を指定して再生",
+                                        f"キュー {index + 1} を再生する時刻 (HH:MM:SS.mmm):")
+        if ok and text:
+            try:
+                self.cue_scheduler.schedule_at(index, text)
+            except ValueError as e:
+                print(f"Invalid time: {e}")
+
+    # 他のキューが指定位置に達したらキューを出す予定を入力するメソッド
+    def ask_schedule_after(self, index):
+        after, ok = QInputDialog.getInt(self, "他のキューの再生位置で再生", "元のキュー番号:",
+                                        max(1, self.current_playing_button_index + 1), 1, 1_000_000)
+        if not ok:
+            return
+        text, ok = QInputDialog.getText(self, "他のキューの再生位置で再生",
+                                        f"キュー {after} の再生位置 (MM:SS.mmm):")
+        if ok and text:
+            try:
+                self.cue_scheduler.schedule_after(index, after - 1, parse_timecode(text))
+            except ValueError as e:
+                print(f"Invalid position: {e}")
+
+    def ask_trigger_debounce(self):
+        debounce_ms, ok = QInputDialog.getInt(self, "連打をまとめる時間",
+                                              "キューを出してからこの時間 (ms) 内の入力は最後のものだけ出す:",
+                                              self.trigger_arbiter.debounce_ms, 0, 2000, 10)
+        if ok:
+            self.trigger_arbiter.debounce_ms = debounce_ms
+
+    def ask_monitor_rate(self):
+        fps, ok = QInputDialog.getInt(self, "コンフィデンスモニター", "最大フレームレート (fps):",
+                                      self.confidence_monitor.fps, 1, 30, 1)
+        if not ok:
+            return
+        cpu_percent, ok = QInputDialog.getInt(self, "コンフィデンスモニター",
+                                              "縮小処理に使う CPU の上限 (1 コアに対する %):",
+                                              self.confidence_monitor.cpu_percent, 1, 50, 1)
+        if ok:
+            self.confidence_monitor.set_rate(fps, cpu_percent)
+
+    # コンフィデンスモニターの表示を切り替えるメソッド（非表示の間はフレームを受け取らない）
+    def set_monitor_enabled(self, enabled):
+        self.monitor_action.setChecked(enabled)
+        self.confidence_monitor.set_enabled(enabled)
+        self.monitor_widget.setVisible(enabled)
+        if not enabled:
+            self.monitor_widget.clear()
+
+    def ask_schedule_lead_time(self):
+        lead_ms, ok = QInputDialog.getInt(self, "スケジュールの準備時間", "キューの何 ms 前に準備するか:",
+                                          self.cue_scheduler.lead_time_ms, 0, 60000, 100)
+        if ok:
+            self.cue_scheduler.lead_time_ms = lead_ms
+
+    # スケジュールされたキューのプレーヤーを事前に開いて先頭フレームまで準備するメソッド
+    def prearm_cue(self, index):
+        file_path = self.video_paths.get(index, {}).get('path')
+        if file_path and self._active_pool_index() != index:
+            self.player_pool.arm(index, file_path, self.video_paths[index].get('in_ms', 0))
+
+    # スケジューラーからのキュー（ボタン操作と同じ経路で再生する）
+    def play_scheduled_cue(self, index):
+        self.tracer.begin('scheduler', 'scheduled_trigger')
+        self.trigger_arbiter.submit(index, self.video_paths.get(index, {}).get('outputs') or [0], immediate=True)
+
+    # スロットのトランジションを設定するメソッド
+    def set_slot_transition(self, index, kind, duration):
+        self.video_paths.edit(index)['transition'] = {'type': kind, 'duration': duration}
 
     # ウィンドウが閉じられるときのイベント
     def closeEvent(self, event: QCloseEvent):
         # プレイヤーウィンドウが開いていればそれも閉じる
         if self.player_window and self.player_window.isVisible():
             self.player_window.close()
+        for group in self.output_groups[1:]:
+            group.close()
+        self.media_probe.shutdown()
+        self.thumbnails.shutdown()
+        self.keyframes.shutdown()
+        self.proxies.shutdown()
+        self.seek_previews.shutdown()
+        self.audio_meter.stop()
+        self.confidence_monitor.stop()
+        self.preview_sheets.close_all()
         event.accept()
 
     # キーが押されたときのイベントハンドラ（メインウィンドウ用）
@@ -317,9 +1094,13 @@ class VideoPlayer(QMainWindow):
             Qt.Key.Key_7: 6, Qt.Key.Key_8: 7, Qt.Key.Key_9: 8,
         }
         key = event.key()
-        # 押されたキーがマッピングにあれば、対応するビデオを再生
+        # 押されたキーがマッピングにあれば、表示中のバンクの対応するビデオを再生
         if key in key_map:
-            self.play_video_from_button(key_map[key])
+            self.tracer.begin('keyboard', 'key_press_event')
+            self.play_slot(key_map[key])
+        # PageUp/PageDown でバンクを切り替え
+        elif key in (Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            self.change_bank(-1 if key == Qt.Key.Key_PageUp else 1)
         # Cキーでコントローラーの表示/非表示を切り替え
         elif key == Qt.Key.Key_C:
             self.toggle_controller_visibility()
@@ -330,36 +1111,14 @@ class VideoPlayer(QMainWindow):
 
     # プレイヤーウィンドウを作成して表示する内部メソッド
     def _create_player_window(self, screen):
-        self.player_window = PlayerWindow(self)
+        self.player_window = self.output_groups[0].create_window(screen)
         self.player_window.destroyed.connect(self.player_window_closed)
-        self.media_player.setVideoOutput(self.player_window.video_widget)
-
-        # 黒背景
-        self.player_window.setStyleSheet("background-color: black;")
-        
-        # 擬似フルスクリーン（Spacesに移動しない）
-        self.player_window.setWindowFlags(
-            Qt.WindowType.FramelessWindowHint |
-            Qt.WindowType.WindowStaysOnTopHint
-        )
-        self.player_window.setGeometry(screen.geometry())
-        self.player_window.show()
-
-        if sys.platform == 'darwin':
-            # macOS の Dock とメニューバーを隠す
-            try:
-                hide_menubar_and_dock()
-            except Exception as e:
-                print("Failed to hide menu bar:", e)
-        elif sys.platform == 'win32':
-            # Windows ではフルスクリーンモードにする
-            self.player_window.showFullScreen()
-        
 
     # 出力スクリーンを切り替えるメソッド
     def switch_screen(self):
         screen_index = self.screen_selector.currentIndex()
         screen = self.screens[screen_index] if 0 <= screen_index < len(self.screens) else QApplication.primaryScreen()
+        self.output_groups[0].screen_index = screen_index
         self.player_window.setGeometry(screen.geometry())
         self.player_window.show()
         self.player_window.activateWindow()
@@ -368,24 +1127,25 @@ class VideoPlayer(QMainWindow):
     # 音声出力デバイスを切り替えるメソッド
     def switch_audio_device(self, index):
         if 0 <= index < len(self.audio_devices):
-            self.audio_output.setDevice(self.audio_devices[index])
+            self.output_groups[0].audio_index = index
+            self.output_groups[0].set_audio_device(self.audio_devices[index])
 
     # ビデオファイルを読み込むメソッド
     def load_video(self, button, index):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open Video", "", "Video Files (*.mp4 *.avi *.mkv)")
         if file_path:
-            self.video_paths[index]['path'] = file_path
+            # 別のファイルに差し替えたら、そのキューの予定は取り消す
+            if self.video_paths.get(index, {}).get('path') not in (None, file_path):
+                self.cue_scheduler.cancel_for(index)
+            self.video_paths.set_path(index, file_path)
             filename = file_path.split('/')[-1]
             self.video_loaded.emit(index, filename)
-            button.setToolTip(filename)
-            # ファイル名が長すぎる場合は省略
-            max_len = 25
-            if len(filename) > max_len:
-                display_name = filename[:max_len-3] + "..."
-            else:
-                display_name = filename
-            button.setText(display_name)
-            button.setEnabled(True)
+            self.update_slot_button(index)
+            self.update_bank_range()
+            self.media_probe.probe(file_path)
+            if self.video_paths[index].get('preload_ram'):
+                self.preloader.preload(index, self.playout_path(file_path))
+            self._sync_pool(self._active_pool_index())
             # プレイヤーウィンドウがなければ表示、あればスクリーンを切り替え
             if self.player_window is None:
                 self.show_player_window()
@@ -394,15 +1154,17 @@ class VideoPlayer(QMainWindow):
 
     # ボタンからビデオを再生するメソッド
     def play_video_from_button(self, index):
+        # Stream Deck やキーボードからのトレースがなければボタン操作として開始する
+        self.tracer.mark('play_video_from_button', source='button')
         file_path = self.video_paths.get(index, {}).get('path')
         if file_path:
             # 前に再生していたボタンの色をリセット
-            if self.current_playing_button_index != -1 and self.current_playing_button_index < len(self.play_buttons):
-                self.play_buttons[self.current_playing_button_index].setStyleSheet("") # デフォルトに戻す
+            if self.current_playing_button_index != -1:
+                self._set_button_playing(self.current_playing_button_index, False) # デフォルトに戻す
                 self.playback_state_changed.emit(self.current_playing_button_index, False)
             
             # 現在再生するボタンの色を赤に変更
-            self.play_buttons[index].setStyleSheet("background-color: red;")
+            self._set_button_playing(index, True)
             self.current_playing_button_index = index
             self.playback_state_changed.emit(index, True)
 
@@ -412,47 +1174,61 @@ class VideoPlayer(QMainWindow):
             else:
                 self.switch_screen()
             
-            # ループ設定を適用
+            # ループ設定とトランジションを適用し、割り当てられた出力グループへキューを出力
             loop_enabled = self.video_paths.get(index, {}).get('loop', False)
-            self.media_player.setLoops(QMediaPlayer.Loops.Infinite if loop_enabled else 1)
-
-            # ビデオを再生
-            self.media_player.setSource(QUrl.fromLocalFile(file_path))
-            self.media_player.play()
+            loops = QMediaPlayer.Loops.Infinite if loop_enabled else 1
+            groups = self.groups_for_slot(index)
+            # 複数の出力に同時に出す場合は、全員の最初のフレームがそろってから一斉に再生する
+            barrier = StartBarrier(len(groups), parent=self) if len(groups) > 1 else None
+            self._bind_ui_output(groups[0].stack)
+            self.current_cue_groups = groups
+            cue = self.video_paths[index]
+            for group in groups:
+                group.stack.cue(index, file_path, loops, cue.get('transition'), barrier,
+                                cue.get('in_ms', 0), cue.get('out_ms'))
+            self._sync_pool(index)
             self.current_playing_file_name = file_path.split('/')[-1]
 
     # 再生と一時停止を切り替えるメソッド
     def toggle_play_pause(self):
-        if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
-            self.media_player.pause()
+        if self.output.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            for group in self.current_cue_groups:
+                group.stack.pause()
         else:
-            self.media_player.play()
+            for group in self.current_cue_groups:
+                group.stack.play()
 
     # ビデオを停止するメソッド
     def stop_video(self):
-        self.media_player.stop()
+        for group in self.output_groups:
+            group.stack.stop()
+        self.trigger_arbiter.reset()
+        self.cue_scheduler.on_position(-1, 0)
+        self.meter_widget.reset()
+        self.display_scheduler.reset()
         self.time_label.setText("--:--:-- / --:--:--")
         self.current_playing_file_name = "停止中"
         self.current_video_label.setText(self.current_playing_file_name)
         # ボタンの色をリセット
-        if self.current_playing_button_index != -1 and self.current_playing_button_index < len(self.play_buttons):
-            self.play_buttons[self.current_playing_button_index].setStyleSheet("") # デフォルトに戻す
+        if self.current_playing_button_index != -1:
+            self._set_button_playing(self.current_playing_button_index, False) # デフォルトに戻す
             self.playback_state_changed.emit(self.current_playing_button_index, False)
         self.current_playing_button_index = -1
 
     # プレイヤーウィンドウが閉じられたときの処理
     def player_window_closed(self):
+        main_stack = self.output_groups[0].stack
         try:
-            if self.media_player and self.media_player.playbackState() != QMediaPlayer.PlaybackState.StoppedState:
-                self.media_player.stop()
+            if main_stack.playbackState() != QMediaPlayer.PlaybackState.StoppedState:
+                main_stack.stop()
         except RuntimeError:
             pass
         self.player_window = None
         self.current_playing_file_name = "停止中"
         self.current_video_label.setText(self.current_playing_file_name)
         # ボタンの色をリセット
-        if self.current_playing_button_index != -1 and self.current_playing_button_index < len(self.play_buttons):
-            self.play_buttons[self.current_playing_button_index].setStyleSheet("") # デフォルトに戻す
+        if self.current_playing_button_index != -1:
+            self._set_button_playing(self.current_playing_button_index, False) # デフォルトに戻す
             self.playback_state_changed.emit(self.current_playing_button_index, False)
         self.current_playing_button_index = -1
 
@@ -461,19 +1237,39 @@ class VideoPlayer(QMainWindow):
         if self.media_player.source().isValid(): # 追加: 有効なソースがあるか確認
             self.media_player.setPosition(position)
 
-    # 再生位置が変わったときの処理
+    # 再生位置が変わったときの処理（実際の描画は表示更新スケジューラーに任せる）
     def position_changed(self, position):
-        self.seek_slider.setValue(position)
-        duration = self.media_player.duration()
-        if duration > 0:
-            if self.current_playing_button_index != -1:
-                self.position_updated.emit(self.current_playing_button_index, position, duration)
-            remaining = duration - position
-            # 時間ラベルを更新 (再生時間 / 総時間 (-残り時間))
-            self.time_label.setText(f"{self.format_time(position)} / {self.format_time(duration)}  (-{self.format_time(remaining)})")
+        self.display_scheduler.update_position(position, self.media_player.duration())
+        self.cue_scheduler.on_position(self.current_playing_button_index, position, self.media_player.playbackRate())
+
+    # スプライトシートができたら場所を覚えておく（開くのはプレビューを出すとき）
+    def seek_preview_loaded(self, file_path, sheet_path):
+        self.preview_sheets.add(file_path, sheet_path)
+
+    # 再生中のクリップの指定位置のプレビュー画像（シートがなければ None）
+    def seek_preview_image(self, position):
+        if self.current_playing_button_index == -1:
+            return None
+        sheet = self.preview_sheets.get(self.video_paths.get(self.current_playing_button_index, {}).get('path'))
+        return sheet.frame_at(position) if sheet is not None else None
+
+    # シークバーをフレーム間隔で更新するメソッド
+    def refresh_seek_slider(self, position):
+        # ドラッグ中はユーザーの操作を優先する
+        if not self.seek_slider.isSliderDown():
+            self.seek_slider.setValue(position)
+
+    # 表示上の時間（秒）が変わったときだけ時間ラベルと Stream Deck を更新するメソッド
+    def refresh_time_display(self, position, duration):
+        if self.current_playing_button_index != -1:
+            self.position_updated.emit(self.current_playing_button_index, position, duration)
+        remaining = duration - position
+        # 時間ラベルを更新 (再生時間 / 総時間 (-残り時間))
+        self.time_label.setText(f"{self.format_time(position)} / {self.format_time(duration)}  (-{self.format_time(remaining)})")
 
     # ビデオの総時間が変わったときの処理
     def duration_changed(self, duration):
+        self.display_scheduler.reset()
         self.seek_slider.setRange(0, duration)
         self.time_label.setText(f"00:00:00 / {self.format_time(duration)}  (-{self.format_time(duration)})")
 
@@ -504,8 +1300,9 @@ class VideoPlayer(QMainWindow):
     # ビデオのループ設定を切り替えるメソッド
     def toggle_video_loop_setting(self, index, state):
         if self.video_paths.get(index):
-            self.video_paths[index]['loop'] = state # state は bool (True/False)
+            self.video_paths.edit(index)['loop'] = state # state は bool (True/False)
             
             # 現在再生中のビデオのループ設定が変更された場合、即座に適用
             if index == self.current_playing_button_index:
-                self.media_player.setLoops(QMediaPlayer.Loops.Infinite if state else 1)
\ No newline at end of file
+                for group in self.current_cue_groups:
+                    group.stack.set_loop(state)
\ No newline at end of file